@@ -0,0 +1,129 @@
+import asyncio
+import heapq
+import itertools
+import logging
+import math
+import time
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, List, Tuple
+
+from fastapi import HTTPException
+
+import config
+import metrics
+
+logger = logging.getLogger(__name__)
+
+# Lower rank is admitted first
+PRIORITIES = {"interactive": 0, "bulk": 1}
+
+
+class Overloaded(HTTPException):
+    """Analysis capacity is exhausted; carries a Retry-After estimate"""
+
+    def __init__(self, status_code: int, detail: str, retry_after: int):
+        super().__init__(status_code, detail=detail, headers={"Retry-After": str(retry_after)})
+
+
+class AdmissionController:
+    """Bounded concurrency with a bounded, prioritized wait queue.
+
+    At most ``max_concurrent`` holders run at once per process. Others wait
+    in a queue ordered by priority, then arrival. A full queue is refused
+    right away with 429. A request that waits longer than ``max_wait`` gets
+    503. Bulk requests may only use ``bulk_queue_share`` of the queue, so
+    they cannot crowd out interactive ones. Everything runs on the event
+    loop, so no locking is needed.
+    """
+
+    def __init__(
+        self,
+        max_concurrent: int = config.ANALYSIS_MAX_CONCURRENCY,
+        max_queue: int = config.ANALYSIS_MAX_QUEUE,
+        max_wait: float = config.ANALYSIS_MAX_QUEUE_WAIT,
+        bulk_queue_share: float = config.ANALYSIS_BULK_QUEUE_SHARE,
+        initial_service_time: float = 10.0
+    ):
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.max_wait = max_wait
+        self.bulk_queue_share = bulk_queue_share
+        self.active = 0
+        self.queued = {name: 0 for name in PRIORITIES}
+        self.service_time = initial_service_time
+        self._waiters: List[Tuple[int, int, asyncio.Future]] = []
+        self._sequence = itertools.count()
+
+    @property
+    def queue_length(self) -> int:
+        return sum(self.queued.values())
+
+    def retry_after(self) -> int:
+        """Seconds until a slot is likely free, from the average service time"""
+        rounds = (self.queue_length + 1) / self.max_concurrent
+        return max(1, math.ceil(rounds * self.service_time))
+
+    def _queue_limit(self, priority: str) -> int:
+        if PRIORITIES[priority] == 0:
+            return self.max_queue
+        return int(self.max_queue * self.bulk_queue_share)
+
+    def _release(self):
+        """Hand the slot to the best live waiter, or free it"""
+        while self._waiters:
+            _, _, future = heapq.heappop(self._waiters)
+            if not future.done():
+                future.set_result(None)
+                return
+        self.active -= 1
+
+    def _reject(self, status_code: int, reason: str, detail: str, priority: str):
+        metrics.ADMISSION_REJECTED.labels(priority, reason).inc()
+        raise Overloaded(status_code, detail, self.retry_after())
+
+    async def _wait_for_slot(self, priority: str):
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (PRIORITIES[priority], next(self._sequence), future))
+        self.queued[priority] += 1
+        metrics.ADMISSION_QUEUED.labels(priority).inc()
+        start = time.perf_counter()
+        try:
+            await asyncio.wait_for(asyncio.shield(future), self.max_wait)
+        except (asyncio.TimeoutError, asyncio.CancelledError) as e:
+            if future.done() and not future.cancelled():
+                # The slot was handed over just as we gave up; pass it on
+                self._release()
+            else:
+                future.cancel()
+            if isinstance(e, asyncio.CancelledError):
+                raise
+            self._reject(503, "timeout", "Analysis is overloaded, please retry later", priority)
+        finally:
+            self.queued[priority] -= 1
+            metrics.ADMISSION_QUEUED.labels(priority).dec()
+            metrics.ADMISSION_WAIT_SECONDS.labels(priority).observe(time.perf_counter() - start)
+
+    @asynccontextmanager
+    async def admit(self, priority: str = "interactive") -> AsyncIterator[None]:
+        if priority not in PRIORITIES:
+            raise HTTPException(400, detail=f"Unknown priority: {priority}")
+
+        if self.active < self.max_concurrent and not self.queue_length:
+            self.active += 1
+        elif self.queued[priority] >= self._queue_limit(priority) or self.queue_length >= self.max_queue:
+            self._reject(429, "queue_full", "Too many analysis requests queued", priority)
+        else:
+            await self._wait_for_slot(priority)
+
+        metrics.ADMISSION_ACTIVE.inc()
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            # Moving average of how long a slot is held, for Retry-After
+            self.service_time = 0.8 * self.service_time + 0.2 * (time.perf_counter() - start)
+            metrics.ADMISSION_ACTIVE.dec()
+            self._release()
+
+
+analysis_admission = AdmissionController()
@@ -0,0 +1,121 @@
+import logging
+from datetime import datetime
+from typing import List, Optional, Union
+
+from sqlalchemy import delete, select
+from sqlalchemy.orm import Session
+
+import config
+from database import insert_for
+from models import Resume, ResumeAnalysis
+
+logger = logging.getLogger(__name__)
+
+# Bump whenever the analysis output changes shape or content, so stored
+# results are kept apart per pipeline version and old ones get pruned.
+PIPELINE_VERSION = "1"
+
+
+def extract_tags(result: dict) -> List[str]:
+    """Generate tags from analysis results"""
+    tags = []
+    if result.get('skills'):
+        tags.extend(result['skills'][:3])
+    if result.get('experience'):
+        tags.extend(exp['role'].split()[0] for exp in result['experience'][:2])
+    if result.get('education'):
+        tags.append(result['education'][0]['degree'].split()[0])
+    return list(set(tags))[:5]
+
+
+def _as_datetime(value: Union[str, datetime, None]) -> Optional[datetime]:
+    if isinstance(value, str):
+        return datetime.fromisoformat(value)
+    return value
+
+
+def store_analysis_result(
+    db: Session,
+    resume_id: str,
+    result: dict,
+    pipeline_version: str = PIPELINE_VERSION
+):
+    """Insert or replace the analysis of a resume for one pipeline version"""
+    try:
+        now = datetime.now()
+        processed_at = _as_datetime(result.get('processed_at')) or now
+        serializable_result = {**result, 'processed_at': processed_at.isoformat()}
+
+        stmt = insert_for(db, ResumeAnalysis.__table__).values(
+            resume_id=resume_id,
+            pipeline_version=pipeline_version,
+            analysis_data=serializable_result,
+            tags=extract_tags(result),
+            created_at=now,
+            processed_at=processed_at,
+            updated_at=now
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["resume_id", "pipeline_version"],
+            set_={
+                "analysis_data": stmt.excluded.analysis_data,
+                "tags": stmt.excluded.tags,
+                "processed_at": stmt.excluded.processed_at,
+                "updated_at": stmt.excluded.updated_at,
+            }
+        )
+        db.execute(stmt)
+        prune_superseded_analyses(db, resume_id)
+        db.commit()
+
+    except Exception as e:
+        db.rollback()
+        logger.error(f"Failed to store analysis: {str(e)}", exc_info=True)
+        raise
+
+
+def prune_superseded_analyses(
+    db: Session,
+    resume_id: str,
+    keep: int = config.ANALYSIS_RETAINED_VERSIONS
+) -> int:
+    """Delete all but the ``keep`` most recently processed versions of a resume"""
+    retained = (
+        select(ResumeAnalysis.id)
+        .where(ResumeAnalysis.resume_id == resume_id)
+        .order_by(ResumeAnalysis.processed_at.desc(), ResumeAnalysis.id.desc())
+        .limit(keep)
+    )
+    result = db.execute(
+        delete(ResumeAnalysis)
+        .where(ResumeAnalysis.resume_id == resume_id, ResumeAnalysis.id.not_in(retained))
+        .execution_options(synchronize_session=False)
+    )
+    return result.rowcount
+
+
+def latest_analysis_query(resume_id: str, pipeline_version: Optional[str] = None):
+    """Most recent stored analysis of a resume, served by ix_resume_analyses_latest"""
+    stmt = select(ResumeAnalysis).where(ResumeAnalysis.resume_id == resume_id)
+    if pipeline_version is not None:
+        stmt = stmt.where(ResumeAnalysis.pipeline_version == pipeline_version)
+    return stmt.order_by(ResumeAnalysis.processed_at.desc()).limit(1)
+
+
+def get_latest_analysis(
+    db: Session,
+    resume_id: str,
+    pipeline_version: Optional[str] = None
+) -> Optional[ResumeAnalysis]:
+    return db.execute(latest_analysis_query(resume_id, pipeline_version)).scalars().first()
+
+
+def content_analysis_query(sha256: str, pipeline_version: str = PIPELINE_VERSION):
+    """Latest stored analysis of any resume with the same file contents"""
+    return (
+        select(ResumeAnalysis)
+        .join(Resume, Resume.id == ResumeAnalysis.resume_id)
+        .where(Resume.sha256 == sha256, ResumeAnalysis.pipeline_version == pipeline_version)
+        .order_by(ResumeAnalysis.processed_at.desc())
+        .limit(1)
+    )
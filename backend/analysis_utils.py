@@ -1,7 +1,7 @@
 import re
 import logging
 from datetime import datetime
-from typing import List, Dict, Optional
+from typing import Any, Callable, List, Dict, Optional
 from io import BytesIO
 import PyPDF2
 from sqlalchemy.orm import Session
@@ -15,26 +15,30 @@ import spacy
 import re
 from datetime import datetime
 from typing import List, Dict, Set
+from stages import Stage, StageGraph
+from metrics import observe_stages
+from stage_cache import memoized
+from taxonomy import TAXONOMY
+from ner import (
+    ACTIVE_MODELS,
+    load_bert_pipeline,
+    load_spacy_model,
+    process_bert_entities,
+    process_spacy_entities
+)
+from analysis_store import PIPELINE_VERSION, extract_tags, store_analysis_result
+from skills import (
+    clean_skills,
+    normalize_skills,
+    track_skills,
+    get_filtered_skills,
+    filter_technical_skills
+)
 
 logger = logging.getLogger(__name__)
 
-try:
-    nlp_bert = pipeline(
-        "ner",
-        model="dslim/bert-large-NER", 
-        aggregation_strategy="max", 
-        device=0 if torch.cuda.is_available() else -1,
-        grouped_entities=True 
-    )   
-    logger.info("NER pipeline initialized successfully")
-except Exception as e:
-    logger.error(f"Failed to initialize NER pipeline: {str(e)}")
-    raise
-
-nlp_spacy = spacy.load("en_core_web_lg")
-
-GLOBAL_SKILLS: Set[str] = set()
-RESUME_SKILL_MAPPING: Dict[str, Set[str]] = {}
+nlp_bert = load_bert_pipeline()
+nlp_spacy = load_spacy_model()
 
 def extract_experience_details(text: str) -> List[Dict]:
     """
@@ -303,56 +307,6 @@ def _finalize_project(project: Dict) -> Dict:
         "technologies": technologies
     }
 
-def clean_skills(skills: List[str]) -> List[str]:
-    """
-    Strictly filter only technical skills
-    """
-    technical_skills = {
-        'python', 'java', 'javascript', 'c++', 'c#', 'go', 'ruby', 'swift', 'kotlin', 
-        'typescript', 'php', 'rust', 'scala', 'r', 'dart', 'sql',
-        
-        'html', 'css', 'react', 'angular', 'vue', 'django', 'flask', 'spring', 
-        'laravel', 'node.js', 'express', 'asp.net',
-        
-        'mysql', 'postgresql', 'mongodb', 'redis', 'oracle', 'sqlite', 'firebase',
-        'pandas', 'numpy', 'spark', 'hadoop', 'tensorflow', 'pytorch', 'keras',
-        
-        'docker', 'kubernetes', 'aws', 'azure', 'gcp', 'terraform', 'ansible',
-        'jenkins', 'git', 'linux', 'bash',
-        
-        'android', 'ios', 'react native', 'flutter', 'xamarin',
-        
-        'machine learning', 'artificial intelligence', 'deep learning', 'nlp',
-        'computer vision', 'blockchain', 'cybersecurity', 'embedded systems',
-        'arduino', 'raspberry pi'
-    }
-    
-    cleaned = []
-    seen = set()
-    
-    for skill in skills:
-        skill = re.sub(r'[^a-zA-Z0-9+#\.\s]', '', skill).strip().lower()
-        
-        if skill in technical_skills:
-            proper_case = skill.title() if len(skill) > 3 else skill.upper()
-            if proper_case not in seen:
-                seen.add(proper_case)
-                cleaned.append(proper_case)
-        else:
-            variations = {
-                'js': 'JavaScript',
-                'reactjs': 'React',
-                'nodejs': 'Node.js',
-                'ai': 'Artificial Intelligence',
-                'ml': 'Machine Learning',
-                'dl': 'Deep Learning'
-            }
-            if skill in variations and variations[skill] not in seen:
-                seen.add(variations[skill])
-                cleaned.append(variations[skill])
-    
-    return sorted(cleaned)
-
 def extract_text_from_pdf(file_path: str, max_pages: int = 3) -> str:
     """Extract text from PDF with page limit"""
     try:
@@ -367,57 +321,6 @@ def extract_text_from_pdf(file_path: str, max_pages: int = 3) -> str:
         logger.error(f"PDF extraction error: {str(e)}")
         return ""
 
-def process_bert_entities(results):
-    """Process BERT NER results"""
-    entity_map = {
-        'PER': ['PER'],
-        'ORG': ['ORG'],
-        'LOC': ['LOC'],
-        'DATE': ['DATE']
-    }
-    
-    entities = defaultdict(list)
-    current_entity = None
-    
-    for entity in results:
-        entity_group = None
-        for group, labels in entity_map.items():
-            if entity['entity_group'] in labels:
-                entity_group = group
-                break
-        
-        if entity_group:
-            if entity['word'].startswith('##'):
-                if current_entity and current_entity['group'] == entity_group:
-                    current_entity['text'] += entity['word'].replace('##', '')
-            else:
-                if current_entity:
-                    entities[current_entity['group']].append(current_entity['text'])
-                current_entity = {
-                    'text': entity['word'],
-                    'group': entity_group
-                }
-    
-    if current_entity:
-        entities[current_entity['group']].append(current_entity['text'])
-    
-    return dict(entities)
-
-def process_spacy_entities(doc):
-    """Process spaCy entities"""
-    entities = defaultdict(list)
-    for ent in doc.ents:
-        if ent.label_ == 'PERSON':
-            entities['PER'].append(ent.text)
-        elif ent.label_ == 'ORG':
-            entities['ORG'].append(ent.text)
-        elif ent.label_ == 'GPE' or ent.label_ == 'LOC':
-            entities['LOC'].append(ent.text)
-        elif ent.label_ == 'DATE':
-            entities['DATE'].append(ent.text)
-    
-    return dict(entities)
-
 def extract_names(text, entities):
     name_match = re.search(r'^([A-Z][a-z]+(?:\s+[A-Z][a-z]+)+)', text)
     
@@ -460,7 +363,7 @@ def extract_skills(text, entities):
         skills_text = skill_section.group(1)
         skills.extend(re.findall(r'[A-Za-z\+#\.]+', skills_text))
     
-    tech_terms = ['Python', 'Java', 'SQL', 'JavaScript', 'TensorFlow', 'Django']
+    tech_terms = TAXONOMY.current.text_terms
     skills.extend([term for term in tech_terms if term in text])
     entities['SKILLS'].append(list(set(skills)))
     
@@ -547,105 +450,8 @@ def clean_name(name: str) -> str:
     words = [w.capitalize() for w in re.findall(r'[a-zA-Z]+', name)[:1]]
     return ' '.join(words) if words else "Unknown"
 
-def normalize_skills(skills: List[str]) -> List[str]:
-    """
-    Normalize skills with comprehensive mapping and tracking
-    """
-    skill_mappings = {
-        'SQL': 'sql',
-        'mysql': 'sql',
-        'javascript': 'JavaScript',
-        'html': 'HTML',
-        'css': 'CSS',
-        'qjango': 'Django',
-        'c++': 'C++',
-        'java': 'Java',
-        'python': 'Python',
-        'numpy': 'NumPy',
-        'tensorflow': 'TensorFlow',
-        
-        'js': 'JavaScript',
-        'reactjs': 'React',
-        'nodejs': 'Node.js',
-        'ai': 'Artificial Intelligence',
-        'ml': 'Machine Learning',
-        'dl': 'Deep Learning',
-        'sqlite': 'SQL',
-        'postgresql': 'SQL',
-        'oracle': 'SQL',
-        'mongodb': 'NoSQL'
-    }
-    
-    normalized = set()
-    for skill in skills:
-        skill = re.sub(r'[^a-zA-Z0-9+#\.\s]', '', skill).strip().lower()
-        if not skill or len(skill) < 2:
-            continue
-        
-        skill = skill_mappings.get(skill, skill)
-        
-        if skill.upper() == skill and len(skill) > 2:
-            skill = skill.title()
-        elif '.' in skill:  
-            parts = skill.split('.')
-            skill = f"{parts[0].title()}.{parts[1]}" if len(parts) > 1 else skill
-        
-        normalized.add(skill)
-    
-    return sorted(normalized, key=lambda x: x.lower())
-
-def track_skills(resume_id: str, skills: List[str]):
-    """
-    Track skills globally and per-resume
-    """
-    skill_set = set()
-    technical_skills = [
-        'python', 'java', 'javascript', 'c++', 'c#', 'go', 'ruby', 'swift', 'kotlin', 
-        'typescript', 'php', 'rust', 'scala', 'r', 'dart', 'sql',
-        
-        'html', 'css', 'react', 'angular', 'vue', 'django', 'flask', 'spring', 
-        'laravel', 'node.js', 'express', 'asp.net',
-        
-        'mysql', 'postgresql', 'mongodb', 'redis', 'oracle', 'sqlite', 'firebase',
-        'pandas', 'numpy', 'spark', 'hadoop', 'tensorflow', 'pytorch', 'keras',
-        
-        'docker', 'kubernetes', 'aws', 'azure', 'gcp', 'terraform', 'ansible',
-        'jenkins', 'git', 'linux', 'bash',
-        
-        'android', 'ios', 'react native', 'flutter', 'xamarin',
-        
-        'machine learning', 'artificial intelligence', 'deep learning', 'nlp',
-        'computer vision', 'blockchain', 'cybersecurity', 'embedded systems',
-        'arduino', 'raspberry pi'
-    ]
-
-    final_normalized = []
-    normalized = normalize_skills(skills)
-
-    for i in normalized:
-        if i.lower() in technical_skills:
-            final_normalized.append(i)
-            skill_set.add(i)
-    
-    GLOBAL_SKILLS.update(skill_set)
-    
-    RESUME_SKILL_MAPPING[resume_id] = skill_set
-    
-    return final_normalized
-    
-def get_filtered_skills(resume_id: str) -> List[str]:
-    """
-    Get skills filtered by global knowledge
-    """
-    resume_skills = RESUME_SKILL_MAPPING.get(resume_id, set())
-    return sorted(resume_skills & GLOBAL_SKILLS)  # Intersection with global skills
-
-
-def extract_resume_entities(text):
-
-    text = re.sub(r'\s+', ' ', text).strip()
-    
-    entities = {
+def _new_entities() -> Dict[str, list]:
+    return {
         'NAME': [],
         'CONTACT': [],
         'EDUCATION': [],
@@ -656,47 +462,97 @@ def extract_resume_entities(text):
         'DATES': [],
         'LOCATIONS': []
     }
-    
-    try:
-        
-        bert_results = nlp_bert(text)
-        entities.update(process_bert_entities(bert_results))
-        
-        doc = nlp_spacy(text)
-        entities.update(process_spacy_entities(doc))
-        
-        extract_names(text, entities)
-        extract_contact_info(text, entities)
-        extract_education(text, entities)
-        extract_skills(text, entities)
-        extract_experience_with_duration(text, entities)
-
-        # Specialized extraction for resumes
-        # entities.update({
-        #     'NAME': extract_names(text),
-        #     'CONTACT': extract_contact_info(text),
-        #     'EDUCATION': extract_education(text),
-        #     'SKILLS': extract_skills(text),
-        #     'EXPERIENCE': extract_experience_with_duration(text, entities),
-        # })
-        
-    except Exception as e:
-        print(f"Entity extraction failed: {str(e)}")
-    
+
+# Version of each stage whose output is persisted (see stage_cache). Bump
+# one when its output for the same input changes, e.g. a new model or a
+# PDF parsing fix; only that stage is recomputed on the next run. The regex
+# extractors and post-processing take milliseconds and always re-run, so a
+# fix there just needs a PIPELINE_VERSION bump and a reprocess.
+STAGE_VERSIONS = {
+    "pdf_text": "1",
+    "bert": "1",
+    "spacy": "1",
+}
+
+# NER outputs are persisted per model as well
+ENTITY_STAGE_VERSIONS = {
+    name: f"{STAGE_VERSIONS[name]}:{ACTIVE_MODELS[name]}" for name in ("bert", "spacy")
+}
+
+def run_bert_stage(text: str) -> Dict[str, list]:
+    return process_bert_entities(nlp_bert(text))
+
+def run_spacy_stage(text: str) -> Dict[str, list]:
+    return process_spacy_entities(nlp_spacy(text))
+
+def run_regex_stage(text: str) -> Dict[str, list]:
+    """Run the specialized resume extractors on their own entity map"""
+    entities = _new_entities()
+    extract_names(text, entities)
+    extract_contact_info(text, entities)
+    extract_education(text, entities)
+    extract_skills(text, entities)
+    extract_experience_with_duration(text, entities)
+    return entities
+
+def merge_entities(bert: Dict, spacy: Dict, regex: Dict) -> Dict[str, list]:
+    """Combine stage outputs; spaCy labels take precedence over BERT ones"""
+    entities = _new_entities()
+    entities.update(bert)
+    entities.update(spacy)
+    for key in ('NAME', 'CONTACT', 'EDUCATION', 'SKILLS', 'EXPERIENCE'):
+        entities[key].extend(regex.get(key, []))
     return entities
 
+ENTITY_GRAPH = StageGraph([
+    Stage("bert", memoized("bert", ENTITY_STAGE_VERSIONS["bert"])(run_bert_stage), deps=("text",)),
+    Stage("spacy", memoized("spacy", ENTITY_STAGE_VERSIONS["spacy"])(run_spacy_stage), deps=("text",)),
+    Stage("regex", run_regex_stage, deps=("text",)),
+    Stage("merge", merge_entities, deps=("bert", "spacy", "regex")),
+])
+
+def normalize_text(text: str) -> str:
+    """Collapse whitespace the way entity extraction sees the text"""
+    return re.sub(r'\s+', ' ', text).strip()
+
+def tag_skills(text: str) -> List[str]:
+    """The skill-tagging stage on its own (no NER): the indexed skills for a resume's text"""
+    entities = _new_entities()
+    extract_skills(normalize_text(text), entities)
+    return filter_technical_skills(entities['SKILLS'][0])
+
+def extract_resume_entities(
+    text,
+    timings: Optional[Dict[str, float]] = None,
+    on_stage: Optional[Callable[[str, Any], None]] = None
+):
+    """
+    Run BERT, spaCy and the regex extractors concurrently and merge the results.
+    Per-stage durations are exported as ``entities.<stage>`` metrics and
+    written into ``timings`` under the same names when it is provided.
+    ``on_stage(name, output)`` sees each stage's output as soon as it is ready.
+    """
+    text = normalize_text(text)
 
-def extract_tags(result: dict) -> List[str]:
-    """Generate tags from analysis results"""
-    tags = []
-    logger.info(result['experience'])
-    if result.get('skills'):
-        tags.extend(result['skills'][:3])
-    if result.get('experience'):
-        tags.extend(exp['role'].split()[0] for exp in result['experience'][:2])
-    if result.get('education'):
-        tags.append(result['education'][0]['degree'].split()[0])
-    return list(set(tags))[:5]
+    run = ENTITY_GRAPH.run(on_result=on_stage, text=text)
+    logger.info(
+        f"Entity extraction took {run.wall_time:.3f}s, "
+        f"critical path: {' -> '.join(run.critical_path())}"
+    )
+    durations = {f"entities.{name}": seconds for name, seconds in run.durations().items()}
+    observe_stages(durations)
+    if timings is not None:
+        timings.update(durations)
+
+    if "merge" in run.results:
+        return run.results["merge"]
+
+    # Keep whatever the surviving stages produced
+    return merge_entities(
+        run.results.get("bert", {}),
+        run.results.get("spacy", {}),
+        run.results.get("regex", _new_entities())
+    )
 
 
 def extract_skills_with_context(text: str, entities: dict) -> List[str]:
@@ -757,27 +613,3 @@ def get_best_name_candidate(names: List[str]) -> str:
         clean_name = ' '.join(clean_name.split()[:3])
     
     return clean_name or "Unknown"
-
-def store_analysis_result(db: Session, resume_id: str, result: dict):
-    try:
-        
-        serializable_result = {
-            **result,
-            'processed_at': result.get('processed_at').isoformat() if result.get('processed_at') else None
-        }
-        
-        analysis = ResumeAnalysis(
-            resume_id=resume_id,
-            analysis_data=serializable_result,
-            tags=extract_tags(result),
-            created_at=datetime.now(),
-            processed_at=result.get('processed_at')
-        )
-        
-        db.add(analysis)
-        db.commit()
-
-    except Exception as e:
-        db.rollback()
-        logger.error(f"Failed to store analysis: {str(e)}", exc_info=True)
-        raise
@@ -1,15 +1,40 @@
 from math import log
-from fastapi import FastAPI, UploadFile, File, HTTPException, Depends, Query, status
+from fastapi import FastAPI, UploadFile, File, HTTPException, Depends, Query, Request, Response, status
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import FileResponse
-from datetime import datetime
+from fastapi.responses import ORJSONResponse, StreamingResponse
+from fastapi.concurrency import run_in_threadpool
+from datetime import date, datetime
+import asyncio
 import uuid
-from typing import List, Optional
+from contextlib import nullcontext
+import secrets
+import time
+from typing import Any, AsyncIterator, Callable, Dict, Hashable, List, Optional, Tuple
 from sqlalchemy.orm import Session
-from sqlalchemy import or_
-from models import Base, Resume, ResumeAnalysis
-from schemas import ResumeCreate, ResumeResponse, ResumeAnalysisResponse
-from database import SessionLocal, engine, get_db
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import or_, select, func
+from models import Base, Resume, ResumeAnalysis, ResumeSkill, Skill
+from schemas import NearDuplicate, ResumeCreate, ResumeResponse, ResumeAnalysisResponse
+from database import SessionLocal, engine, async_engine, get_db, get_async_db
+from migrations import run_migrations
+from pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, keyset_page, ndjson_response, trim_page
+from responses import RESUME_COLUMNS, event_stream, fast_json, resume_row
+from response_cache import RESPONSE_CACHE
+from storage import ensure_blob, get_storage, remove_blob, spool_upload, store_blob
+from http_utils import content_disposition, etag_matches, parse_byte_range, strong_etag
+from middleware import BodySizeLimitMiddleware, MetricsMiddleware
+from metrics import record_cache_lookup, render_metrics, server_timing, span
+from profiling import profiled, save_profile, should_sample
+from admission import analysis_admission
+from singleflight import EventFeed, SingleFlight
+import stage_cache
+import payload_codec
+from pipeline import SECTIONS, run_analysis
+from retag import RETAGGER
+from taxonomy import TAXONOMY
+from export import FORMATS, SCHEMAS, Watermark, current_watermark, stream_table
+from dedup import duplicate_clusters, find_similar, index_rows, resume_signature, similar_analysis
+import config
 import logging
 import os
 import json
@@ -19,8 +44,6 @@ from io import BytesIO
 import PyPDF2
 import re
 from analysis_utils import (
-    GLOBAL_SKILLS,
-    RESUME_SKILL_MAPPING,
     _finalize_project,
     clean_name,
     normalize_skills,
@@ -38,6 +61,9 @@ from analysis_utils import (
     get_best_name_candidate,
     clean_skills
 )
+from skills import SKILL_SNAPSHOT, forget_resume_skills, prune_skill_changes
+from skill_stats import related_skills, skill_trends
+from analysis_store import PIPELINE_VERSION, content_analysis_query, latest_analysis_query
 
 # Initialize logging
 logging.basicConfig(level=logging.INFO)
@@ -47,7 +73,8 @@ logger = logging.getLogger(__name__)
 app = FastAPI(
     title="Resume API",
     version="1.0.0",
-    description="API for uploading, managing, and analyzing PDF resumes using BERT NER"
+    description="API for uploading, managing, and analyzing PDF resumes using BERT NER",
+    default_response_class=ORJSONResponse
 )
 
 # CORS Configuration
@@ -57,256 +84,630 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "Link", "ETag", "Content-Range", "Accept-Ranges", "Server-Timing", "Retry-After"],
 )
+app.add_middleware(BodySizeLimitMiddleware, max_bytes=config.MAX_UPLOAD_BYTES, paths=["/upload"])
+app.add_middleware(MetricsMiddleware)
 
 # Database setup
 Base.metadata.create_all(bind=engine)
-
-# # Initialize BERT NER pipeline
-# try:
-#     tokenizer = AutoTokenizer.from_pretrained("dslim/bert-base-NER")
-#     model = AutoModelForTokenClassification.from_pretrained("dslim/bert-base-NER")
-#     DEVICE = "cuda" if torch.cuda.is_available() else "cpu"
-#     model.to(DEVICE)
-#     nlp = pipeline(
-#         "ner",
-#         model=model,
-#         tokenizer=tokenizer,
-#         aggregation_strategy="simple",
-#         device=0 if DEVICE == "cuda" else -1
-#     )
-#     logger.info("BERT NER model loaded successfully")
-# except Exception as e:
-#     logger.error(f"Failed to load BERT NER model: {str(e)}")
-#     raise RuntimeError("Failed to initialize NER model")
+try:
+    run_migrations(engine)
+except Exception as e:
+    # Another worker may be applying the same migration concurrently
+    logger.warning(f"Database migrations not applied: {str(e)}")
 
 @app.on_event("startup")
 def startup_event():
     """Initialize services on startup"""
     logger.info("Starting up application")
+    try:
+        with SessionLocal() as db:
+            prune_skill_changes(db)
+        SKILL_SNAPSHOT.refresh()
+    except Exception as e:
+        logger.warning(f"Skill snapshot not loaded at startup: {str(e)}")
+    if payload_codec.unconverted(engine):
+        logger.warning(
+            "PAYLOAD_ENCODING=msgpack-zstd but the stored payloads were never converted; "
+            "run `python -m payload_codec --train --rewrite --vacuum`"
+        )
 
 @app.on_event("shutdown")
-def shutdown_event():
+async def shutdown_event():
     """Cleanup on shutdown"""
     logger.info("Shutting down application")
+    await async_engine.dispose()
 
-UPLOAD_DIR = "resumes"
+UPLOAD_DIR = config.UPLOAD_DIR
+analysis_flights = SingleFlight("analysis_inflight")
+# Section events of the runs in analysis_flights, by flight key
+analysis_feeds: Dict[Hashable, EventFeed] = {}
 os.makedirs(UPLOAD_DIR, exist_ok=True)
 
 @app.get("/")
 def health_check():
     return {"status": "ok"}
 
+@app.get("/metrics", include_in_schema=False)
+def prometheus_metrics():
+    body, content_type = render_metrics()
+    return Response(body, media_type=content_type)
+
 @app.post("/upload", response_model=ResumeResponse)
 async def upload_resume(
     file: UploadFile = File(...),
     user_id: str = "default_user",
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
-    """Upload a PDF resume to local storage"""
+    """Upload a PDF resume to content-addressed storage, streaming it in chunks"""
     if not file.filename.lower().endswith('.pdf'):
         raise HTTPException(400, detail="Only PDF files allowed")
 
-    existing_resume = db.query(Resume).filter(
-        Resume.user_id == user_id,
-        Resume.filename == file.filename
-    ).first()
+    existing_resume = (await db.execute(
+        select(Resume.id).where(
+            Resume.user_id == user_id,
+            Resume.filename == file.filename
+        )
+    )).first()
 
     if existing_resume:
         raise HTTPException(409, detail="A resume with this filename already exists")
 
     file_id = str(uuid.uuid4())
-    local_file_path = os.path.join(UPLOAD_DIR, f"{file_id}.pdf")
-    
+    upload = await spool_upload(file, UPLOAD_DIR)
+    # Identical files share one stored copy
     try:
-        contents = await file.read()
-        
-        if len(contents) > 10 * 1024 * 1024:
-            raise HTTPException(413, detail="File too large (max 10MB)")
+        storage_key, created = await run_in_threadpool(store_blob, upload)
+    except Exception:
+        upload.discard()
+        raise
 
-        with open(local_file_path, "wb") as f:
-            f.write(contents)
-        
+    signature = None
+    if config.DEDUP_ENABLED:
+        try:
+            signature = await run_in_threadpool(resume_signature, storage_key, upload.sha256)
+        except Exception as e:
+            # Unreadable PDFs are still accepted; analysis reports the error
+            logger.warning(f"No near-duplicate signature for {file.filename}: {str(e)}")
+    
+    try:
+        near_duplicates = []
+        if signature is not None:
+            near_duplicates = await db.run_sync(lambda session: find_similar(session, signature))
         db_resume = Resume(
             id=file_id,
             user_id=user_id,
             filename=file.filename,
-            file_path=local_file_path,
+            file_path=storage_key,
+            sha256=upload.sha256,
             created_at=datetime.utcnow(),
             resume_data={
-                "size": len(contents),
+                "size": upload.size,
                 "content_type": file.content_type,
                 "original_filename": file.filename
             }
         )
         
         db.add(db_resume)
-        db.commit()
-        db.refresh(db_resume)
+        if signature is not None:
+            # The index rows reference the resume row
+            await db.flush()
+            db.add_all(index_rows(file_id, signature))
+        await db.commit()
+        await db.refresh(db_resume)
+        RESPONSE_CACHE.invalidate(f"user:{user_id}", "search")
+        # A concurrent delete may have removed the shared file before our row was visible
+        if await run_in_threadpool(ensure_blob, upload, storage_key):
+            created = True
+
+        filenames = {}
+        if near_duplicates:
+            filenames = dict((await db.execute(
+                select(Resume.id, Resume.filename).where(Resume.id.in_([rid for rid, _ in near_duplicates]))
+            )).all())
         
         return ResumeResponse(
             **db_resume.__dict__,
-            download_url=f"/resumes/{file_id}/download"
+            download_url=f"/resumes/{file_id}/download",
+            near_duplicates=[
+                NearDuplicate(id=rid, filename=filenames[rid], similarity=score)
+                for rid, score in near_duplicates if rid in filenames
+            ]
         )
         
-    except HTTPException:
-        raise
     except Exception as e:
-        db.rollback()
+        await db.rollback()
+        upload.discard()
+        if created:
+            await release_blob(db, storage_key, upload.sha256)
         logger.error(f"Upload failed: {str(e)}", exc_info=True)
         raise HTTPException(500, detail="File upload failed")   
 
 
+async def release_blob(db: AsyncSession, file_path: str, sha256: str):
+    """Remove a stored file unless a committed resume still references it.
+
+    Stored files are shared by every resume with the same contents; an
+    upload that reused the file may have committed since it was stored.
+    """
+    remaining = (await db.execute(
+        select(func.count()).select_from(Resume).where(
+            Resume.sha256 == sha256,
+            Resume.file_path == file_path
+        )
+    )).scalar()
+    if not remaining:
+        await run_in_threadpool(remove_blob, file_path)
+
 @app.get("/resumes", response_model=List[ResumeResponse])
-def list_resumes(
+async def list_resumes(
+    request: Request,
     user_id: str = "default_user",
-    db: Session = Depends(get_db)
+    cursor: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    stream: bool = False,
+    db: AsyncSession = Depends(get_async_db)
 ):
-    """List all resumes for a user"""
+    """List resumes for a user, newest first.
+
+    Pages are keyed on (created_at, id); pass the X-Next-Cursor header of a
+    response as ``cursor`` to fetch the next page. ``stream=true`` returns
+    every remaining row as NDJSON instead. Pages are cached until the user's
+    resumes change, and carry an ETag for If-None-Match revalidation.
+    """
+    stmt = select(*RESUME_COLUMNS).where(Resume.user_id == user_id)
+    if stream:
+        return ndjson_response(keyset_page(stmt, cursor, None), resume_row, scalars=False)
+
+    async def build():
+        rows = (await db.execute(keyset_page(stmt, cursor, limit))).all()
+        headers = {}
+        page = trim_page(rows, limit, headers)
+        return [resume_row(row) for row in page], headers
+
     try:
-        resumes = db.query(Resume).filter(Resume.user_id == user_id).all()
-        
-        response = []
-        for resume in resumes:
-            response.append(ResumeResponse(
-                **resume.__dict__,
-                download_url=f"/resumes/{resume.id}/download"
-            ))
-                
-        return response
+        return await RESPONSE_CACHE.respond(
+            request, "response_resumes", ("resumes", user_id, cursor, limit), [f"user:{user_id}"], build
+        )
     except Exception as e:
         logger.error(f"List resumes failed: {str(e)}", exc_info=True)
         raise HTTPException(500, detail="Failed to retrieve resumes")
 
 @app.get("/resumes/search", response_model=List[ResumeResponse], status_code=200)
 async def enhanced_search(
+    request: Request,
     query: str = Query(..., min_length=2),  # Expects ?query=param
-    db: Session = Depends(get_db)
+    cursor: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    stream: bool = False,
+    db: AsyncSession = Depends(get_async_db)
 ):   
+    stmt = select(*RESUME_COLUMNS).where(
+        Resume.filename.ilike(f"%{query}%")  # Simplified to just filename search
+    )
+    if stream:
+        return ndjson_response(keyset_page(stmt, cursor, None), resume_row, scalars=False)
+
+    async def build():
+        results = (await db.execute(keyset_page(stmt, cursor, limit))).all()
+        headers = {}
+        page = trim_page(results, limit, headers)
+        return [resume_row(row) for row in page], headers
+
     try:
-        results = db.query(Resume).filter(
-            Resume.filename.ilike(f"%{query}%")  # Simplified to just filename search
-        ).all()
-        
-        if not results:
-            return []
-            
-        return [ResumeResponse(
-            **resume.__dict__,
-            download_url=f"/resumes/{resume.id}/download"
-        ) for resume in results]
+        # Any upload or delete may change the matches of any query
+        return await RESPONSE_CACHE.respond(
+            request, "response_search", ("search", query, cursor, limit), ["search"], build
+        )
         
     except Exception as e:
         logger.error(f"Search failed: {str(e)}")
         raise HTTPException(500, detail="Search service unavailable")
 
+def resumes_with_all_skills(skills: List[str]):
+    """Subquery of resume ids indexed with every one of ``skills``"""
+    search_skills = {skill.lower() for skill in skills}
+    return (
+        select(ResumeSkill.resume_id)
+        .join(Skill, Skill.id == ResumeSkill.skill_id)
+        .where(Skill.name_lower.in_(search_skills))
+        .group_by(ResumeSkill.resume_id)
+        .having(func.count(ResumeSkill.skill_id) == len(search_skills))
+    )
+
+async def group_skill_rows(rows):
+    """Fold (id, created_at, skill) rows, ordered by resume, into one item per resume"""
+    current = None
+    async for row in rows:
+        if current is not None and current["resume_id"] != row.id:
+            yield current
+            current = None
+        if current is None:
+            current = {"resume_id": row.id, "skills": []}
+        current["skills"].append(row.name)
+    if current is not None:
+        yield current
+
 @app.get("/resumes/filter")
-def filter_resumes(
-    skills: List[str] = Query([])
+async def filter_resumes(
+    skills: List[str] = Query([]),
+    cursor: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    stream: bool = False,
+    db: AsyncSession = Depends(get_async_db)
 ):
+    """Resumes that have ALL the requested skills (case-insensitive)"""
     if not skills:
         return []
+
+    matching = resumes_with_all_skills(skills)
+    if stream:
+        stmt = (
+            select(Resume.id, Resume.created_at, Skill.name)
+            .join(ResumeSkill, ResumeSkill.resume_id == Resume.id)
+            .join(Skill, Skill.id == ResumeSkill.skill_id)
+            .where(Resume.id.in_(matching))
+        )
+        return ndjson_response(
+            keyset_page(stmt, cursor, None), lambda item: item,
+            scalars=False, transform=group_skill_rows
+        )
+
+    stmt = select(Resume.id, Resume.created_at).where(Resume.id.in_(matching))
+    headers = {}
+    rows = trim_page((await db.execute(keyset_page(stmt, cursor, limit))).all(), limit, headers)
+    if not rows:
+        return fast_json([])
+
+    skill_rows = (await db.execute(
+        select(ResumeSkill.resume_id, Skill.name)
+        .join(Skill, Skill.id == ResumeSkill.skill_id)
+        .where(ResumeSkill.resume_id.in_([row.id for row in rows]))
+    )).all()
+    skills_by_resume = {row.id: [] for row in rows}
+    for resume_id, name in skill_rows:
+        skills_by_resume[resume_id].append(name)
+
+    return fast_json([
+        {"resume_id": row.id, "skills": skills_by_resume[row.id]}
+        for row in rows
+    ], headers)
     
-    # Convert skills to lowercase for case-insensitive comparison
-    search_skills = {skill.lower() for skill in skills}
-    
-    # Find resumes that have ALL the requested skills
-    matching_resumes = []
-    
-    for resume_id, resume_skills in RESUME_SKILL_MAPPING.items():
-        # Convert resume skills to lowercase
-        lower_resume_skills = {skill.lower() for skill in resume_skills}
-        
-        # Check if all search skills exist in this resume's skills
-        if search_skills.issubset(lower_resume_skills):
-            matching_resumes.append({
-                "resume_id": resume_id,
-                "skills": list(resume_skills)  # Return the original case skills
-            })
-    
-    return matching_resumes
-    
+@app.get("/resumes/duplicates")
+async def list_duplicates(
+    threshold: float = Query(config.DEDUP_THRESHOLD, ge=0.5, le=1.0),
+    user_id: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Clusters of near-identical resumes, largest first.
+
+    Similarity is the estimated Jaccard similarity of the resumes' word
+    5-grams; each member's ``similarity`` is against the oldest member.
+    """
+    clusters = await db.run_sync(duplicate_clusters, threshold, user_id)
+    return fast_json({"threshold": threshold, "clusters": clusters})
+
 @app.get("/resumes/skills")
-def get_all_skills():
-    return {"skills": sorted(list(GLOBAL_SKILLS))}
+async def get_all_skills(request: Request):
+    """Every skill found in at least one resume, from this worker's skill snapshot"""
+    await run_in_threadpool(SKILL_SNAPSHOT.refresh_if_stale)
+
+    async def build():
+        return {"skills": SKILL_SNAPSHOT.all_skills()}, {}
+
+    # Keyed on the snapshot generation, so re-tagging and other workers'
+    # changes replayed from the change log are picked up too
+    return await RESPONSE_CACHE.respond(
+        request, "response_skills", ("skills", SKILL_SNAPSHOT.generation), ["skills"], build
+    )
+
+@app.get("/resumes/skills/facets")
+async def get_skill_facets(
+    skills: List[str] = Query([]),
+    limit: int = Query(50, ge=1, le=MAX_PAGE_SIZE),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Resume counts per skill, optionally among resumes matching ``skills``"""
+    resume_count = func.count(ResumeSkill.resume_id).label("count")
+    stmt = (
+        select(Skill.name, resume_count)
+        .join(ResumeSkill, ResumeSkill.skill_id == Skill.id)
+        .group_by(Skill.id, Skill.name)
+        .order_by(resume_count.desc(), Skill.name)
+        .limit(limit)
+    )
+    if skills:
+        stmt = stmt.where(ResumeSkill.resume_id.in_(resumes_with_all_skills(skills)))
+
+    rows = (await db.execute(stmt)).all()
+    return {"facets": [{"skill": name, "count": count} for name, count in rows]}
+
+
+@app.get("/resumes/skills/trends")
+async def get_skill_trends(
+    skills: List[str] = Query([]),
+    period: str = Query("month", pattern="^(month|quarter|year)$"),
+    since: Optional[date] = None,
+    until: Optional[date] = None,
+    limit: int = Query(10, ge=1, le=MAX_PAGE_SIZE),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Resumes per period (by upload date) mentioning ``skills``, or each period's top skills.
+
+    Served from incrementally maintained aggregates; ``share`` is the
+    fraction of the period's resumes with the skill.
+    """
+    series = await db.run_sync(skill_trends, skills, period, since, until, limit)
+    return fast_json({"period": period, "series": series})
+
+@app.get("/resumes/skills/{skill}/related")
+async def get_related_skills(
+    skill: str,
+    limit: int = Query(10, ge=1, le=MAX_PAGE_SIZE),
+    sort: str = Query("count", pattern="^(count|confidence|lift)$"),
+    min_count: int = Query(1, ge=1),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Skills that appear on the same resumes as ``skill``.
+
+    ``confidence`` is the share of resumes with ``skill`` that also list the
+    other one; ``lift`` above 1 means they appear together more often than
+    chance. Use ``min_count`` to keep rare pairs from topping the lift ranking.
+    """
+    related = await db.run_sync(related_skills, skill, limit, sort, min_count)
+    if related is None:
+        raise HTTPException(404, detail="Unknown skill")
+    return fast_json(related)
 
 
 @app.get("/resumes/{resume_id}/download")
-def download_resume(
+async def download_resume(
     resume_id: str,
-    db: Session = Depends(get_db)
+    request: Request,
+    db: AsyncSession = Depends(get_async_db)
 ):
-    resume = db.query(Resume).filter(Resume.id == resume_id).first()
+    """Download the PDF; supports If-None-Match revalidation and single byte ranges"""
+    resume = await db.get(Resume, resume_id)
     if not resume:
         raise HTTPException(404, detail="Resume not found")
     
-    if not os.path.exists(resume.file_path):
+    storage = get_storage()
+    try:
+        size = await run_in_threadpool(storage.size, resume.file_path)
+    except FileNotFoundError:
         raise HTTPException(404, detail="File not found")
     
-    return FileResponse(
-        resume.file_path,
+    headers = {"Accept-Ranges": "bytes"}
+    etag = strong_etag(resume.sha256) if resume.sha256 else None
+    if etag:
+        headers["ETag"] = etag
+        if etag_matches(request.headers.get("if-none-match"), etag):
+            return Response(status_code=304, headers=headers)
+    
+    byte_range = parse_byte_range(request.headers.get("range"), size)
+    if_range = request.headers.get("if-range")
+    if byte_range and if_range and if_range != etag:
+        byte_range = None  # The client's copy is stale; send the whole file
+    
+    start, end = byte_range or (0, size - 1)
+    headers["Content-Length"] = str(end - start + 1)
+    headers["Content-Disposition"] = content_disposition(resume.filename)
+    if byte_range:
+        headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+    
+    return StreamingResponse(
+        storage.open_range(resume.file_path, start, end),
+        status_code=206 if byte_range else 200,
         media_type="application/pdf",
-        filename=resume.filename
+        headers=headers
     )
 
+def require_admin(request: Request):
+    """Allow the request only with the configured X-Admin-Token"""
+    token = request.headers.get("x-admin-token", "")
+    if not config.ADMIN_TOKEN or not secrets.compare_digest(token, config.ADMIN_TOKEN):
+        raise HTTPException(status.HTTP_403_FORBIDDEN, detail="Admin token required")
+
+@app.post("/admin/skills/reload")
+def reload_skill_taxonomy(
+    request: Request,
+    force: bool = Query(False, description="Re-tag the corpus even if the taxonomy did not change")
+):
+    """Re-read the skill taxonomy file and re-tag stored resumes in the background"""
+    require_admin(request)
+    changed = TAXONOMY.load()
+    vocabulary = TAXONOMY.current
+    job = None
+    if changed or force or RETAGGER.is_stale():
+        job = RETAGGER.start()
+        if job is None:
+            raise HTTPException(status.HTTP_409_CONFLICT, detail="A re-tag job is already running")
+    return {
+        "taxonomy_version": vocabulary.version,
+        "skills": len(vocabulary.skills),
+        "changed": changed,
+        "job": job.as_dict() if job else None
+    }
+
+@app.get("/admin/skills/retag")
+def retag_status(request: Request):
+    """Progress of the latest re-tag job in this worker"""
+    require_admin(request)
+    if RETAGGER.job is None:
+        raise HTTPException(status.HTTP_404_NOT_FOUND, detail="No re-tag job has run")
+    return RETAGGER.job.as_dict()
+
+@app.get("/export/{table}")
+def export_table(
+    table: str,
+    request: Request,
+    format: str = Query("parquet", pattern="^(parquet|arrow)$"),
+    since: Optional[str] = Query(None, description="Watermark returned by the previous export"),
+    row_group_size: int = Query(config.EXPORT_ROW_GROUP_SIZE, ge=1000, le=1_000_000)
+):
+    """Stream one flattened table of stored analyses as Parquet or an Arrow IPC stream.
+
+    The X-Export-Watermark header is the ``since`` for the next incremental export.
+    """
+    require_admin(request)
+    if table not in SCHEMAS:
+        raise HTTPException(status.HTTP_404_NOT_FOUND, detail=f"Unknown table: {table}")
+    try:
+        since_mark = Watermark.parse(since) if since else None
+    except ValueError:
+        raise HTTPException(status.HTTP_400_BAD_REQUEST, detail="Invalid watermark")
+
+    with SessionLocal() as db:
+        until = current_watermark(db)
+    media_type, extension = FORMATS[format]
+    watermark = max(filter(None, (since_mark, until)), default=None)
+    return StreamingResponse(
+        stream_table(table, format, since_mark, until, row_group_size),
+        media_type=media_type,
+        headers={
+            "Content-Disposition": content_disposition(f"{table}{extension}"),
+            "X-Export-Watermark": str(watermark) if watermark else "",
+        }
+    )
+
+async def analyze_admitted(
+    resume_id: str,
+    file_path: str,
+    priority: str,
+    profile: bool = False,
+    sha256: Optional[str] = None,
+    admitted: Optional[asyncio.Event] = None,
+    emit: Optional[Callable[[str, Any], None]] = None
+) -> Tuple[dict, Dict[str, float], Optional[dict]]:
+    """Run the analysis once admission control lets it through.
+
+    Returns the result, its stage timings and, when ``profile`` is set, the
+    profiler report. Sampled production profiles are saved instead.
+    ``admitted`` is set once the analysis holds a slot: from then on it runs
+    in a thread that cancelling would not stop. ``emit`` is passed on to
+    ``run_analysis``.
+    """
+    timings: Dict[str, float] = {}
+    # Model inference is CPU bound and memory hungry: bound how many run
+    # at once and keep them off the event loop
+    sampled = profile or should_sample()
+    queued_at = time.perf_counter()
+    async with analysis_admission.admit(priority):
+        if admitted is not None:
+            admitted.set()
+        timings["queue"] = time.perf_counter() - queued_at
+        with span("analysis", timings):
+            if not sampled:
+                return await run_in_threadpool(run_analysis, resume_id, file_path, timings, sha256, emit), timings, None
+            # An explicit profile must sample the stages, not stage cache hits
+            with stage_cache.bypass() if profile else nullcontext():
+                result, report = await run_in_threadpool(
+                    profiled, run_analysis, resume_id, file_path, timings, sha256, emit
+                )
+
+    if not profile:
+        await run_in_threadpool(save_profile, resume_id, report)
+        report = None
+    return result, timings, report
+
+async def analyze_coalesced(
+    resume_id: str,
+    file_path: str,
+    priority: str,
+    sha256: Optional[str] = None,
+    events: Optional[asyncio.Queue] = None
+) -> Tuple[dict, Dict[str, float]]:
+    """Analyze, sharing one pipeline run between concurrent requests for the same content.
+
+    ``events`` receives the run's ``(section, value)`` events, including the
+    ones sent before this request joined it. A run joined just as it
+    finishes may send none.
+    """
+    key = (sha256 or resume_id, PIPELINE_VERSION)
+    admitted = asyncio.Event()
+    feed = EventFeed()
+
+    async def run():
+        try:
+            return resume_id, await analyze_admitted(
+                resume_id, file_path, priority, sha256=sha256, admitted=admitted,
+                emit=lambda section, value: feed.emit((section, value))
+            )
+        finally:
+            if analysis_feeds.get(key) is feed:
+                del analysis_feeds[key]
+
+    def lead():
+        # Only called when this request starts the run
+        analysis_feeds[key] = feed
+        return run()
+
+    if events is not None:
+        # The feed of the run about to be joined, or of the one this request starts
+        joined = analysis_feeds.get(key, feed)
+        joined.subscribe(events)
+    try:
+        # Cancelling an admitted run would free its slot while the thread
+        # keeps running the models; only a queued run is dropped when every
+        # client has left
+        (leader_id, (result, timings, _)), shared = await analysis_flights.do(
+            key, lead, cancellable=lambda: not admitted.is_set()
+        )
+    finally:
+        if events is not None:
+            joined.unsubscribe(events)
+    if shared and leader_id != resume_id:
+        await run_in_threadpool(track_skills, resume_id, result.get("skills", []))
+    return result, timings
+
 @app.get("/resumes/{resume_id}/analyze", response_model=ResumeAnalysisResponse)
 async def analyze_resume(
     resume_id: str,
-    db: Session = Depends(get_db)
+    request: Request,
+    response: Response,
+    profile: bool = Query(False, description="Admin only: re-run the analysis under the profiler"),
+    priority: str = Query("interactive", pattern="^(interactive|bulk)$"),
+    reuse_similar: bool = Query(False, description="Reuse the analysis of a near-identical resume"),
+    db: AsyncSession = Depends(get_async_db)
 ):
-    resume = db.query(Resume).filter(Resume.id == resume_id).first()
-    if not resume:
-        raise HTTPException(status.HTTP_404_NOT_FOUND, detail="Resume not found")
+    if profile:
+        require_admin(request)
 
+    timings: Dict[str, float] = {}
     try:
-        text = extract_text_from_pdf(resume.file_path, max_pages=3)
-        if not text:
-            raise HTTPException(
-                status.HTTP_422_UNPROCESSABLE_ENTITY,
-                detail="No text could be extracted from the PDF"
+        with span("lookup", timings):
+            resume = await db.get(Resume, resume_id)
+            if not resume:
+                raise HTTPException(status.HTTP_404_NOT_FOUND, detail="Resume not found")
+
+            # The same file may already have been analyzed under another resume
+            shared = None
+            if resume.sha256:
+                shared = (await db.execute(content_analysis_query(resume.sha256))).scalars().first()
+                record_cache_lookup("analysis", shared is not None)
+            # Or a different file with (almost) the same text
+            if shared is None and reuse_similar and config.DEDUP_ENABLED and not profile:
+                shared = await db.run_sync(similar_analysis, resume_id, config.DEDUP_REUSE_THRESHOLD)
+                record_cache_lookup("analysis_near_duplicate", shared is not None)
+
+        if shared and not profile:
+            if shared.resume_id != resume_id:
+                await run_in_threadpool(track_skills, resume_id, shared.analysis_data.get("skills", []))
+            return shared.analysis_data
+
+        if profile:
+            result, run_timings, report = await analyze_admitted(
+                resume_id, resume.file_path, priority, profile=True, sha256=resume.sha256
+            )
+            timings.update(run_timings)
+            return fast_json(
+                {"analysis": result, "profile": report},
+                headers={"Server-Timing": server_timing(timings)}
             )
-        
-        entities = extract_resume_entities(text[:])
-        processed_at = datetime.now()
-        # Process metadata with improved name cleaning
-        contact = entities.get('CONTACT', [['', '']])[0]
-        try:
-            name = entities.get("NAME", [['']])[0]  # Try NAME first
-        except (KeyError, IndexError):  # If NAME missing or empty
-            try:
-                name = entities.get("ORG", [''])[0][:14] # Fall back to ORG
-            except (KeyError, IndexError):  # If ORG missing or empty
-                name = ""  # Final fallback
-        
-        # Process skills with tracking
-        raw_skills = entities.get('SKILLS', [[]])[0]
-        skills = track_skills(resume_id, raw_skills)
-        
-        # Process experience
-        experience = extract_experience_details(text)
-        # Process education
-        edu_entries = entities.get('EDUCATION', [[]])[0]
-        education = extract_education_details(edu_entries, entities.get('DATE', []))
-        
-        # Process projects
-        projects = extract_projects(text)
-        final_projects = []
-        for project in projects:
-            final_projects.append(_finalize_project(project))
-        
-        result = {
-            "metadata": {
-                "name": name,
-                "email": contact[0] if len(contact) > 0 else "",
-                "phone": contact[1] if len(contact) > 1 else ""
-            },
-            "skills": get_filtered_skills(resume_id),  # Use filtered skills
-            "experience": experience,
-            "education": education,
-            "projects": final_projects,
-            "processed_at": processed_at.isoformat()
-        }
 
+        result, run_timings = await analyze_coalesced(resume_id, resume.file_path, priority, resume.sha256)
+        timings.update(run_timings)
         return result
         
     except HTTPException:
@@ -317,64 +718,175 @@ async def analyze_resume(
             status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Resume analysis service unavailable"
         )
+    finally:
+        # Per-stage breakdown for the frontend (browser dev tools / Resource Timing)
+        response.headers["Server-Timing"] = server_timing(timings)
+
+async def stream_analysis(
+    resume_id: str,
+    file_path: str,
+    priority: str,
+    sha256: Optional[str] = None,
+    cached: Optional[dict] = None
+) -> AsyncIterator[Tuple[str, Any]]:
+    """Section events of one analysis, then ``complete`` (or ``error``)"""
+    if cached is not None:
+        for section in SECTIONS:
+            yield section, cached.get(section)
+        yield "complete", {"analysis": cached, "cached": True}
+        return
+
+    events: asyncio.Queue = asyncio.Queue()
+    # Joins /analyze and other streams of the same content
+    task = asyncio.ensure_future(analyze_coalesced(resume_id, file_path, priority, sha256, events))
+    task.add_done_callback(lambda _: events.put_nowait(None))
+    sent = set()
+    try:
+        while True:
+            event = await events.get()
+            if event is None:
+                break
+            sent.add(event[0])
+            yield event
+
+        try:
+            result, timings = task.result()
+        except HTTPException as e:
+            error = {"status": e.status_code, "detail": e.detail}
+            if e.headers and "Retry-After" in e.headers:
+                error["retry_after"] = int(e.headers["Retry-After"])
+            yield "error", error
+            return
+        except Exception as e:
+            logger.error(f"Resume analysis failed: {str(e)}", exc_info=True)
+            yield "error", {"status": 500, "detail": "Resume analysis service unavailable"}
+            return
+        for section in SECTIONS:
+            if section not in sent:
+                yield section, result.get(section)
+        yield "complete", {
+            "analysis": result,
+            "cached": False,
+            "timings_ms": {name: round(seconds * 1000, 1) for name, seconds in timings.items()},
+        }
+    finally:
+        # Leaves the shared run, which is only dropped while still queued and
+        # no other request waits for it
+        task.cancel()
+
+@app.get("/resumes/{resume_id}/analyze/stream")
+async def analyze_resume_stream(
+    resume_id: str,
+    format: str = Query("ndjson", pattern="^(ndjson|sse)$"),
+    priority: str = Query("interactive", pattern="^(interactive|bulk)$"),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Analyze a resume, sending each section as soon as its stage finishes.
+
+    Events ``metadata``, ``skills``, ``experience``, ``education`` and
+    ``projects`` carry one section of ResumeAnalysisResponse each, in the
+    order they become ready; the regex sections usually arrive before the
+    NER models finish. A final ``complete`` event carries the whole
+    analysis, or ``error`` the status and detail /analyze would have
+    returned (with ``retry_after`` when overloaded). Served as NDJSON
+    (``{"event", "data"}`` per line) or Server-Sent Events.
+    """
+    resume = await db.get(Resume, resume_id)
+    if not resume:
+        raise HTTPException(status.HTTP_404_NOT_FOUND, detail="Resume not found")
+
+    cached = None
+    if resume.sha256:
+        shared = (await db.execute(content_analysis_query(resume.sha256))).scalars().first()
+        record_cache_lookup("analysis", shared is not None)
+        if shared:
+            if shared.resume_id != resume_id:
+                await run_in_threadpool(track_skills, resume_id, shared.analysis_data.get("skills", []))
+            cached = shared.analysis_data
+
+    return event_stream(
+        stream_analysis(resume_id, resume.file_path, priority, resume.sha256, cached),
+        format
+    )
 
 @app.post("/resumes/{resume_id}/store-analysis", response_model=ResumeAnalysisResponse)
-def store_analysis(
+async def store_analysis(
     resume_id: str,
-    db: Session = Depends(get_db)
+    request: Request,
+    response: Response,
+    priority: str = Query("interactive", pattern="^(interactive|bulk)$"),
+    reuse_similar: bool = Query(False, description="Reuse the analysis of a near-identical resume"),
+    db: AsyncSession = Depends(get_async_db)
 ):
-    """Store analyzed resume data"""
-    analysis_data = analyze_resume(resume_id, db)
-    
-    # Store in database
-    db_analysis = ResumeAnalysis(
-        resume_id=resume_id,
-        analysis_data=analysis_data,
-        tags=extract_tags(analysis_data)  # Auto-generate tags
+    """Store analyzed resume data, replacing the result of the same pipeline version"""
+    analysis_data = await analyze_resume(
+        resume_id, request, response, profile=False, priority=priority, reuse_similar=reuse_similar, db=db
     )
     
-    db.add(db_analysis)
-    db.commit()
-    db.refresh(db_analysis)
+    try:
+        await db.run_sync(store_analysis_result, resume_id, analysis_data)
+    except Exception:
+        raise HTTPException(500, detail="Failed to store analysis")
+    RESPONSE_CACHE.invalidate("skills")
+    
+    return analysis_data
+
+@app.get("/resumes/{resume_id}/analysis", response_model=ResumeAnalysisResponse)
+async def get_stored_analysis(
+    resume_id: str,
+    pipeline_version: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Latest stored analysis of a resume, without re-running the pipeline"""
+    analysis = (await db.execute(
+        latest_analysis_query(resume_id, pipeline_version)
+    )).scalars().first()
+    if not analysis:
+        raise HTTPException(404, detail="No stored analysis for this resume")
     
-    return db_analysis
+    return analysis.analysis_data
 
 @app.get("/resumes/{resume_id}", response_model=ResumeResponse)
-def get_resume_metadata(
+async def get_resume_metadata(
     resume_id: str,
-    db: Session = Depends(get_db)
+    request: Request,
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get resume metadata"""
-    resume = db.query(Resume).filter(Resume.id == resume_id).first()
-    if not resume:
-        raise HTTPException(404, detail="Resume not found")
-    
-    return ResumeResponse(
-        **resume.__dict__,
-        download_url=f"/resumes/{resume.id}/download"
+    async def build():
+        row = (await db.execute(select(*RESUME_COLUMNS).where(Resume.id == resume_id))).first()
+        if row is None:
+            raise HTTPException(404, detail="Resume not found")
+        return resume_row(row), {}
+
+    return await RESPONSE_CACHE.respond(
+        request, "response_resume", ("resume", resume_id), [f"resume:{resume_id}"], build
     )
 
 @app.delete("/resumes/{resume_id}")
-def delete_resume(
+async def delete_resume(
     resume_id: str,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Delete a resume from both storage and database"""
-    resume = db.query(Resume).filter(Resume.id == resume_id).first()
+    resume = await db.get(Resume, resume_id)
     if not resume:
         raise HTTPException(404, detail="Resume not found")
     
     try:
-        # Delete file first
-        if os.path.exists(resume.file_path):
-            os.remove(resume.file_path)
+        file_path, sha256, user_id = resume.file_path, resume.sha256, resume.user_id
+        await db.run_sync(forget_resume_skills, resume_id)
+        await db.delete(resume)
+        await db.commit()
+        SKILL_SNAPSHOT.apply_local(resume_id, None)
+        RESPONSE_CACHE.invalidate(f"resume:{resume_id}", f"user:{user_id}", "search", "skills")
         
-        # Then delete from database
-        db.delete(resume)
-        db.commit()
+        # Only the last reference removes the file; uploads still in flight
+        # store it again after committing
+        await release_blob(db, file_path, sha256)
         return {"message": "Resume deleted successfully"}
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         logger.error(f"Delete failed for {resume_id}: {str(e)}", exc_info=True)
         raise HTTPException(500, detail="Failed to delete resume")
 
@@ -0,0 +1,88 @@
+"""
+Benchmarks for the resume backend.
+
+Run them from the ``backend`` directory so the application modules are
+importable, e.g. ``python -m benchmarks.bench_db``.
+"""
+import json
+import math
+import os
+import sys
+from typing import Dict, List, Optional
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BACKEND_DIR not in sys.path:
+    sys.path.insert(0, BACKEND_DIR)
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of ``values`` (pct in 0-100)"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, math.ceil(pct / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+def summarize(samples: List[float]) -> Dict[str, float]:
+    """Latency summary in milliseconds"""
+    return {
+        "count": len(samples),
+        "mean_ms": sum(samples) / len(samples) * 1000 if samples else 0.0,
+        "p50_ms": percentile(samples, 50) * 1000,
+        "p95_ms": percentile(samples, 95) * 1000,
+        "p99_ms": percentile(samples, 99) * 1000,
+    }
+
+
+def process_tree_rss(pid: int) -> Optional[int]:
+    """Resident set size in bytes of ``pid`` and its descendants (Linux /proc)"""
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            rss = next(int(line.split()[1]) * 1024 for line in f if line.startswith("VmRSS:"))
+        with open(f"/proc/{pid}/task/{pid}/children") as f:
+            children = [int(child) for child in f.read().split()]
+    except (OSError, StopIteration):
+        return None
+    return rss + sum(process_tree_rss(child) or 0 for child in children)
+
+
+def write_results(results: dict, path: str = None):
+    """Print results as JSON and optionally save them to ``path``"""
+    payload = json.dumps(results, indent=2, default=str)
+    print(payload)
+    if path:
+        with open(path, "w") as f:
+            f.write(payload + "\n")
+
+
+def load_results(path: str) -> dict:
+    with open(path) as f:
+        return json.load(f)
+
+
+def compare_results(current: dict, baseline: dict, tolerance: float = 0.2, metric: str = "p50_ms") -> List[dict]:
+    """Benchmarks whose ``metric`` grew by more than ``tolerance`` over the baseline.
+
+    Both arguments are nested result dicts as written by ``write_results``;
+    every sub-dict holding ``metric`` is compared under its dotted path.
+    """
+    regressions = []
+
+    def walk(cur: dict, base: dict, path: str):
+        if metric in cur and metric in base:
+            before, after = base[metric], cur[metric]
+            if before > 0 and after > before * (1 + tolerance):
+                regressions.append({
+                    "benchmark": path,
+                    "baseline": before,
+                    "current": after,
+                    "change_pct": (after / before - 1) * 100,
+                })
+            return
+        for key, value in cur.items():
+            if isinstance(value, dict) and isinstance(base.get(key), dict):
+                walk(value, base[key], f"{path}.{key}" if path else key)
+
+    walk(current, baseline, "")
+    return regressions
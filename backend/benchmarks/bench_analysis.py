@@ -0,0 +1,131 @@
+"""
+Analysis pipeline benchmarks on a synthetic corpus.
+
+Times PDF text extraction, each extractor in ``analysis_utils``, the NER
+stages, ``extract_resume_entities`` and the full ``/resumes/{id}/analyze``
+endpoint through a test client. Results are written as JSON; with
+``--baseline`` the run is compared against an earlier results file and
+exits non-zero when any benchmark's median regressed beyond ``--tolerance``.
+Needs the full backend environment (the NER models are loaded).
+
+    python -m benchmarks.bench_analysis --count 20 --pages 2 --output results.json
+    python -m benchmarks.bench_analysis --baseline results.json
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+from typing import Callable, Dict, List
+
+_tmp = tempfile.TemporaryDirectory()
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_tmp.name, 'bench.db')}"
+os.environ["UPLOAD_DIR"] = os.path.join(_tmp.name, "resumes")
+os.environ["STORAGE_BACKEND"] = "local"
+# Time the stages themselves, not stage cache hits on repeated runs
+os.environ["STAGE_CACHE_ENABLED"] = "0"
+
+from benchmarks import compare_results, load_results, summarize, write_results
+from benchmarks.corpus import add_spec_arguments, generate_corpus, spec_from_args
+
+import analysis_utils as au
+from skills import clean_skills, normalize_skills
+
+# Extractors keyed by name; each takes the text of one resume. Functions
+# that fill an entity map get a fresh one per call.
+EXTRACTORS: Dict[str, Callable[[str], object]] = {
+    "extract_names": lambda text: au.extract_names(text, au._new_entities()),
+    "extract_contact_info": lambda text: au.extract_contact_info(text, au._new_entities()),
+    "extract_education": lambda text: au.extract_education(text, au._new_entities()),
+    "extract_skills": lambda text: au.extract_skills(text, au._new_entities()),
+    "extract_experience_section": au.extract_experience_section,
+    "extract_experience_with_duration": lambda text: au.extract_experience_with_duration(text, au._new_entities()),
+    "extract_experience_details": au.extract_experience_details,
+    "extract_projects": au.extract_projects,
+    "run_regex_stage": au.run_regex_stage,
+    "run_bert_stage": au.run_bert_stage,
+    "run_spacy_stage": au.run_spacy_stage,
+    "extract_resume_entities": au.extract_resume_entities,
+}
+
+
+def time_calls(func: Callable, inputs: List, repeat: int) -> dict:
+    samples = []
+    for _ in range(repeat):
+        for value in inputs:
+            start = time.perf_counter()
+            func(value)
+            samples.append(time.perf_counter() - start)
+    return summarize(samples)
+
+
+def bench_post_processing(texts: List[str], repeat: int) -> Dict[str, dict]:
+    """Extractors that run on the output of entity extraction"""
+    entities = [au.run_regex_stage(text) for text in texts]
+    education = [(e["EDUCATION"][0] if e["EDUCATION"] else [], e.get("DATE", [])) for e in entities]
+    skills = [e["SKILLS"][0] if e["SKILLS"] else [] for e in entities]
+    names = [e["NAME"] for e in entities]
+    return {
+        "extract_education_details": time_calls(lambda args: au.extract_education_details(*args), education, repeat),
+        "clean_skills": time_calls(clean_skills, skills, repeat),
+        "normalize_skills": time_calls(normalize_skills, skills, repeat),
+        "get_best_name_candidate": time_calls(au.get_best_name_candidate, names, repeat),
+        "clean_name": time_calls(au.clean_name, [n[0] if n else "" for n in names], repeat),
+    }
+
+
+def bench_endpoint(pdf_paths: List[str], repeat: int) -> dict:
+    from fastapi.testclient import TestClient
+    from app import app
+
+    with TestClient(app) as client:
+        resume_ids = []
+        for path in pdf_paths:
+            with open(path, "rb") as f:
+                response = client.post("/upload", files={"file": (os.path.basename(path), f, "application/pdf")})
+            response.raise_for_status()
+            resume_ids.append(response.json()["id"])
+
+        def analyze(resume_id: str):
+            client.get(f"/resumes/{resume_id}/analyze").raise_for_status()
+
+        return time_calls(analyze, resume_ids, repeat)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--count", type=int, default=10, help="Resumes in the synthetic corpus")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--skip-endpoint", action="store_true", help="Do not benchmark /analyze")
+    parser.add_argument("--output", help="Write results JSON here")
+    parser.add_argument("--baseline", help="Results JSON to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed p50 slowdown (0.2 = 20%%)")
+    add_spec_arguments(parser)
+    args = parser.parse_args()
+
+    spec = spec_from_args(args)
+    pdf_paths = generate_corpus(os.path.join(_tmp.name, "corpus"), args.count, spec)
+    texts = [au.extract_text_from_pdf(path) for path in pdf_paths]
+
+    results = {
+        "corpus": {"count": args.count, **vars(spec), "mean_chars": sum(map(len, texts)) / len(texts)},
+        "pdf": {"extract_text_from_pdf": time_calls(au.extract_text_from_pdf, pdf_paths, args.repeat)},
+        "extractors": {name: time_calls(func, texts, args.repeat) for name, func in EXTRACTORS.items()},
+    }
+    results["extractors"].update(bench_post_processing(texts, args.repeat))
+    if not args.skip_endpoint:
+        results["endpoint"] = {"analyze": bench_endpoint(pdf_paths, args.repeat)}
+
+    regressions = []
+    if args.baseline:
+        regressions = compare_results(results, load_results(args.baseline), args.tolerance)
+        results["regressions"] = regressions
+
+    write_results(results, args.output)
+    if regressions:
+        print(f"{len(regressions)} benchmark(s) regressed beyond {args.tolerance:.0%}", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
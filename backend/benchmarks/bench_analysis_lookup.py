@@ -0,0 +1,87 @@
+"""
+Latency of the "latest analysis for a resume" lookup as resume_analyses grows.
+
+Each table size is measured with the versioned indexes in place and again
+after dropping them, which is how the table looked before they existed.
+
+    python -m benchmarks.bench_analysis_lookup --sizes 1000 10000 100000
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from benchmarks import summarize, write_results
+from sqlalchemy import insert, text
+from sqlalchemy.orm import sessionmaker
+
+from analysis_store import get_latest_analysis
+from database import create_sync_engine
+from models import Base, ResumeAnalysis
+
+VERSIONS_PER_RESUME = 3
+
+
+def populate(db_engine, rows: int):
+    Base.metadata.drop_all(db_engine)
+    Base.metadata.create_all(db_engine)
+    start = datetime(2025, 1, 1)
+    batch = []
+    with db_engine.begin() as conn:
+        for i in range(rows):
+            processed_at = start + timedelta(minutes=i)
+            batch.append({
+                "resume_id": f"resume-{i // VERSIONS_PER_RESUME}",
+                "pipeline_version": str(i % VERSIONS_PER_RESUME),
+                "analysis_data": {"skills": ["Python", "SQL"], "processed_at": processed_at.isoformat()},
+                "tags": ["Python"],
+                "created_at": processed_at,
+                "processed_at": processed_at,
+            })
+            if len(batch) == 5000:
+                conn.execute(insert(ResumeAnalysis), batch)
+                batch = []
+        if batch:
+            conn.execute(insert(ResumeAnalysis), batch)
+
+
+def measure(db_engine, rows: int, lookups: int) -> dict:
+    Session = sessionmaker(bind=db_engine)
+    resumes = max(1, rows // VERSIONS_PER_RESUME)
+    samples = []
+    with Session() as db:
+        for _ in range(lookups):
+            resume_id = f"resume-{random.randrange(resumes)}"
+            start = time.perf_counter()
+            get_latest_analysis(db, resume_id)
+            samples.append(time.perf_counter() - start)
+    return summarize(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--lookups", type=int, default=500)
+    parser.add_argument("--output", help="Write JSON results to this file")
+    args = parser.parse_args()
+
+    results = {"config": vars(args), "sizes": {}}
+    with tempfile.TemporaryDirectory() as tmp:
+        for rows in args.sizes:
+            db_engine = create_sync_engine(f"sqlite:///{os.path.join(tmp, f'{rows}.db')}")
+            populate(db_engine, rows)
+            indexed = measure(db_engine, rows, args.lookups)
+            with db_engine.begin() as conn:
+                for index in ResumeAnalysis.__table__.indexes:
+                    conn.execute(text(f"DROP INDEX {index.name}"))
+            unindexed = measure(db_engine, rows, args.lookups)
+            results["sizes"][rows] = {"indexed": indexed, "unindexed": unindexed}
+            db_engine.dispose()
+
+    write_results(results, args.output)
+
+
+if __name__ == "__main__":
+    main()
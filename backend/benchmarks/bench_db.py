@@ -0,0 +1,162 @@
+"""
+Concurrent read/write throughput of the database layer.
+
+Compares the original setup (synchronous sessions on a thread pool, default
+SQLite journaling) with the async session layer on WAL-tuned SQLite, or on
+any DATABASE_URL passed with --url.
+
+    python -m benchmarks.bench_db --readers 16 --writers 4 --duration 10
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from benchmarks import summarize, write_results
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import async_sessionmaker
+from sqlalchemy.orm import sessionmaker
+
+from database import create_async_db_engine, create_sync_engine
+from models import Base, Resume
+
+USERS = [f"user_{i}" for i in range(20)]
+
+
+def _new_resume(i: int) -> Resume:
+    return Resume(
+        id=str(uuid.uuid4()),
+        user_id=USERS[i % len(USERS)],
+        filename=f"resume_{i}.pdf",
+        file_path=f"resumes/{i}.pdf",
+        created_at=datetime.utcnow(),
+        resume_data={"size": 1024, "content_type": "application/pdf"}
+    )
+
+
+def seed(url: str, rows: int):
+    sync_engine = create_sync_engine(url, tuned=False)
+    Base.metadata.drop_all(sync_engine)
+    Base.metadata.create_all(sync_engine)
+    with sessionmaker(bind=sync_engine)() as db:
+        db.add_all(_new_resume(i) for i in range(rows))
+        db.commit()
+    sync_engine.dispose()
+
+
+def run_threaded(url: str, readers: int, writers: int, duration: float, tuned: bool) -> dict:
+    """Blocking sessions on worker threads, as the original endpoints ran"""
+    sync_engine = create_sync_engine(url, tuned=tuned)
+    Session = sessionmaker(bind=sync_engine)
+    deadline = time.perf_counter() + duration
+    latencies = {"read": [], "write": []}
+    errors = {"read": 0, "write": 0}
+    lock = threading.Lock()
+
+    def worker(kind: str, n: int):
+        i = n
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            try:
+                with Session() as db:
+                    if kind == "read":
+                        db.execute(select(Resume).where(Resume.user_id == USERS[i % len(USERS)])).scalars().all()
+                    else:
+                        db.add(_new_resume(i))
+                        db.commit()
+                with lock:
+                    latencies[kind].append(time.perf_counter() - start)
+            except Exception:
+                with lock:
+                    errors[kind] += 1
+            i += 1
+
+    with ThreadPoolExecutor(max_workers=readers + writers) as pool:
+        for n in range(readers):
+            pool.submit(worker, "read", n)
+        for n in range(writers):
+            pool.submit(worker, "write", n * 1_000_000)
+
+    sync_engine.dispose()
+    return _report(latencies, errors, duration)
+
+
+async def run_async(url: str, readers: int, writers: int, duration: float) -> dict:
+    """Async sessions on the event loop, as the endpoints run now"""
+    db_engine = create_async_db_engine(url, tuned=True)
+    Session = async_sessionmaker(db_engine, expire_on_commit=False)
+    deadline = time.perf_counter() + duration
+    latencies = {"read": [], "write": []}
+    errors = {"read": 0, "write": 0}
+
+    async def worker(kind: str, n: int):
+        i = n
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            try:
+                async with Session() as db:
+                    if kind == "read":
+                        (await db.execute(
+                            select(Resume).where(Resume.user_id == USERS[i % len(USERS)])
+                        )).scalars().all()
+                    else:
+                        db.add(_new_resume(i))
+                        await db.commit()
+                latencies[kind].append(time.perf_counter() - start)
+            except Exception:
+                errors[kind] += 1
+            i += 1
+
+    await asyncio.gather(
+        *(worker("read", n) for n in range(readers)),
+        *(worker("write", n * 1_000_000) for n in range(writers))
+    )
+    await db_engine.dispose()
+    return _report(latencies, errors, duration)
+
+
+def _report(latencies: dict, errors: dict, duration: float) -> dict:
+    return {
+        kind: {
+            "ops_per_sec": len(samples) / duration,
+            "errors": errors[kind],
+            **summarize(samples)
+        }
+        for kind, samples in latencies.items()
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", help="Database URL for the 'after' run (default: temp SQLite file)")
+    parser.add_argument("--rows", type=int, default=10000)
+    parser.add_argument("--readers", type=int, default=16)
+    parser.add_argument("--writers", type=int, default=4)
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--output", help="Write JSON results to this file")
+    args = parser.parse_args()
+
+    results = {"config": vars(args)}
+    with tempfile.TemporaryDirectory() as tmp:
+        before_url = f"sqlite:///{os.path.join(tmp, 'before.db')}"
+        seed(before_url, args.rows)
+        results["before_sync_default_journal"] = run_threaded(
+            before_url, args.readers, args.writers, args.duration, tuned=False
+        )
+
+        after_url = args.url or f"sqlite:///{os.path.join(tmp, 'after.db')}"
+        seed(after_url, args.rows)
+        results["after_async_tuned"] = asyncio.run(
+            run_async(after_url, args.readers, args.writers, args.duration)
+        )
+
+    write_results(results, args.output)
+
+
+if __name__ == "__main__":
+    main()
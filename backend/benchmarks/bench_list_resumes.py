@@ -0,0 +1,109 @@
+"""
+/resumes latency at growing table sizes.
+
+Compares the fast path (column projection + orjson, keyset pages and NDJSON
+streaming) with the original approach of hydrating every ORM object and
+validating a ResumeResponse per row. Needs the full backend environment,
+since the application (and its NER models) is imported.
+
+    python -m benchmarks.bench_list_resumes --sizes 1000 10000 100000
+"""
+import argparse
+import os
+import tempfile
+import time
+import uuid
+from datetime import datetime, timedelta
+
+_tmp = tempfile.TemporaryDirectory()
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_tmp.name, 'bench.db')}"
+# populate() writes behind the API's back, so cached pages would go stale
+os.environ["RESPONSE_CACHE_MAX_ENTRIES"] = "0"
+
+from benchmarks import summarize, write_results
+from fastapi import Depends, FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import delete, insert
+from sqlalchemy.orm import Session
+from typing import List
+
+from app import app
+from database import engine, get_db
+from models import Resume
+from schemas import ResumeResponse
+
+USER_ID = "bench_user"
+
+legacy_app = FastAPI()
+
+@legacy_app.get("/resumes", response_model=List[ResumeResponse])
+def legacy_list_resumes(user_id: str = USER_ID, db: Session = Depends(get_db)):
+    """The original implementation: every row hydrated and validated"""
+    resumes = db.query(Resume).filter(Resume.user_id == user_id).all()
+    return [
+        ResumeResponse(**resume.__dict__, download_url=f"/resumes/{resume.id}/download")
+        for resume in resumes
+    ]
+
+
+def populate(rows: int):
+    start = datetime(2025, 1, 1)
+    with engine.begin() as conn:
+        conn.execute(delete(Resume))
+        batch = []
+        for i in range(rows):
+            batch.append({
+                "id": str(uuid.uuid4()),
+                "user_id": USER_ID,
+                "filename": f"resume_{i}.pdf",
+                "file_path": f"resumes/{i}.pdf",
+                "created_at": start + timedelta(seconds=i),
+                "resume_data": {"size": 123456, "content_type": "application/pdf", "original_filename": f"resume_{i}.pdf"},
+            })
+            if len(batch) == 5000:
+                conn.execute(insert(Resume), batch)
+                batch = []
+        if batch:
+            conn.execute(insert(Resume), batch)
+
+
+def timed(client: TestClient, url: str, repeat: int, stream: bool = False) -> dict:
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        if stream:
+            with client.stream("GET", url) as response:
+                for _ in response.iter_bytes():
+                    pass
+        else:
+            response = client.get(url)
+        response.raise_for_status()
+        samples.append(time.perf_counter() - start)
+    return summarize(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--output", help="Write JSON results to this file")
+    args = parser.parse_args()
+
+    client = TestClient(app)
+    legacy_client = TestClient(legacy_app)
+    results = {"config": vars(args), "sizes": {}}
+    for rows in args.sizes:
+        populate(rows)
+        base = f"/resumes?user_id={USER_ID}"
+        results["sizes"][rows] = {
+            "first_page_100": timed(client, f"{base}&limit=100", args.repeat),
+            "page_1000": timed(client, f"{base}&limit=1000", args.repeat),
+            "stream_all": timed(client, f"{base}&stream=true", max(1, args.repeat // 4), stream=True),
+            "legacy_all": timed(legacy_client, base, max(1, args.repeat // 4)),
+        }
+
+    write_results(results, args.output)
+
+
+if __name__ == "__main__":
+    main()
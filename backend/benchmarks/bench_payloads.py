@@ -0,0 +1,175 @@
+"""
+Storage size and read throughput of the payload encodings.
+
+Fills a SQLite database per encoding with the same synthetic analyses and
+reports the file size after VACUUM, the stored bytes per payload, and how
+fast a bulk read returns decoded payloads through the ORM column type:
+
+- ``json``: the JSON text the columns have always held
+- ``msgpack-zstd-nodict``: MessagePack + zstd, each value compressed alone
+- ``msgpack-zstd``: the same with a dictionary trained on the rows, stored
+  by converting the JSON database in place as ``python -m payload_codec``
+  does
+
+The synthetic corpus draws from a small vocabulary, so its compression
+ratio is an upper bound; run ``python -m payload_codec --stats`` on a copy
+of production data for the real figure.
+
+    python -m benchmarks.bench_payloads --rows 20000 --experience 6
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+import orjson
+from sqlalchemy import insert, select, text
+
+import payload_codec
+from benchmarks import summarize, write_results
+from benchmarks.corpus import COMPANIES, DEGREES, OBJECTS, ROLES, SKILLS, UNIVERSITIES, _bullet, _month_year
+from database import create_sync_engine
+from models import Base, ResumeAnalysis
+from payload_codec import PayloadCodec, payload_stats, rewrite_payloads, train_dictionaries
+
+VARIANTS = {
+    "json": ("json", False),
+    "msgpack-zstd-nodict": ("msgpack-zstd", False),
+    "msgpack-zstd": ("msgpack-zstd", True),
+}
+
+
+def generate_analysis(rng: random.Random, experience: int) -> dict:
+    """An analysis payload shaped like the pipeline's output"""
+    skills = rng.sample(SKILLS, rng.randint(5, 15))
+    return {
+        "metadata": {
+            "name": f"Candidate {rng.randint(1, 10**6)}",
+            "email": f"user{rng.randint(1, 10**6)}@example.com",
+            "phone": f"+1 415 555 {rng.randint(1000, 9999)}",
+        },
+        "skills": skills,
+        "experience": [
+            {
+                "role": rng.choice(ROLES),
+                "company": rng.choice(COMPANIES),
+                "duration": f"{_month_year(rng, 2024 - i * 2)} - {_month_year(rng, 2025 - i * 2)}",
+                "location": "",
+                "description": " ".join(_bullet(rng) for _ in range(rng.randint(2, 5))),
+            }
+            for i in range(experience)
+        ],
+        "education": [{
+            "degree": rng.choice(DEGREES),
+            "institution": rng.choice(UNIVERSITIES),
+            "year": str(rng.randint(2005, 2020)),
+        }],
+        "projects": [
+            {
+                "name": rng.choice(OBJECTS).split(" ", 1)[1].title(),
+                "description": " ".join(_bullet(rng) for _ in range(rng.randint(1, 3))),
+                "technologies": ", ".join(rng.sample(skills, 3)),
+            }
+            for _ in range(rng.randint(1, 3))
+        ],
+        "processed_at": datetime(2025, 1, 1).isoformat(),
+    }
+
+
+def populate(db_engine, payloads: list):
+    start = datetime(2025, 1, 1)
+    with db_engine.begin() as conn:
+        for offset in range(0, len(payloads), 5000):
+            conn.execute(insert(ResumeAnalysis), [
+                {
+                    "resume_id": f"resume-{i}",
+                    "pipeline_version": "1",
+                    "analysis_data": payload,
+                    "tags": payload["skills"][:3],
+                    "created_at": start + timedelta(seconds=i),
+                    "processed_at": start + timedelta(seconds=i),
+                    "updated_at": start + timedelta(seconds=i),
+                }
+                for i, payload in enumerate(payloads[offset:offset + 5000], offset)
+            ])
+
+
+def measure_reads(db_engine, repeat: int) -> dict:
+    samples, rows = [], 0
+    for _ in range(repeat):
+        with db_engine.connect() as conn:
+            start = time.perf_counter()
+            rows = sum(1 for _ in conn.execute(select(ResumeAnalysis.analysis_data)).scalars())
+            samples.append(time.perf_counter() - start)
+    best = min(samples)
+    return {**summarize(samples), "rows_per_s": round(rows / best)}
+
+
+def run_variant(path: str, payloads: list, encoding: str, dictionary: bool, repeat: int) -> dict:
+    db_engine = create_sync_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(db_engine)
+    # The column type reads the module-level codec
+    payload_codec.CODEC = PayloadCodec("json" if dictionary else encoding)
+    payload_codec.CODEC.load(db_engine)
+
+    start = time.perf_counter()
+    populate(db_engine, payloads)
+    write_s = time.perf_counter() - start
+    if dictionary:
+        payload_codec.CODEC.encoding = encoding
+        start = time.perf_counter()
+        with db_engine.begin() as conn:
+            train_dictionaries(conn, kinds=["analysis_data"])
+            rewrite_payloads(conn, kinds=["analysis_data"])
+        write_s = time.perf_counter() - start
+
+    with db_engine.connect() as conn:
+        conn.execution_options(isolation_level="AUTOCOMMIT").execute(text("VACUUM"))
+        conn.execute(text("PRAGMA wal_checkpoint(TRUNCATE)"))
+        stats = payload_stats(conn)["analysis_data"]
+    stored = stats[encoding]
+    result = {
+        "db_bytes": os.path.getsize(path),
+        "payload_avg_bytes": stored["avg_bytes"],
+        ("convert_s" if dictionary else "write_s"): round(write_s, 3),
+        "read": measure_reads(db_engine, repeat),
+    }
+    db_engine.dispose()
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=20000)
+    parser.add_argument("--experience", type=int, default=4, help="Experience entries per analysis")
+    parser.add_argument("--repeat", type=int, default=5, help="Timed bulk reads per encoding")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Write JSON results to this file")
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    payloads = [generate_analysis(rng, args.experience) for _ in range(args.rows)]
+    json_bytes = sum(len(orjson.dumps(payload)) for payload in payloads)
+
+    results = {"config": vars(args), "json_avg_bytes": round(json_bytes / args.rows, 1), "encodings": {}}
+    original = payload_codec.CODEC
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            for name, (encoding, dictionary) in VARIANTS.items():
+                results["encodings"][name] = run_variant(
+                    os.path.join(tmp, f"{name}.db"), payloads, encoding, dictionary, args.repeat
+                )
+    finally:
+        payload_codec.CODEC = original
+
+    baseline = results["encodings"]["json"]
+    for result in results["encodings"].values():
+        result["size_ratio"] = round(result["db_bytes"] / baseline["db_bytes"], 3)
+        result["read_speedup"] = round(result["read"]["rows_per_s"] / baseline["read"]["rows_per_s"], 2)
+    write_results(results, args.output)
+
+
+if __name__ == "__main__":
+    main()
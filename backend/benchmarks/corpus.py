@@ -0,0 +1,252 @@
+"""
+Synthetic resume corpus.
+
+Generates resumes in the layout the extractors in ``analysis_utils`` expect
+(name line, contact line, Technical Skills, Experience, Education, Projects)
+with controlled size: page count, number of experience and project entries
+and skill density. Output is deterministic for a given seed, so benchmark
+runs are comparable. PDFs are written with a small built-in writer (one
+Helvetica text stream per page), so no PDF library is needed.
+
+    python -m benchmarks.corpus --out corpus --count 50 --pages 2 --experience 6
+"""
+import argparse
+import os
+import random
+from dataclasses import asdict, dataclass
+from typing import Dict, List, Tuple
+
+FIRST_NAMES = ["Alice", "Rahul", "Maria", "James", "Wei", "Fatima", "Lucas", "Priya", "Noah", "Elena"]
+LAST_NAMES = ["Johnson", "Sharma", "Garcia", "Smith", "Chen", "Khan", "Silva", "Patel", "Brown", "Novak"]
+ROLES = [
+    "Software Engineer", "Data Scientist", "Backend Developer", "Machine Learning Engineer",
+    "DevOps Engineer", "Frontend Developer", "Site Reliability Engineer", "Data Engineer"
+]
+COMPANIES = [
+    "Acme Corp", "Globex", "Initech", "Umbrella Systems", "Stark Industries",
+    "Wayne Enterprises", "Hooli", "Vandelay Imports", "Cyberdyne", "Soylent Labs"
+]
+UNIVERSITIES = [
+    "Stanford University", "Massachusetts Institute of Technology", "University of Toronto",
+    "Indian Institute of Technology", "Technical University of Munich", "University College London"
+]
+DEGREES = [
+    "Bachelor of Science in Computer Science", "Master of Science in Data Science",
+    "Bachelor of Technology in Information Technology", "Master of Engineering in Software Systems"
+]
+SKILLS = [
+    "Python", "Java", "SQL", "JavaScript", "TypeScript", "React", "Node.js", "Django", "Flask",
+    "FastAPI", "TensorFlow", "PyTorch", "Docker", "Kubernetes", "AWS", "GCP", "Azure", "Git",
+    "PostgreSQL", "MongoDB", "Redis", "Kafka", "Spark", "Pandas", "NumPy", "Scikit-learn",
+    "Linux", "Terraform", "GraphQL", "C++", "Go", "Rust"
+]
+VERBS = ["Built", "Designed", "Led", "Optimized", "Migrated", "Automated", "Implemented", "Scaled"]
+OBJECTS = [
+    "a real-time analytics pipeline", "the payments service", "an internal developer platform",
+    "a recommendation engine", "the CI/CD workflow", "a customer-facing REST API",
+    "a distributed job scheduler", "the search indexing system"
+]
+OUTCOMES = [
+    "reducing latency by 40%", "serving 2M requests per day", "cutting cloud costs by 25%",
+    "improving test coverage to 90%", "shrinking deploy time from hours to minutes",
+    "supporting 15 product teams"
+]
+MONTHS = ["Jan", "Feb", "Mar", "Apr", "May", "Jun", "Jul", "Aug", "Sep", "Oct", "Nov", "Dec"]
+
+LINES_PER_PAGE = 54
+LINE_WIDTH = 95
+
+
+@dataclass
+class ResumeSpec:
+    """Shape of a generated resume"""
+    pages: int = 1
+    experience: int = 3
+    projects: int = 2
+    skill_density: float = 0.3  # Fraction of the skill vocabulary mentioned
+    seed: int = 0
+
+
+def _bullet(rng: random.Random) -> str:
+    return f"• {rng.choice(VERBS)} {rng.choice(OBJECTS)}, {rng.choice(OUTCOMES)}"
+
+
+def _month_year(rng: random.Random, year: int) -> str:
+    return f"{rng.choice(MONTHS)} {year}"
+
+
+def generate_resume_text(spec: ResumeSpec) -> str:
+    """Plain-text resume matching ``spec``, padded to fill ``spec.pages``"""
+    return generate_labeled_resume(spec)[0]
+
+
+def generate_labeled_resume(spec: ResumeSpec) -> Tuple[str, Dict[str, List[str]]]:
+    """A resume's text with its gold entities: PER (name), ORG (companies and
+    universities) and DATE (every date and duration, as written)"""
+    rng = random.Random(spec.seed)
+    labels: Dict[str, List[str]] = {"PER": [], "ORG": [], "DATE": []}
+    first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+    skills = rng.sample(SKILLS, max(1, round(len(SKILLS) * spec.skill_density)))
+
+    # Draw in the same order as before labels were tracked, so a seed keeps
+    # producing the same resume
+    phone, role, years = rng.randint(1000, 9999), rng.choice(ROLES), rng.randint(2, 15)
+    labels["PER"].append(f"{first} {last}")
+    labels["DATE"].append(f"{years} years")
+
+    lines = [
+        f"{first} {last}",
+        f"{first.lower()}.{last.lower()}@example.com | +1 415 555 {phone} | "
+        f"https://github.com/{first.lower()}{last.lower()}",
+        "",
+        "Summary",
+        f"{role} with {years} years of experience in {', '.join(skills[:3])}.",
+        "",
+        "Technical Skills: " + ", ".join(skills),
+        "",
+        "Experience",
+    ]
+
+    year = 2025
+    for i in range(spec.experience):
+        start = year - rng.randint(1, 3)
+        end = "Present" if i == 0 else _month_year(rng, year)
+        role, company, started = rng.choice(ROLES), rng.choice(COMPANIES), _month_year(rng, start)
+        lines.append(f"{role} at {company} {started} - {end}")
+        labels["ORG"].append(company)
+        labels["DATE"] += [started] if i == 0 else [started, end]
+        lines.extend(_bullet(rng) for _ in range(rng.randint(2, 4)))
+        year = start
+
+    lines += ["", "Education"]
+    grad = year
+    for _ in range(rng.randint(1, 2)):
+        degree, university = rng.choice(DEGREES), rng.choice(UNIVERSITIES)
+        lines.append(f"{degree}, {university} {grad - 4} - {grad}")
+        labels["ORG"].append(university)
+        labels["DATE"] += [str(grad - 4), str(grad)]
+        grad -= 2
+
+    lines += ["", "Projects"]
+    for _ in range(spec.projects):
+        title = rng.choice(OBJECTS).split(' ', 1)[1].title()
+        started, ended = _month_year(rng, year), _month_year(rng, year + 1)
+        lines.append(f"{title} | {started} - {ended}")
+        labels["DATE"] += [started, ended]
+        lines.append("Technologies: " + ", ".join(rng.sample(skills, min(3, len(skills)))))
+        lines.extend(_bullet(rng) for _ in range(rng.randint(1, 3)))
+
+    # Pad with bullets until the wrapped text fills the requested pages
+    target = spec.pages * LINES_PER_PAGE
+    used = len(_wrap(lines)) + 2
+    if used < target:
+        lines += ["", "Additional Experience"]
+        while True:
+            bullet = _bullet(rng)
+            used += len(_wrap([bullet]))
+            if used > target:
+                break
+            lines.append(bullet)
+    return "\n".join(lines) + "\n", labels
+
+
+def _pdf_string(line: str) -> bytes:
+    encoded = line.encode("cp1252", errors="replace")
+    out = bytearray()
+    for byte in encoded:
+        if byte in b"()\\":
+            out += b"\\" + bytes([byte])
+        elif byte > 126:
+            out += b"\\%03o" % byte
+        else:
+            out.append(byte)
+    return bytes(out)
+
+
+def _wrap(lines: List[str]) -> List[str]:
+    wrapped = []
+    for line in lines:
+        while len(line) > LINE_WIDTH:
+            cut = line.rfind(" ", 0, LINE_WIDTH)
+            cut = cut if cut > 0 else LINE_WIDTH
+            wrapped.append(line[:cut])
+            line = "  " + line[cut:].lstrip()
+        wrapped.append(line)
+    return wrapped
+
+
+def write_pdf(text: str, path: str):
+    """Write ``text`` as a simple multi-page PDF with extractable text"""
+    lines = _wrap(text.splitlines())
+    pages = [lines[i:i + LINES_PER_PAGE] for i in range(0, len(lines), LINES_PER_PAGE)] or [[]]
+
+    # Objects: 1 catalog, 2 page tree, 3 font, then a (page, contents) pair per page
+    objects = [b"", b"", b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>"]
+    kids = []
+    for page_lines in pages:
+        stream = b"BT /F1 10 Tf 13 TL 50 760 Td\n" + b"".join(
+            b"(" + _pdf_string(line) + b") Tj T*\n" for line in page_lines
+        ) + b"ET"
+        page_num = len(objects) + 1
+        kids.append(f"{page_num} 0 R".encode())
+        objects.append(
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+            b"/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>" % (page_num + 1)
+        )
+        objects.append(b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream")
+    objects[0] = b"<< /Type /Catalog /Pages 2 0 R >>"
+    objects[1] = b"<< /Type /Pages /Kids [" + b" ".join(kids) + b"] /Count %d >>" % len(pages)
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n" % number + body + b"\nendobj\n"
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    out += b"".join(b"%010d 00000 n \n" % offset for offset in offsets)
+    out += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+
+    with open(path, "wb") as f:
+        f.write(out)
+
+
+def generate_corpus(out_dir: str, count: int, spec: ResumeSpec) -> List[str]:
+    """Write ``count`` resumes (``.pdf`` and ``.txt``) and return the PDF paths"""
+    os.makedirs(out_dir, exist_ok=True)
+    paths = []
+    for i in range(count):
+        text = generate_resume_text(ResumeSpec(**{**asdict(spec), "seed": spec.seed + i}))
+        base = os.path.join(out_dir, f"resume_{i:04d}")
+        with open(base + ".txt", "w") as f:
+            f.write(text)
+        write_pdf(text, base + ".pdf")
+        paths.append(base + ".pdf")
+    return paths
+
+
+def add_spec_arguments(parser: argparse.ArgumentParser):
+    parser.add_argument("--pages", type=int, default=1)
+    parser.add_argument("--experience", type=int, default=3, help="Experience entries per resume")
+    parser.add_argument("--projects", type=int, default=2, help="Project entries per resume")
+    parser.add_argument("--skill-density", type=float, default=0.3, help="Fraction of known skills mentioned")
+    parser.add_argument("--seed", type=int, default=0)
+
+
+def spec_from_args(args) -> ResumeSpec:
+    return ResumeSpec(args.pages, args.experience, args.projects, args.skill_density, args.seed)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--out", default="corpus")
+    parser.add_argument("--count", type=int, default=20)
+    add_spec_arguments(parser)
+    args = parser.parse_args()
+
+    paths = generate_corpus(args.out, args.count, spec_from_args(args))
+    print(f"Wrote {len(paths)} resumes to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
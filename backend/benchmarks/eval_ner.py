@@ -0,0 +1,211 @@
+"""
+NER model selection: accuracy against latency and memory.
+
+Runs a labeled evaluation set through each candidate model and reports
+entity-level precision, recall and F1 for names (PER), organizations (ORG)
+and dates (DATE), next to load time, per-resume latency, throughput and
+resident memory. Each candidate runs in its own subprocess, so memory is
+not inflated by the models evaluated before it. Models are loaded from
+local files only: give a model directory, a Hugging Face model that is
+already in the local cache, or ``spacy:<package or path>``.
+
+The evaluation set is JSONL, one resume per line:
+
+    {"id": "r1", "text": "...", "entities": {"PER": ["..."], "ORG": ["..."], "DATE": ["..."]}}
+
+Without ``--eval-set`` a synthetic labeled set is generated. Entities match
+when their text is equal after lowercasing and collapsing whitespace. With
+``--min-f1`` the fastest model whose micro F1 reaches the bar is
+recommended; deploy it with ``NER_MODEL``.
+
+    python -m benchmarks.eval_ner --models dslim/bert-large-NER,dslim/bert-base-NER,spacy:en_core_web_lg
+    python -m benchmarks.eval_ner --eval-set labeled.jsonl --models /models/bert-base-NER --min-f1 0.85
+"""
+import argparse
+import json
+import os
+import re
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from collections import Counter
+from typing import Dict, List, Optional
+
+from benchmarks import BACKEND_DIR, process_tree_rss, summarize, write_results
+from benchmarks.corpus import ResumeSpec, generate_labeled_resume
+
+ENTITY_TYPES = ("PER", "ORG", "DATE")
+OFFLINE_ENV = {"HF_HUB_OFFLINE": "1", "TRANSFORMERS_OFFLINE": "1"}
+
+
+def _normalize(entity: str) -> str:
+    return re.sub(r"\s+", " ", entity).strip(" .,;:|-").lower()
+
+
+def load_eval_set(path: str) -> List[dict]:
+    with open(path) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def synthetic_eval_set(count: int, seed: int = 0) -> List[dict]:
+    examples = []
+    for i in range(count):
+        text, labels = generate_labeled_resume(ResumeSpec(experience=4, projects=2, seed=seed + i))
+        examples.append({"id": f"synthetic-{i}", "text": text, "entities": labels})
+    return examples
+
+
+def score(predictions: List[Dict[str, list]], examples: List[dict]) -> Dict[str, dict]:
+    """Micro-averaged precision/recall/F1 per entity type and overall"""
+    counts = {kind: Counter() for kind in ENTITY_TYPES}
+    for predicted, example in zip(predictions, examples):
+        for kind in ENTITY_TYPES:
+            pred = Counter(_normalize(e) for e in predicted.get(kind, []) if _normalize(e))
+            gold = Counter(_normalize(e) for e in example["entities"].get(kind, []) if _normalize(e))
+            tp = sum((pred & gold).values())
+            counts[kind].update(tp=tp, fp=sum(pred.values()) - tp, fn=sum(gold.values()) - tp)
+    counts["micro"] = sum(counts.values(), Counter())
+
+    def prf(c: Counter) -> dict:
+        precision = c["tp"] / (c["tp"] + c["fp"]) if c["tp"] + c["fp"] else 0.0
+        recall = c["tp"] / (c["tp"] + c["fn"]) if c["tp"] + c["fn"] else 0.0
+        f1 = 2 * precision * recall / (precision + recall) if precision + recall else 0.0
+        return {
+            "precision": round(precision, 4), "recall": round(recall, 4), "f1": round(f1, 4),
+            "tp": c["tp"], "fp": c["fp"], "fn": c["fn"],
+        }
+
+    return {kind: prf(c) for kind, c in counts.items()}
+
+
+def _load_candidate(candidate: str):
+    """(callable text -> entity map) for a candidate spec"""
+    # Imported here so the parent process never loads torch
+    from ner import load_bert_pipeline, load_spacy_model, process_bert_entities, process_spacy_entities
+
+    if candidate.startswith("spacy:"):
+        nlp = load_spacy_model(candidate[len("spacy:"):])
+        return lambda text: process_spacy_entities(nlp(text))
+    nlp = load_bert_pipeline(candidate)
+    return lambda text: process_bert_entities(nlp(text))
+
+
+def evaluate_candidate(candidate: str, examples: List[dict], repeat: int) -> dict:
+    """Runs in the worker subprocess"""
+    pid = os.getpid()
+    rss_start = process_tree_rss(pid)
+    start = time.perf_counter()
+    extract = _load_candidate(candidate)
+    load_s = time.perf_counter() - start
+    rss_loaded = process_tree_rss(pid)
+
+    # Entity extraction sees whitespace-collapsed text
+    texts = [re.sub(r"\s+", " ", example["text"]).strip() for example in examples]
+    extract(texts[0])  # warm-up
+
+    samples, predictions = [], []
+    start = time.perf_counter()
+    for round_ in range(repeat):
+        for text in texts:
+            began = time.perf_counter()
+            predicted = extract(text)
+            samples.append(time.perf_counter() - began)
+            if round_ == 0:
+                predictions.append(predicted)
+    elapsed = time.perf_counter() - start
+
+    return {
+        "accuracy": score(predictions, examples),
+        "latency": summarize(samples),
+        "throughput": {
+            "resumes_per_s": round(len(samples) / elapsed, 2),
+            "chars_per_s": round(sum(map(len, texts)) * repeat / elapsed),
+        },
+        "load_s": round(load_s, 2),
+        "memory": {
+            "rss_model_mb": round(((rss_loaded or 0) - (rss_start or 0)) / 2**20, 1),
+            "rss_loaded_mb": round((rss_loaded or 0) / 2**20, 1),
+            # ru_maxrss is in KiB on Linux
+            "rss_peak_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        },
+    }
+
+
+def run_worker(candidate: str, eval_path: str, repeat: int) -> dict:
+    """Evaluate ``candidate`` in a fresh interpreter, offline"""
+    env = {**os.environ, **OFFLINE_ENV}
+    completed = subprocess.run(
+        [sys.executable, "-m", "benchmarks.eval_ner", "--worker", candidate,
+         "--eval-set", eval_path, "--repeat", str(repeat)],
+        cwd=BACKEND_DIR, env=env, capture_output=True, text=True
+    )
+    if completed.returncode != 0:
+        return {"error": completed.stderr.strip().splitlines()[-1] if completed.stderr.strip() else "failed"}
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+def recommend(results: Dict[str, dict], min_f1: float) -> Optional[str]:
+    """Fastest candidate (p50 latency) whose micro F1 meets the bar"""
+    eligible = [
+        (result["latency"]["p50_ms"], candidate) for candidate, result in results.items()
+        if "error" not in result and result["accuracy"]["micro"]["f1"] >= min_f1
+    ]
+    return min(eligible)[1] if eligible else None
+
+
+def print_table(results: Dict[str, dict]):
+    header = f"{'model':<40} {'PER F1':>7} {'ORG F1':>7} {'DATE F1':>7} {'F1':>6} {'p50 ms':>8} {'res/s':>7} {'RSS MB':>7}"
+    print(header, file=sys.stderr)
+    for candidate, result in results.items():
+        if "error" in result:
+            print(f"{candidate:<40} error: {result['error']}", file=sys.stderr)
+            continue
+        acc = result["accuracy"]
+        print(
+            f"{candidate:<40} {acc['PER']['f1']:>7.3f} {acc['ORG']['f1']:>7.3f} {acc['DATE']['f1']:>7.3f} "
+            f"{acc['micro']['f1']:>6.3f} {result['latency']['p50_ms']:>8.1f} "
+            f"{result['throughput']['resumes_per_s']:>7.2f} {result['memory']['rss_model_mb']:>7.1f}",
+            file=sys.stderr
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--models", default="dslim/bert-large-NER,dslim/bert-base-NER",
+                        help="Comma-separated candidates: model dir, cached HF name or spacy:<name>")
+    parser.add_argument("--eval-set", help="Labeled JSONL; a synthetic set is generated when omitted")
+    parser.add_argument("--count", type=int, default=50, help="Size of the synthetic set")
+    parser.add_argument("--repeat", type=int, default=1, help="Timed passes over the set")
+    parser.add_argument("--min-f1", type=float, help="Accuracy bar (micro F1) for the recommendation")
+    parser.add_argument("--output", help="Write results JSON here")
+    parser.add_argument("--worker", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        print(json.dumps(evaluate_candidate(args.worker, load_eval_set(args.eval_set), args.repeat)))
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        eval_path = args.eval_set
+        if not eval_path:
+            eval_path = os.path.join(tmp, "eval.jsonl")
+            with open(eval_path, "w") as f:
+                f.writelines(json.dumps(example) + "\n" for example in synthetic_eval_set(args.count))
+        examples = load_eval_set(eval_path)
+        candidates = [name.strip() for name in args.models.split(",") if name.strip()]
+        results = {candidate: run_worker(candidate, os.path.abspath(eval_path), args.repeat) for candidate in candidates}
+
+    output = {
+        "eval_set": {"path": args.eval_set or "synthetic", "resumes": len(examples)},
+        "models": results,
+    }
+    if args.min_f1 is not None:
+        output["recommended"] = recommend(results, args.min_f1)
+    print_table(results)
+    write_results(output, args.output)
+
+
+if __name__ == "__main__":
+    main()
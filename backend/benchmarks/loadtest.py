@@ -0,0 +1,363 @@
+"""
+Load test against a locally started instance of ``app``.
+
+Starts ``uvicorn app:app`` on a scratch database and upload directory (or
+targets ``--url``), seeds it with synthetic resumes and drives a weighted
+mix of endpoints at a target request rate. Reports p50/p95/p99 latency,
+throughput and error rate per endpoint, plus the server's RSS (all worker
+processes) during each phase.
+
+    python -m benchmarks.loadtest --rate 50 --duration 30 --mix list=5,search=3,filter=3,analyze=1,upload=1
+    python -m benchmarks.loadtest --isolate --rate 20
+    python -m benchmarks.loadtest --sweep 1,2,4,8,16,32 --mix analyze=1 --workers 2
+
+``--isolate`` runs each endpoint of the mix in its own phase so RSS and
+latency can be attributed to it. ``--sweep`` runs closed-loop at each
+concurrency level instead and reports where throughput stops scaling.
+
+The started server runs with the stage cache off, as bench_analysis does,
+so ``analyze`` measures model cost rather than cache hits on the small
+corpus; its setting is recorded in ``server_config``.
+"""
+import argparse
+import asyncio
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+from collections import defaultdict
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional
+
+import httpx
+
+from benchmarks import BACKEND_DIR, process_tree_rss, summarize, write_results
+from benchmarks.corpus import ResumeSpec, generate_corpus
+
+SEARCH_TERMS = ["python", "engineer", "data", "react", "aws", "resume"]
+FILTER_SKILLS = ["Python", "SQL", "Docker", "AWS", "React", "Java"]
+
+
+@dataclass
+class Target:
+    """Shared state the request builders draw on"""
+    pdf_paths: List[str]
+    resume_ids: List[str] = field(default_factory=list)
+    rng: random.Random = field(default_factory=lambda: random.Random(0))
+
+
+async def _upload(client: httpx.AsyncClient, target: Target) -> httpx.Response:
+    path = target.rng.choice(target.pdf_paths)
+    with open(path, "rb") as f:
+        data = f.read()
+    # Unique filename: the same user cannot upload a filename twice
+    name = f"load_{uuid.uuid4().hex}.pdf"
+    response = await client.post("/upload", files={"file": (name, data, "application/pdf")})
+    if response.status_code == 200:
+        target.resume_ids.append(response.json()["id"])
+    return response
+
+
+async def _list(client: httpx.AsyncClient, target: Target) -> httpx.Response:
+    return await client.get("/resumes", params={"limit": 50})
+
+
+async def _search(client: httpx.AsyncClient, target: Target) -> httpx.Response:
+    return await client.get("/resumes/search", params={"query": target.rng.choice(SEARCH_TERMS), "limit": 50})
+
+
+async def _filter(client: httpx.AsyncClient, target: Target) -> httpx.Response:
+    skills = target.rng.sample(FILTER_SKILLS, target.rng.randint(1, 2))
+    return await client.get("/resumes/filter", params={"skills": skills, "limit": 50})
+
+
+async def _analyze(client: httpx.AsyncClient, target: Target) -> httpx.Response:
+    return await client.get(f"/resumes/{target.rng.choice(target.resume_ids)}/analyze")
+
+
+ENDPOINTS: Dict[str, Callable] = {
+    "upload": _upload,
+    "list": _list,
+    "search": _search,
+    "filter": _filter,
+    "analyze": _analyze,
+}
+# Endpoints that act on an uploaded resume
+NEEDS_RESUME = {"analyze"}
+
+
+def choose_endpoint(target: Target, mix: Dict[str, float]) -> Optional[str]:
+    """Weighted pick from the mix, leaving out endpoints that need a resume until one exists"""
+    names = [name for name in mix if target.resume_ids or name not in NEEDS_RESUME]
+    if not names:
+        return None
+    return target.rng.choices(names, [mix[name] for name in names])[0]
+
+
+def parse_mix(text: str) -> Dict[str, float]:
+    mix = {}
+    for part in text.split(","):
+        name, _, weight = part.partition("=")
+        if name not in ENDPOINTS:
+            raise SystemExit(f"Unknown endpoint '{name}', choose from {', '.join(ENDPOINTS)}")
+        mix[name] = float(weight or 1)
+    return mix
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+class Server:
+    """``uvicorn app:app`` in a subprocess with its own database and uploads"""
+
+    def __init__(self, workers: int, env: Dict[str, str]):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.port = free_port()
+        self.url = f"http://127.0.0.1:{self.port}"
+        self.env = {
+            **os.environ,
+            "DATABASE_URL": f"sqlite:///{os.path.join(self.tmp.name, 'load.db')}",
+            "UPLOAD_DIR": os.path.join(self.tmp.name, "resumes"),
+            # The corpus repeats a few PDFs: measure the models, not stage cache
+            # hits (override with --env STAGE_CACHE_ENABLED=1)
+            "STAGE_CACHE_ENABLED": "0",
+            **env,
+        }
+        self.workers = workers
+        self.process: Optional[subprocess.Popen] = None
+
+    def __enter__(self) -> "Server":
+        self.process = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "app:app", "--port", str(self.port),
+             "--workers", str(self.workers), "--log-level", "warning"],
+            cwd=BACKEND_DIR,
+            env=self.env
+        )
+        # Model loading makes startup slow
+        deadline = time.monotonic() + 600
+        while time.monotonic() < deadline:
+            if self.process.poll() is not None:
+                raise RuntimeError(f"Server exited with code {self.process.returncode}")
+            try:
+                if httpx.get(self.url + "/", timeout=1).status_code == 200:
+                    return self
+            except httpx.HTTPError:
+                pass
+            time.sleep(0.5)
+        raise RuntimeError("Server did not become ready")
+
+    def __exit__(self, *exc):
+        self.process.terminate()
+        try:
+            self.process.wait(timeout=30)
+        except subprocess.TimeoutExpired:
+            self.process.kill()
+        self.tmp.cleanup()
+
+    @property
+    def pid(self) -> Optional[int]:
+        return self.process.pid if self.process else None
+
+
+class Recorder:
+    def __init__(self):
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.errors: Dict[str, int] = defaultdict(int)
+        self.started = time.perf_counter()
+
+    async def call(self, name: str, client: httpx.AsyncClient, target: Target):
+        start = time.perf_counter()
+        try:
+            response = await ENDPOINTS[name](client, target)
+            failed = response.status_code >= 400
+        except httpx.HTTPError:
+            failed = True
+        self.latencies[name].append(time.perf_counter() - start)
+        if failed:
+            self.errors[name] += 1
+
+    def report(self) -> Dict[str, dict]:
+        elapsed = time.perf_counter() - self.started
+        report = {}
+        for name, samples in self.latencies.items():
+            report[name] = {
+                **summarize(samples),
+                "throughput_rps": len(samples) / elapsed,
+                "error_rate": self.errors[name] / len(samples),
+            }
+        total = sum(len(samples) for samples in self.latencies.values())
+        report["total"] = {
+            "count": total,
+            "throughput_rps": total / elapsed,
+            "error_rate": sum(self.errors.values()) / total if total else 0.0,
+        }
+        return report
+
+
+async def sample_rss(pid: Optional[int], samples: List[int], stop: asyncio.Event, interval: float = 0.5):
+    while pid and not stop.is_set():
+        rss = process_tree_rss(pid)
+        if rss:
+            samples.append(rss)
+        try:
+            await asyncio.wait_for(stop.wait(), interval)
+        except asyncio.TimeoutError:
+            pass
+
+
+def rss_summary(samples: List[int]) -> dict:
+    if not samples:
+        return {}
+    mb = 1024 * 1024
+    return {"rss_start_mb": samples[0] / mb, "rss_peak_mb": max(samples) / mb, "rss_end_mb": samples[-1] / mb}
+
+
+async def open_loop(client, target, mix: Dict[str, float], rate: float, duration: float, max_in_flight: int, pid) -> dict:
+    """Issue requests at ``rate`` per second regardless of how fast they complete"""
+    recorder = Recorder()
+    in_flight = asyncio.Semaphore(max_in_flight)
+    rss_samples: List[int] = []
+    stop = asyncio.Event()
+    sampler = asyncio.create_task(sample_rss(pid, rss_samples, stop))
+    tasks = set()
+    dropped = skipped = 0
+
+    async def fire(name: str):
+        try:
+            await recorder.call(name, client, target)
+        finally:
+            in_flight.release()
+
+    start = time.perf_counter()
+    sent = 0
+    while time.perf_counter() - start < duration:
+        due = start + sent / rate
+        await asyncio.sleep(max(0.0, due - time.perf_counter()))
+        sent += 1
+        name = choose_endpoint(target, mix)
+        if name is None:
+            skipped += 1  # Nothing to analyze yet
+            continue
+        if in_flight.locked():
+            dropped += 1  # The client is saturated; count instead of queueing
+            continue
+        await in_flight.acquire()
+        task = asyncio.create_task(fire(name))
+        tasks.add(task)
+        task.add_done_callback(tasks.discard)
+
+    await asyncio.gather(*tasks)
+    stop.set()
+    await sampler
+    return {"target_rps": rate, "dropped": dropped, "skipped": skipped, "endpoints": recorder.report(), "server": rss_summary(rss_samples)}
+
+
+async def closed_loop(client, target, mix: Dict[str, float], concurrency: int, duration: float, pid) -> dict:
+    """``concurrency`` clients each sending their next request as soon as the last completes"""
+    recorder = Recorder()
+    rss_samples: List[int] = []
+    stop = asyncio.Event()
+    sampler = asyncio.create_task(sample_rss(pid, rss_samples, stop))
+    deadline = time.perf_counter() + duration
+
+    async def worker():
+        while time.perf_counter() < deadline:
+            name = choose_endpoint(target, mix)
+            if name is None:
+                break  # Nothing to analyze and no uploads in the mix
+            await recorder.call(name, client, target)
+
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    stop.set()
+    await sampler
+    return {"concurrency": concurrency, "endpoints": recorder.report(), "server": rss_summary(rss_samples)}
+
+
+def saturation_point(sweep: List[dict], min_gain: float = 0.05) -> Optional[int]:
+    """First concurrency level after which throughput grows by less than ``min_gain``"""
+    for previous, current in zip(sweep, sweep[1:]):
+        before = previous["endpoints"]["total"]["throughput_rps"]
+        after = current["endpoints"]["total"]["throughput_rps"]
+        if before and after < before * (1 + min_gain):
+            return previous["concurrency"]
+    return None
+
+
+async def seed(client: httpx.AsyncClient, target: Target, count: int):
+    for _ in range(count):
+        (await _upload(client, target)).raise_for_status()
+
+
+async def run(args, base_url: str, pid: Optional[int]) -> dict:
+    mix = parse_mix(args.mix)
+    corpus_dir = tempfile.mkdtemp()
+    target = Target(generate_corpus(corpus_dir, args.corpus, ResumeSpec(pages=args.pages)))
+    limits = httpx.Limits(max_connections=max(args.max_in_flight, max(args.sweep or [1])))
+    async with httpx.AsyncClient(base_url=base_url, timeout=args.timeout, limits=limits) as client:
+        await seed(client, target, args.seed)
+        results = {"mix": mix, "seeded": len(target.resume_ids)}
+        if not target.resume_ids and set(mix) <= NEEDS_RESUME:
+            raise SystemExit(f"{', '.join(sorted(mix))} needs uploaded resumes: use --seed > 0 or add upload to the mix")
+
+        if args.sweep:
+            sweep = [
+                await closed_loop(client, target, mix, level, args.duration, pid)
+                for level in args.sweep
+            ]
+            results["sweep"] = sweep
+            results["saturation_concurrency"] = saturation_point(sweep)
+        elif args.isolate:
+            results["phases"] = {
+                name: await open_loop(client, target, {name: 1}, args.rate, args.duration, args.max_in_flight, pid)
+                for name in mix
+            }
+        else:
+            results["phases"] = {
+                "mixed": await open_loop(client, target, mix, args.rate, args.duration, args.max_in_flight, pid)
+            }
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", help="Test an already running server instead of starting one")
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn worker processes")
+    parser.add_argument("--env", action="append", default=[], help="Extra server environment, NAME=VALUE")
+    parser.add_argument("--mix", default="list=5,search=3,filter=3,analyze=1,upload=1",
+                        help=f"Weighted endpoint mix from: {', '.join(ENDPOINTS)}")
+    parser.add_argument("--rate", type=float, default=20, help="Target requests per second")
+    parser.add_argument("--duration", type=float, default=30, help="Seconds per phase / sweep level")
+    parser.add_argument("--max-in-flight", type=int, default=256, help="Open-loop cap on outstanding requests")
+    parser.add_argument("--isolate", action="store_true", help="One phase per endpoint")
+    parser.add_argument("--sweep", type=lambda text: [int(level) for level in text.split(",")],
+                        help="Closed-loop concurrency levels, e.g. 1,2,4,8,16")
+    parser.add_argument("--seed", type=int, default=20, help="Resumes uploaded before the test")
+    parser.add_argument("--corpus", type=int, default=10, help="Distinct synthetic PDFs")
+    parser.add_argument("--pages", type=int, default=1)
+    parser.add_argument("--timeout", type=float, default=120)
+    parser.add_argument("--output", help="Write results JSON here")
+    args = parser.parse_args()
+
+    if args.url:
+        results = asyncio.run(run(args, args.url, None))
+    else:
+        env = dict(item.split("=", 1) for item in args.env)
+        with Server(args.workers, env) as server:
+            results = asyncio.run(run(args, server.url, server.pid))
+            results["server_config"] = {
+                "workers": args.workers,
+                "STAGE_CACHE_ENABLED": server.env["STAGE_CACHE_ENABLED"],
+                **env,
+            }
+    write_results(results, args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,14 +1,94 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import URL, Engine, make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool, StaticPool
+import config
 
-SQLALCHEMY_DATABASE_URL = "sqlite:///./resumes.db"
+SQLALCHEMY_DATABASE_URL = config.DATABASE_URL
 
-engine = create_engine(
-    SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False}
-)
+SYNC_DRIVERS = {"sqlite": "sqlite", "postgresql": "postgresql+psycopg2"}
+ASYNC_DRIVERS = {"sqlite": "sqlite+aiosqlite", "postgresql": "postgresql+asyncpg"}
+
+SQLITE_PRAGMAS = {
+    "journal_mode": config.SQLITE_JOURNAL_MODE,
+    "synchronous": config.SQLITE_SYNCHRONOUS,
+    "busy_timeout": config.SQLITE_BUSY_TIMEOUT_MS,
+    "cache_size": -config.SQLITE_CACHE_SIZE_KB,
+    "mmap_size": config.SQLITE_MMAP_SIZE,
+    "temp_store": "MEMORY",
+    "foreign_keys": "ON",
+}
+
+
+def _driver_url(url: str, drivers: dict) -> URL:
+    parsed = make_url(url)
+    backend = parsed.get_backend_name()
+    if backend not in drivers:
+        raise ValueError(f"Unsupported database backend: {backend}")
+    return parsed.set(drivername=drivers[backend])
+
+
+def _is_memory_sqlite(url: URL) -> bool:
+    return url.get_backend_name() == "sqlite" and url.database in (None, "", ":memory:")
+
+
+def _engine_options(url: URL, pool_class) -> dict:
+    if _is_memory_sqlite(url):
+        return {"poolclass": StaticPool, "connect_args": {"check_same_thread": False}}
+
+    options = {
+        "poolclass": pool_class,
+        "pool_size": config.DB_POOL_SIZE,
+        "max_overflow": config.DB_MAX_OVERFLOW,
+        "pool_timeout": config.DB_POOL_TIMEOUT,
+        "pool_pre_ping": url.get_backend_name() != "sqlite",
+        "echo": config.DB_ECHO,
+    }
+    if url.get_backend_name() == "sqlite":
+        options["connect_args"] = {"check_same_thread": False}
+    return options
+
+
+def apply_sqlite_pragmas(engine: Engine, pragmas: dict = SQLITE_PRAGMAS):
+    """Run the tuning pragmas on every new SQLite connection of ``engine``"""
+    if engine.url.get_backend_name() != "sqlite":
+        return
+
+    @event.listens_for(engine, "connect")
+    def _set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas.items():
+            if name == "journal_mode" and _is_memory_sqlite(engine.url):
+                continue
+            cursor.execute(f"PRAGMA {name}={value}")
+        cursor.close()
+
+
+def create_sync_engine(url: str = SQLALCHEMY_DATABASE_URL, tuned: bool = True) -> Engine:
+    sync_url = _driver_url(url, SYNC_DRIVERS)
+    sync_engine = create_engine(sync_url, **_engine_options(sync_url, QueuePool))
+    if tuned:
+        apply_sqlite_pragmas(sync_engine)
+    return sync_engine
+
+
+def create_async_db_engine(url: str = SQLALCHEMY_DATABASE_URL, tuned: bool = True) -> AsyncEngine:
+    async_url = _driver_url(url, ASYNC_DRIVERS)
+    db_engine = create_async_engine(async_url, **_engine_options(async_url, AsyncAdaptedQueuePool))
+    if tuned:
+        apply_sqlite_pragmas(db_engine.sync_engine)
+    return db_engine
+
+
+engine = create_sync_engine()
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+async_engine = create_async_db_engine()
+AsyncSessionLocal = async_sessionmaker(async_engine, class_=AsyncSession, expire_on_commit=False)
+
 Base = declarative_base()
 
 def get_db():
@@ -17,3 +97,15 @@ def get_db():
         yield db
     finally:
         db.close()
+
+def insert_for(bind, table):
+    """Dialect-specific INSERT supporting ON CONFLICT upserts (SQLite and Postgres)"""
+    if isinstance(bind, Session):
+        bind = bind.get_bind()
+    if bind.dialect.name == "postgresql":
+        return postgresql.insert(table)
+    return sqlite.insert(table)
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
@@ -0,0 +1,257 @@
+"""
+Near-duplicate resumes via MinHash and locality-sensitive hashing.
+
+A resume's text is cut into word 5-gram shingles and summarized by a
+128-value MinHash signature; the fraction of equal values estimates the
+Jaccard similarity of two shingle sets. Signatures are split into 16 bands
+of 8 rows and each band is hashed into ``lsh_buckets``. Resumes sharing a
+bucket in any band are candidates, found with an indexed lookup instead of
+a scan, and only those are compared. With 16x8 bands, pairs above ~0.8
+similarity are almost always candidates, pairs below ~0.5 rarely.
+
+Signatures of resumes uploaded before this existed are computed with:
+
+    python -m dedup --backfill
+"""
+import argparse
+import hashlib
+import logging
+import re
+from typing import Dict, List, Optional, Set, Tuple
+
+import numpy as np
+from sqlalchemy import and_, distinct, or_, select
+from sqlalchemy.orm import Session, aliased
+
+import config
+from analysis_store import PIPELINE_VERSION, latest_analysis_query
+from models import LshBucket, Resume, ResumeAnalysis, ResumeSignature
+
+logger = logging.getLogger(__name__)
+
+NUM_PERM = 128
+BANDS = 16
+ROWS = NUM_PERM // BANDS
+SHINGLE_SIZE = 5
+
+_PRIME = np.uint64((1 << 61) - 1)
+_MAX_HASH = np.uint64((1 << 32) - 1)
+# Fixed seed: signatures are persisted and compared across processes
+_rng = np.random.RandomState(1)
+_A = _rng.randint(1, (1 << 61) - 1, NUM_PERM, dtype=np.uint64)
+_B = _rng.randint(0, (1 << 61) - 1, NUM_PERM, dtype=np.uint64)
+
+
+def shingles(text: str) -> Set[bytes]:
+    tokens = re.findall(r"[a-z0-9]+", text.lower())
+    if len(tokens) < SHINGLE_SIZE:
+        return {" ".join(tokens).encode()} if tokens else set()
+    return {" ".join(tokens[i:i + SHINGLE_SIZE]).encode() for i in range(len(tokens) - SHINGLE_SIZE + 1)}
+
+
+def minhash(text: str) -> Optional[np.ndarray]:
+    """MinHash signature (uint32[NUM_PERM]) of the text, None when it has no words"""
+    shingle_set = shingles(text)
+    if not shingle_set:
+        return None
+    hashes = np.fromiter(
+        (int.from_bytes(hashlib.blake2b(s, digest_size=4).digest(), "little") for s in shingle_set),
+        dtype=np.uint64, count=len(shingle_set)
+    )
+    # Universal hashing a*x + b mod p per permutation; uint64 wrap-around is fine here
+    permuted = (np.outer(hashes, _A) + _B) % _PRIME & _MAX_HASH
+    return permuted.min(axis=0).astype(np.uint32)
+
+
+def band_buckets(signature: np.ndarray) -> List[int]:
+    """Signed 64-bit bucket id of every band"""
+    return [
+        int.from_bytes(hashlib.blake2b(signature[i * ROWS:(i + 1) * ROWS].tobytes(), digest_size=8).digest(), "little", signed=True)
+        for i in range(BANDS)
+    ]
+
+
+def similarity(a: np.ndarray, b: np.ndarray) -> float:
+    return float(np.count_nonzero(a == b)) / NUM_PERM
+
+
+def _decode(data: bytes) -> np.ndarray:
+    return np.frombuffer(data, dtype=np.uint32)
+
+
+def index_rows(resume_id: str, signature: np.ndarray) -> list:
+    """ORM rows persisting a signature; add them once the resume row exists"""
+    return [ResumeSignature(resume_id=resume_id, signature=signature.tobytes())] + [
+        LshBucket(band=band, bucket=bucket, resume_id=resume_id)
+        for band, bucket in enumerate(band_buckets(signature))
+    ]
+
+
+def resume_signature(file_path: str, sha256: Optional[str] = None) -> Optional[np.ndarray]:
+    """Signature of a stored resume; the extracted text is memoized for the analysis"""
+    from pipeline import extract_resume_text
+
+    return minhash(extract_resume_text(file_path, sha256))
+
+
+def _signatures(db: Session, resume_ids: List[str]) -> Dict[str, np.ndarray]:
+    found = {}
+    for i in range(0, len(resume_ids), 500):
+        rows = db.execute(
+            select(ResumeSignature.resume_id, ResumeSignature.signature)
+            .where(ResumeSignature.resume_id.in_(resume_ids[i:i + 500]))
+        )
+        found.update((resume_id, _decode(data)) for resume_id, data in rows)
+    return found
+
+
+def find_similar(
+    db: Session,
+    signature: np.ndarray,
+    threshold: float = config.DEDUP_THRESHOLD,
+    exclude: Optional[str] = None,
+    limit: int = 10
+) -> List[Tuple[str, float]]:
+    """(resume_id, similarity) of indexed resumes at or above ``threshold``, most similar first"""
+    buckets = or_(*(
+        and_(LshBucket.band == band, LshBucket.bucket == bucket)
+        for band, bucket in enumerate(band_buckets(signature))
+    ))
+    candidates = [
+        resume_id for resume_id in db.execute(select(distinct(LshBucket.resume_id)).where(buckets)).scalars()
+        if resume_id != exclude
+    ]
+    scored = [
+        (resume_id, similarity(signature, other))
+        for resume_id, other in _signatures(db, candidates).items()
+    ]
+    matches = sorted((match for match in scored if match[1] >= threshold), key=lambda m: -m[1])
+    return matches[:limit]
+
+
+def similar_analysis(
+    db: Session,
+    resume_id: str,
+    threshold: float = config.DEDUP_REUSE_THRESHOLD
+) -> Optional[ResumeAnalysis]:
+    """Current-version analysis of the most similar other resume, if one is close enough"""
+    data = db.execute(
+        select(ResumeSignature.signature).where(ResumeSignature.resume_id == resume_id)
+    ).scalar()
+    if data is None:
+        return None
+    for other_id, _ in find_similar(db, _decode(data), threshold, exclude=resume_id):
+        analysis = db.execute(latest_analysis_query(other_id, PIPELINE_VERSION)).scalars().first()
+        if analysis is not None:
+            return analysis
+    return None
+
+
+def duplicate_clusters(
+    db: Session,
+    threshold: float = config.DEDUP_THRESHOLD,
+    user_id: Optional[str] = None
+) -> List[dict]:
+    """Groups of resumes linked by pairwise similarity >= ``threshold``, largest first.
+
+    Candidate pairs come from a self-join on the bucket index, so only
+    resumes sharing a band are ever compared.
+    """
+    left, right = aliased(LshBucket), aliased(LshBucket)
+    pairs = select(left.resume_id, right.resume_id).distinct().join(
+        right,
+        and_(left.band == right.band, left.bucket == right.bucket, left.resume_id < right.resume_id)
+    )
+    if user_id is not None:
+        owners = select(Resume.id).where(Resume.user_id == user_id)
+        pairs = pairs.where(left.resume_id.in_(owners), right.resume_id.in_(owners))
+    candidate_pairs = db.execute(pairs).all()
+
+    signatures = _signatures(db, sorted({rid for pair in candidate_pairs for rid in pair}))
+    parent: Dict[str, str] = {}
+
+    def find(node: str) -> str:
+        while parent.setdefault(node, node) != node:
+            parent[node] = parent[parent[node]]
+            node = parent[node]
+        return node
+
+    edges: Dict[Tuple[str, str], float] = {}
+    for a, b in candidate_pairs:
+        score = similarity(signatures[a], signatures[b])
+        if score >= threshold:
+            edges[(a, b)] = score
+            parent[find(a)] = find(b)
+
+    groups: Dict[str, List[str]] = {}
+    for node in list(parent):
+        groups.setdefault(find(node), []).append(node)
+
+    resumes = {
+        resume.id: resume for resume in db.execute(
+            select(Resume).where(Resume.id.in_(list(parent)))
+        ).scalars()
+    }
+    clusters = []
+    for members in groups.values():
+        members = sorted((m for m in members if m in resumes), key=lambda m: (resumes[m].created_at, m))
+        if len(members) < 2:
+            continue
+        first = members[0]
+        clusters.append({
+            "size": len(members),
+            "max_similarity": max(score for (a, b), score in edges.items() if a in members),
+            "resumes": [
+                {
+                    "id": member,
+                    "filename": resumes[member].filename,
+                    "user_id": resumes[member].user_id,
+                    "created_at": resumes[member].created_at,
+                    # Similarity to the oldest resume of the cluster
+                    "similarity": 1.0 if member == first else similarity(signatures[first], signatures[member]),
+                }
+                for member in members
+            ],
+        })
+    return sorted(clusters, key=lambda cluster: (-cluster["size"], -cluster["max_similarity"]))
+
+
+def backfill(batch_size: int = 100) -> int:
+    """Index every resume that has no signature yet"""
+    from database import SessionLocal
+
+    indexed = 0
+    with SessionLocal() as db:
+        missing = db.execute(
+            select(Resume.id, Resume.file_path, Resume.sha256)
+            .where(Resume.id.not_in(select(ResumeSignature.resume_id)))
+        ).all()
+        for i, (resume_id, file_path, sha256) in enumerate(missing, 1):
+            try:
+                signature = resume_signature(file_path, sha256)
+            except Exception as e:
+                logger.warning(f"Could not index {resume_id}: {str(e)}")
+                continue
+            if signature is not None:
+                db.add_all(index_rows(resume_id, signature))
+                indexed += 1
+            if i % batch_size == 0:
+                db.commit()
+                logger.info(f"Indexed {indexed} of {i}/{len(missing)} resumes")
+        db.commit()
+    return indexed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--backfill", action="store_true", help="Compute signatures for resumes without one")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+    if args.backfill:
+        print(f"Indexed {backfill()} resume(s)")
+    else:
+        parser.print_help()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+from typing import Optional, Tuple
+from urllib.parse import quote
+
+from fastapi import HTTPException
+
+
+def strong_etag(value: str) -> str:
+    return f'"{value}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Weak comparison used for If-None-Match (RFC 9110 13.1.2)"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    candidates = [tag.strip() for tag in if_none_match.split(",")]
+    opaque = etag[2:] if etag.startswith("W/") else etag
+    return any((tag[2:] if tag.startswith("W/") else tag) == opaque for tag in candidates)
+
+
+def parse_byte_range(range_header: Optional[str], size: int) -> Optional[Tuple[int, int]]:
+    """Inclusive (start, end) of a single ``bytes=`` range, or None to send everything.
+
+    Multi-range requests are answered with the full body, which RFC 9110
+    allows. Ranges that cannot be satisfied raise a 416.
+    """
+    if not range_header:
+        return None
+
+    unit, _, spec = range_header.partition("=")
+    if unit.strip().lower() != "bytes" or "," in spec:
+        return None
+
+    start_text, sep, end_text = spec.strip().partition("-")
+    if not sep:
+        return None
+
+    try:
+        if start_text == "":
+            # Suffix range: the last N bytes
+            length = int(end_text)
+            if length <= 0:
+                raise ValueError
+            start, end = max(size - length, 0), size - 1
+        else:
+            start = int(start_text)
+            end = int(end_text) if end_text else size - 1
+            end = min(end, size - 1)
+    except ValueError:
+        return None
+
+    if start < 0 or start > end or start >= size:
+        raise HTTPException(
+            416,
+            detail="Requested range not satisfiable",
+            headers={"Content-Range": f"bytes */{size}"}
+        )
+    return start, end
+
+
+def content_disposition(filename: str, disposition: str = "attachment") -> str:
+    quoted = quote(filename)
+    if quoted != filename:
+        return f"{disposition}; filename*=utf-8''{quoted}"
+    return f'{disposition}; filename="{filename}"'
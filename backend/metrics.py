@@ -0,0 +1,129 @@
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, Optional
+
+from prometheus_client import CONTENT_TYPE_LATEST, Counter, Gauge, Histogram, generate_latest
+from prometheus_client.core import GaugeMetricFamily, REGISTRY
+
+import stages
+
+# Analysis stages range from regex passes (ms) to BERT on CPU (tens of s)
+STAGE_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+
+REQUESTS = Counter(
+    "http_requests_total",
+    "HTTP requests by route and status",
+    ["method", "route", "status"]
+)
+REQUEST_SECONDS = Histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency by route",
+    ["method", "route"],
+    buckets=STAGE_BUCKETS
+)
+IN_FLIGHT = Gauge(
+    "http_requests_in_flight",
+    "HTTP requests currently being handled",
+    ["route"]
+)
+STAGE_SECONDS = Histogram(
+    "resume_analysis_stage_seconds",
+    "Time spent in each resume analysis stage",
+    ["stage"],
+    buckets=STAGE_BUCKETS
+)
+MODEL_QUEUE_DEPTH = Gauge(
+    "resume_analysis_stage_queue_depth",
+    "Analysis stages (model inference, extractors) waiting for a stage worker"
+)
+MODEL_QUEUE_DEPTH.set_function(
+    lambda: stages._executor._work_queue.qsize() if stages._executor is not None else 0
+)
+CACHE_LOOKUPS = Counter(
+    "cache_lookups_total",
+    "Cache lookups by cache and result",
+    ["cache", "result"]
+)
+ADMISSION_ACTIVE = Gauge(
+    "analysis_admission_active",
+    "Analyses currently holding an admission slot"
+)
+ADMISSION_QUEUED = Gauge(
+    "analysis_admission_queued",
+    "Analyses waiting for an admission slot",
+    ["priority"]
+)
+ADMISSION_WAIT_SECONDS = Histogram(
+    "analysis_admission_wait_seconds",
+    "Time analyses spent queued for admission",
+    ["priority"],
+    buckets=STAGE_BUCKETS
+)
+ADMISSION_REJECTED = Counter(
+    "analysis_admission_rejected_total",
+    "Analyses refused by admission control",
+    ["priority", "reason"]
+)
+
+_cache_counts: Dict[str, Dict[str, int]] = {}
+_cache_lock = threading.Lock()
+
+
+def record_cache_lookup(cache: str, hit: bool):
+    result = "hit" if hit else "miss"
+    CACHE_LOOKUPS.labels(cache, result).inc()
+    with _cache_lock:
+        counts = _cache_counts.setdefault(cache, {"hit": 0, "miss": 0})
+        counts[result] += 1
+
+
+def cache_counts() -> Dict[str, Dict[str, int]]:
+    """Hits and misses per cache since process start"""
+    with _cache_lock:
+        return {cache: dict(counts) for cache, counts in _cache_counts.items()}
+
+
+class _CacheHitRatioCollector:
+    """Hit ratio since process start for every cache that recorded lookups"""
+
+    def collect(self):
+        family = GaugeMetricFamily("cache_hit_ratio", "Cache hits / lookups since start", labels=["cache"])
+        with _cache_lock:
+            for cache, counts in _cache_counts.items():
+                total = counts["hit"] + counts["miss"]
+                family.add_metric([cache], counts["hit"] / total if total else 0.0)
+        yield family
+
+
+REGISTRY.register(_CacheHitRatioCollector())
+
+
+def observe_stages(durations: Dict[str, float], prefix: str = ""):
+    for name, seconds in durations.items():
+        STAGE_SECONDS.labels(prefix + name).observe(seconds)
+
+
+@contextmanager
+def span(name: str, timings: Optional[Dict[str, float]] = None) -> Iterator[None]:
+    """Time a block as analysis stage ``name``, also recording it in ``timings``"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        STAGE_SECONDS.labels(name).observe(elapsed)
+        if timings is not None:
+            timings[name] = elapsed
+
+
+def server_timing(timings: Dict[str, float]) -> str:
+    """Format stage durations (seconds) as a Server-Timing header value"""
+    return ", ".join(
+        f"{name};dur={seconds * 1000:.1f}" for name, seconds in timings.items()
+    )
+
+
+
+def render_metrics():
+    return generate_latest(REGISTRY), CONTENT_TYPE_LATEST
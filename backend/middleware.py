@@ -0,0 +1,126 @@
+import json
+import time
+from typing import Iterable
+
+from fastapi import HTTPException
+from starlette.routing import Match
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+import metrics
+
+# Headroom for the multipart envelope around the file itself
+MULTIPART_OVERHEAD = 64 * 1024
+
+
+class RequestTooLarge(HTTPException):
+    """Raised from ``receive`` so FastAPI's body parsing turns it into a 413"""
+
+    def __init__(self):
+        super().__init__(413, detail="Request body too large")
+
+
+class BodySizeLimitMiddleware:
+    """Reject request bodies over ``max_bytes`` before they are fully received.
+
+    A declared Content-Length over the limit is refused up front; chunked
+    bodies are counted as they arrive and cut off once they pass the limit,
+    so an oversized upload never gets spooled in full.
+    """
+
+    def __init__(self, app: ASGIApp, max_bytes: int, paths: Iterable[str]):
+        self.app = app
+        self.max_bytes = max_bytes + MULTIPART_OVERHEAD
+        self.paths = set(paths)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http" or scope["path"] not in self.paths:
+            await self.app(scope, receive, send)
+            return
+
+        headers = dict(scope["headers"])
+        content_length = headers.get(b"content-length")
+        if content_length is not None and int(content_length) > self.max_bytes:
+            await self._reject(send)
+            return
+
+        received = 0
+        response_started = False
+
+        async def limited_receive() -> Message:
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > self.max_bytes:
+                    raise RequestTooLarge()
+            return message
+
+        async def tracking_send(message: Message):
+            nonlocal response_started
+            if message["type"] == "http.response.start":
+                response_started = True
+            await send(message)
+
+        try:
+            await self.app(scope, limited_receive, tracking_send)
+        except RequestTooLarge:
+            if not response_started:
+                await self._reject(send)
+
+    async def _reject(self, send: Send):
+        body = json.dumps({"detail": "Request body too large"}).encode()
+        await send({
+            "type": "http.response.start",
+            "status": 413,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+                (b"connection", b"close"),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
+
+
+class MetricsMiddleware:
+    """Count requests and time them per route template, tracking in-flight ones.
+
+    Routes are labelled by their path template (``/resumes/{resume_id}``) so
+    the label set stays bounded; unmatched paths share one label.
+    """
+
+    def __init__(self, app: ASGIApp, exclude: Iterable[str] = ("/metrics",)):
+        self.app = app
+        self.exclude = set(exclude)
+
+    @staticmethod
+    def _route(scope: Scope) -> str:
+        for route in scope["app"].routes:
+            match, _ = route.matches(scope)
+            if match == Match.FULL:
+                return getattr(route, "path_format", getattr(route, "path", "unmatched"))
+        return "unmatched"
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http" or scope["path"] in self.exclude:
+            await self.app(scope, receive, send)
+            return
+
+        route = self._route(scope)
+        method = scope["method"]
+        status_code = 500
+
+        async def recording_send(message: Message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        in_flight = metrics.IN_FLIGHT.labels(route)
+        in_flight.inc()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, recording_send)
+        finally:
+            in_flight.dec()
+            metrics.REQUEST_SECONDS.labels(method, route).observe(time.perf_counter() - start)
+            metrics.REQUESTS.labels(method, route, str(status_code)).inc()
@@ -0,0 +1,59 @@
+"""
+Schema migrations for databases created before a model change.
+
+``Base.metadata.create_all`` only creates missing tables, so new indexes,
+columns and backfills on existing databases live here. Each migration is a
+module named ``mNNNN_<description>.py`` exposing ``upgrade(connection)``;
+applied versions are recorded in ``schema_migrations``. Migrations must be
+safe to run against a database that ``create_all`` just built.
+
+    python -m migrations
+"""
+import importlib
+import logging
+import pkgutil
+import re
+from datetime import datetime
+from typing import List
+
+from sqlalchemy import Column, DateTime, MetaData, String, Table, select
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger(__name__)
+
+_metadata = MetaData()
+schema_migrations = Table(
+    "schema_migrations",
+    _metadata,
+    Column("version", String, primary_key=True),
+    Column("applied_at", DateTime),
+)
+
+
+def available_migrations() -> List[str]:
+    names = [
+        module.name for module in pkgutil.iter_modules(__path__)
+        if re.match(r"m\d{4}_", module.name)
+    ]
+    return sorted(names)
+
+
+def run_migrations(engine: Engine) -> List[str]:
+    """Apply pending migrations in order and return the versions applied"""
+    _metadata.create_all(engine)
+    with engine.connect() as conn:
+        applied = set(conn.execute(select(schema_migrations.c.version)).scalars())
+
+    newly_applied = []
+    for name in available_migrations():
+        if name in applied:
+            continue
+        module = importlib.import_module(f"{__name__}.{name}")
+        logger.info(f"Applying migration {name}")
+        with engine.begin() as conn:
+            module.upgrade(conn)
+            conn.execute(schema_migrations.insert().values(
+                version=name, applied_at=datetime.utcnow()
+            ))
+        newly_applied.append(name)
+    return newly_applied
@@ -0,0 +1,12 @@
+import logging
+
+from database import engine
+from migrations import run_migrations
+from models import Base
+
+logging.basicConfig(level=logging.INFO)
+
+if __name__ == "__main__":
+    Base.metadata.create_all(bind=engine)
+    applied = run_migrations(engine)
+    print(f"Applied {len(applied)} migration(s): {', '.join(applied) or 'none'}")
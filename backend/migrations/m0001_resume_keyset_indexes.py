@@ -0,0 +1,8 @@
+"""Composite indexes backing keyset pagination over (created_at, id)"""
+from models import Resume
+
+
+def upgrade(connection):
+    for index in Resume.__table__.indexes:
+        if index.name in ("ix_resumes_created_id", "ix_resumes_user_created_id"):
+            index.create(bind=connection, checkfirst=True)
@@ -0,0 +1,51 @@
+"""Create the normalized skill tables and fill them from stored analyses"""
+from sqlalchemy import select
+
+from database import insert_for
+from models import Resume, ResumeAnalysis, ResumeSkill, Skill
+from skills import filter_technical_skills
+
+BATCH_SIZE = 500
+
+
+def upgrade(connection):
+    Skill.__table__.create(bind=connection, checkfirst=True)
+    ResumeSkill.__table__.create(bind=connection, checkfirst=True)
+
+    # Later analyses of the same resume supersede earlier ones
+    latest = {}
+    rows = connection.execute(
+        select(ResumeAnalysis.resume_id, ResumeAnalysis.analysis_data)
+        .join(Resume, Resume.id == ResumeAnalysis.resume_id)
+        .order_by(ResumeAnalysis.id)
+    )
+    for resume_id, analysis_data in rows:
+        skills = (analysis_data or {}).get("skills") or []
+        latest[resume_id] = filter_technical_skills(skills)
+
+    names = {skill.lower(): skill for skills in latest.values() for skill in skills}
+    if not names:
+        return
+
+    connection.execute(
+        insert_for(connection, Skill.__table__)
+        .values([{"name": name, "name_lower": lower} for lower, name in names.items()])
+        .on_conflict_do_nothing(index_elements=["name_lower"])
+    )
+    skill_ids = dict(connection.execute(select(Skill.name_lower, Skill.id)).all())
+
+    pending = []
+    for resume_id, skills in latest.items():
+        for skill in {skill.lower() for skill in skills}:
+            pending.append({
+                "resume_id": resume_id,
+                "skill_id": skill_ids[skill],
+                "weight": 1.0,
+                "source_section": "skills",
+            })
+    for start in range(0, len(pending), BATCH_SIZE):
+        connection.execute(
+            insert_for(connection, ResumeSkill.__table__)
+            .values(pending[start:start + BATCH_SIZE])
+            .on_conflict_do_nothing(index_elements=["resume_id", "skill_id"])
+        )
@@ -0,0 +1,38 @@
+"""Key stored analyses by (resume_id, pipeline_version) and drop duplicates"""
+from sqlalchemy import func, inspect, select, text, update
+
+from models import ResumeAnalysis
+
+analyses = ResumeAnalysis.__table__
+
+
+def upgrade(connection):
+    columns = {column["name"] for column in inspect(connection).get_columns("resume_analyses")}
+    if "pipeline_version" not in columns:
+        connection.execute(text(
+            "ALTER TABLE resume_analyses "
+            "ADD COLUMN pipeline_version VARCHAR NOT NULL DEFAULT 'legacy'"
+        ))
+
+    # Rows written by the old store_analysis endpoint have no timestamps
+    connection.execute(
+        update(analyses)
+        .where(analyses.c.processed_at.is_(None))
+        .values(processed_at=func.coalesce(analyses.c.created_at, func.current_timestamp()))
+    )
+    connection.execute(
+        update(analyses)
+        .where(analyses.c.created_at.is_(None))
+        .values(created_at=analyses.c.processed_at)
+    )
+    connection.execute(update(analyses).where(analyses.c.resume_id.is_(None)).values(resume_id=""))
+
+    # Every call used to insert a new row; keep the newest per resume and version
+    newest = (
+        select(func.max(analyses.c.id))
+        .group_by(analyses.c.resume_id, analyses.c.pipeline_version)
+    )
+    connection.execute(analyses.delete().where(analyses.c.id.not_in(newest)))
+
+    for index in analyses.indexes:
+        index.create(bind=connection, checkfirst=True)
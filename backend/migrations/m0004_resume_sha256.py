@@ -0,0 +1,37 @@
+"""Store the SHA-256 of each uploaded file on its Resume row"""
+import hashlib
+import os
+
+from sqlalchemy import inspect, select, text, update
+
+from models import Resume
+
+CHUNK_SIZE = 1024 * 1024
+
+
+def _file_sha256(path: str) -> str:
+    hasher = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+            hasher.update(chunk)
+    return hasher.hexdigest()
+
+
+def upgrade(connection):
+    columns = {column["name"] for column in inspect(connection).get_columns("resumes")}
+    if "sha256" not in columns:
+        connection.execute(text("ALTER TABLE resumes ADD COLUMN sha256 VARCHAR(64)"))
+
+    for index in Resume.__table__.indexes:
+        if index.name == "ix_resumes_sha256":
+            index.create(bind=connection, checkfirst=True)
+
+    # Hash files uploaded before the column existed
+    rows = connection.execute(
+        select(Resume.id, Resume.file_path).where(Resume.sha256.is_(None))
+    ).all()
+    for resume_id, file_path in rows:
+        if file_path and os.path.exists(file_path):
+            connection.execute(
+                update(Resume).where(Resume.id == resume_id).values(sha256=_file_sha256(file_path))
+            )
@@ -0,0 +1,27 @@
+"""Move files uploaded under resumes/{uuid}.pdf to their content address"""
+import os
+
+from sqlalchemy import select, update
+
+import config
+from models import Resume
+from storage import blob_path
+
+
+def upgrade(connection):
+    rows = connection.execute(
+        select(Resume.id, Resume.file_path, Resume.sha256).where(Resume.sha256.is_not(None))
+    ).all()
+    for resume_id, file_path, sha256 in rows:
+        target = blob_path(sha256, config.UPLOAD_DIR)
+        if file_path == target or not file_path or not os.path.exists(file_path):
+            continue
+
+        if os.path.exists(target):
+            # Duplicate of a file that is already stored
+            os.remove(file_path)
+        else:
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            os.replace(file_path, target)
+
+        connection.execute(update(Resume).where(Resume.id == resume_id).values(file_path=target))
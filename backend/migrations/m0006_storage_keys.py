@@ -0,0 +1,33 @@
+"""Store backend-relative keys in resumes.file_path instead of local paths.
+
+When a remote storage backend is configured, files still on local disk are
+uploaded to it as part of the migration.
+"""
+import os
+
+from sqlalchemy import select, update
+
+import config
+from models import Resume
+from storage import LocalStorage, blob_key, get_storage
+
+
+def upgrade(connection):
+    storage = get_storage()
+    upload_root = os.path.abspath(config.UPLOAD_DIR)
+    rows = connection.execute(
+        select(Resume.id, Resume.file_path, Resume.sha256).where(Resume.file_path.is_not(None))
+    ).all()
+    for resume_id, file_path, sha256 in rows:
+        local_path = os.path.abspath(file_path)
+        if not local_path.startswith(upload_root + os.sep):
+            continue  # Already a storage key
+
+        key = blob_key(sha256) if sha256 else os.path.relpath(local_path, upload_root).replace(os.sep, "/")
+        if not isinstance(storage, LocalStorage) and os.path.exists(local_path):
+            if storage.exists(key):
+                os.remove(local_path)
+            else:
+                storage.put_file(key, local_path)
+
+        connection.execute(update(Resume).where(Resume.id == resume_id).values(file_path=key))
@@ -0,0 +1,21 @@
+"""Track when each stored analysis was last written, for incremental exports"""
+from sqlalchemy import func, inspect, text, update
+
+from models import ResumeAnalysis
+
+analyses = ResumeAnalysis.__table__
+
+
+def upgrade(connection):
+    columns = {column["name"] for column in inspect(connection).get_columns("resume_analyses")}
+    if "updated_at" not in columns:
+        connection.execute(text("ALTER TABLE resume_analyses ADD COLUMN updated_at TIMESTAMP"))
+
+    connection.execute(
+        update(analyses)
+        .where(analyses.c.updated_at.is_(None))
+        .values(updated_at=func.coalesce(analyses.c.processed_at, analyses.c.created_at))
+    )
+    for index in analyses.indexes:
+        if index.name == "ix_resume_analyses_updated_id":
+            index.create(bind=connection, checkfirst=True)
@@ -0,0 +1,9 @@
+"""Fill the skill trend and co-occurrence aggregates from resume_skills"""
+from models import SkillPair, SkillPeriodCount, SkillPeriodTotal
+from skill_stats import rebuild_skill_stats
+
+
+def upgrade(connection):
+    for model in (SkillPeriodCount, SkillPeriodTotal, SkillPair):
+        model.__table__.create(bind=connection, checkfirst=True)
+    rebuild_skill_stats(connection)
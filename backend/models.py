@@ -1,6 +1,9 @@
-from sqlalchemy import Column, String, DateTime, JSON, Integer
+from datetime import datetime
+from sqlalchemy import Column, String, Date, DateTime, JSON, Integer, BigInteger, Index, Float, ForeignKey, LargeBinary
 from sqlalchemy.ext.declarative import declarative_base
 
+from payload_codec import PackedJSON
+
 Base = declarative_base()
 class Resume(Base):
     __tablename__ = "resumes"
@@ -9,15 +12,135 @@ class Resume(Base):
     user_id = Column(String, index=True)
     filename = Column(String)
     file_path = Column(String)
+    sha256 = Column(String(64), index=True)
     created_at = Column(DateTime)
-    resume_data = Column(JSON)
+    resume_data = Column(PackedJSON("resume_data"))
+
+    __table_args__ = (
+        # Keyset pagination: ORDER BY created_at DESC, id DESC
+        Index("ix_resumes_created_id", "created_at", "id"),
+        Index("ix_resumes_user_created_id", "user_id", "created_at", "id"),
+    )
 
 class ResumeAnalysis(Base):
     __tablename__ = 'resume_analyses'
     
     id = Column(Integer, primary_key=True, autoincrement=True)
-    resume_id = Column(String)
-    analysis_data = Column(JSON)
+    resume_id = Column(String, nullable=False)
+    pipeline_version = Column(String, nullable=False, default="legacy")
+    analysis_data = Column(PackedJSON("analysis_data"))
     tags = Column(JSON)
-    created_at = Column(DateTime)
-    processed_at = Column(DateTime)    
+    created_at = Column(DateTime, nullable=False, default=datetime.now)
+    processed_at = Column(DateTime, nullable=False, default=datetime.now)
+    # When the row was last written; incremental exports resume from it
+    updated_at = Column(DateTime, default=datetime.now)
+
+    __table_args__ = (
+        # One row per resume and pipeline version; stores upsert against it
+        Index("uq_resume_analyses_resume_version", "resume_id", "pipeline_version", unique=True),
+        # Latest analysis per resume
+        Index("ix_resume_analyses_latest", "resume_id", "processed_at"),
+        # Export watermark: ORDER BY updated_at, id
+        Index("ix_resume_analyses_updated_id", "updated_at", "id"),
+    )
+
+class Skill(Base):
+    """Dictionary of every skill seen in an analysis"""
+    __tablename__ = "skills"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    name = Column(String, nullable=False)
+    name_lower = Column(String, nullable=False, unique=True)
+
+class ResumeSkill(Base):
+    __tablename__ = "resume_skills"
+
+    resume_id = Column(String, ForeignKey("resumes.id", ondelete="CASCADE"), primary_key=True)
+    skill_id = Column(Integer, ForeignKey("skills.id", ondelete="CASCADE"), primary_key=True)
+    weight = Column(Float, nullable=False, default=1.0)
+    source_section = Column(String, nullable=False, default="skills")
+
+    __table_args__ = (
+        # Covers skill filters and facet counts without touching the table
+        Index("ix_resume_skills_skill_resume", "skill_id", "resume_id", "weight"),
+    )
+
+class SkillPeriodCount(Base):
+    """Resumes indexed with a skill, per month of resume creation (incrementally maintained)"""
+    __tablename__ = "skill_period_counts"
+
+    period = Column(Date, primary_key=True)
+    skill_id = Column(Integer, ForeignKey("skills.id", ondelete="CASCADE"), primary_key=True)
+    resumes = Column(Integer, nullable=False, default=0)
+
+class SkillPeriodTotal(Base):
+    """Resumes with at least one indexed skill, per month of resume creation"""
+    __tablename__ = "skill_period_totals"
+
+    period = Column(Date, primary_key=True)
+    resumes = Column(Integer, nullable=False, default=0)
+
+class SkillPair(Base):
+    """Sparse, symmetric skill co-occurrence matrix stored as its upper triangle.
+
+    ``skill_a <= skill_b``; the diagonal (a == b) holds each skill's resume count.
+    """
+    __tablename__ = "skill_pairs"
+
+    skill_a = Column(Integer, ForeignKey("skills.id", ondelete="CASCADE"), primary_key=True)
+    skill_b = Column(Integer, ForeignKey("skills.id", ondelete="CASCADE"), primary_key=True)
+    resumes = Column(Integer, nullable=False, default=0)
+
+    __table_args__ = (
+        # Lookups from the other side of the triangle
+        Index("ix_skill_pairs_b_a", "skill_b", "skill_a", "resumes"),
+    )
+
+class SkillChange(Base):
+    """Change log of resume_skills; workers replay it to refresh their skill snapshots"""
+    __tablename__ = "skill_changes"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    resume_id = Column(String, nullable=False)
+    changed_at = Column(DateTime, nullable=False, default=datetime.now, index=True)
+
+    # Ids must never be reused after pruning, or snapshots would skip changes
+    __table_args__ = {"sqlite_autoincrement": True}
+
+class StageOutput(Base):
+    """Memoized output of one analysis stage, keyed by stage version and input hash"""
+    __tablename__ = "stage_outputs"
+
+    stage = Column(String, primary_key=True)
+    version = Column(String, primary_key=True)
+    input_hash = Column(String(64), primary_key=True)
+    output = Column(JSON, nullable=False)
+    created_at = Column(DateTime, nullable=False, default=datetime.now)
+
+class ResumeSignature(Base):
+    """MinHash signature of a resume's text, for near-duplicate detection"""
+    __tablename__ = "resume_signatures"
+
+    resume_id = Column(String, ForeignKey("resumes.id", ondelete="CASCADE"), primary_key=True)
+    signature = Column(LargeBinary, nullable=False)
+
+class LshBucket(Base):
+    """One LSH band of a signature; resumes sharing a bucket are duplicate candidates"""
+    __tablename__ = "lsh_buckets"
+
+    band = Column(Integer, primary_key=True)
+    bucket = Column(BigInteger, primary_key=True)
+    resume_id = Column(String, ForeignKey("resumes.id", ondelete="CASCADE"), primary_key=True)
+
+    __table_args__ = (
+        Index("ix_lsh_buckets_resume", "resume_id"),
+    )
+
+class PayloadDictionary(Base):
+    """A zstd dictionary for the packed payload columns; kept while rows use it"""
+    __tablename__ = "payload_dictionaries"
+
+    dict_id = Column(BigInteger, primary_key=True, autoincrement=False)
+    kind = Column(String, nullable=False)
+    data = Column(LargeBinary, nullable=False)
+    created_at = Column(DateTime, nullable=False, default=datetime.utcnow)
@@ -0,0 +1,94 @@
+import logging
+from collections import defaultdict
+
+import spacy
+import torch
+from transformers import pipeline
+
+import config
+
+logger = logging.getLogger(__name__)
+
+# Part of the memoized NER stage versions: outputs of one model are never
+# served for another
+ACTIVE_MODELS = {
+    "bert": f"{config.NER_MODEL}:{config.NER_AGGREGATION}",
+    "spacy": config.SPACY_MODEL,
+}
+
+
+def load_bert_pipeline(model: str = config.NER_MODEL, aggregation: str = config.NER_AGGREGATION):
+    """Token classification pipeline for a Hugging Face model name or local directory.
+
+    Set ``HF_HUB_OFFLINE=1`` to load only from local files / the HF cache.
+    """
+    try:
+        nlp = pipeline(
+            "ner",
+            model=model,
+            aggregation_strategy=aggregation,
+            device=0 if torch.cuda.is_available() else -1,
+            grouped_entities=True
+        )
+        logger.info(f"NER pipeline {model} initialized successfully")
+        return nlp
+    except Exception as e:
+        logger.error(f"Failed to initialize NER pipeline {model}: {str(e)}")
+        raise
+
+
+def load_spacy_model(name: str = config.SPACY_MODEL):
+    """spaCy pipeline by package name or local path"""
+    return spacy.load(name)
+
+
+def process_bert_entities(results):
+    """Process BERT NER results"""
+    entity_map = {
+        'PER': ['PER'],
+        'ORG': ['ORG'],
+        'LOC': ['LOC'],
+        'DATE': ['DATE']
+    }
+    
+    entities = defaultdict(list)
+    current_entity = None
+    
+    for entity in results:
+        entity_group = None
+        for group, labels in entity_map.items():
+            if entity['entity_group'] in labels:
+                entity_group = group
+                break
+        
+        if entity_group:
+            if entity['word'].startswith('##'):
+                if current_entity and current_entity['group'] == entity_group:
+                    current_entity['text'] += entity['word'].replace('##', '')
+            else:
+                if current_entity:
+                    entities[current_entity['group']].append(current_entity['text'])
+                current_entity = {
+                    'text': entity['word'],
+                    'group': entity_group
+                }
+    
+    if current_entity:
+        entities[current_entity['group']].append(current_entity['text'])
+    
+    return dict(entities)
+
+def process_spacy_entities(doc):
+    """Process spaCy entities"""
+    entities = defaultdict(list)
+    for ent in doc.ents:
+        if ent.label_ == 'PERSON':
+            entities['PER'].append(ent.text)
+        elif ent.label_ == 'ORG':
+            entities['ORG'].append(ent.text)
+        elif ent.label_ == 'GPE' or ent.label_ == 'LOC':
+            entities['LOC'].append(ent.text)
+        elif ent.label_ == 'DATE':
+            entities['DATE'].append(ent.text)
+    
+    return dict(entities)
@@ -0,0 +1,85 @@
+import base64
+import json
+from datetime import datetime
+from typing import Any, AsyncIterator, Callable, MutableMapping, Optional, Sequence, Tuple
+
+import orjson
+from fastapi import HTTPException
+from fastapi.responses import StreamingResponse
+from sqlalchemy import Select, tuple_
+
+from database import AsyncSessionLocal
+from models import Resume
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+STREAM_BATCH_SIZE = 500
+
+
+def encode_cursor(created_at: datetime, resume_id: str) -> str:
+    """Opaque cursor pointing just after the given (created_at, id) key"""
+    raw = json.dumps([created_at.isoformat(), resume_id]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, str]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, resume_id = json.loads(base64.urlsafe_b64decode(padded))
+        return datetime.fromisoformat(created_at), str(resume_id)
+    except (ValueError, TypeError):
+        raise HTTPException(400, detail="Invalid cursor")
+
+
+def keyset_page(stmt: Select, cursor: Optional[str], limit: Optional[int]) -> Select:
+    """Order ``stmt`` newest first and continue after ``cursor``.
+
+    One row more than ``limit`` is requested so the caller can tell whether
+    another page exists without a COUNT query.
+    """
+    stmt = stmt.order_by(Resume.created_at.desc(), Resume.id.desc())
+    if cursor:
+        created_at, resume_id = decode_cursor(cursor)
+        stmt = stmt.where(tuple_(Resume.created_at, Resume.id) < tuple_(created_at, resume_id))
+    if limit is not None:
+        stmt = stmt.limit(limit + 1)
+    return stmt
+
+
+def trim_page(rows: Sequence[Any], limit: int, headers: MutableMapping[str, str]) -> Sequence[Any]:
+    """Drop the look-ahead row and advertise the next cursor in ``headers``"""
+    if len(rows) <= limit:
+        return rows
+
+    rows = rows[:limit]
+    last = rows[-1]
+    next_cursor = encode_cursor(last.created_at, last.id)
+    headers["X-Next-Cursor"] = next_cursor
+    headers["Link"] = f'<?cursor={next_cursor}&limit={limit}>; rel="next"'
+    return rows
+
+
+def ndjson_response(
+    stmt: Select,
+    serialize: Callable[[Any], dict],
+    scalars: bool = True,
+    transform: Optional[Callable[[AsyncIterator[Any]], AsyncIterator[Any]]] = None
+) -> StreamingResponse:
+    """Stream the rows of ``stmt`` as newline-delimited JSON.
+
+    Rows come from a server-side cursor in batches of STREAM_BATCH_SIZE, so
+    memory use does not grow with the size of the result. The stream opens
+    its own session because request-scoped sessions are closed before the
+    response body is sent. ``transform`` may regroup the row iterator
+    (e.g. fold joined rows) before each item is serialized.
+    """
+    async def generate() -> AsyncIterator[bytes]:
+        async with AsyncSessionLocal() as db:
+            result = await db.stream(stmt.execution_options(yield_per=STREAM_BATCH_SIZE))
+            rows = result.scalars() if scalars else result
+            if transform is not None:
+                rows = transform(rows)
+            async for row in rows:
+                yield orjson.dumps(serialize(row)) + b"\n"
+
+    return StreamingResponse(generate(), media_type="application/x-ndjson")
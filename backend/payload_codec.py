@@ -0,0 +1,349 @@
+"""
+Compact storage encoding for the JSON payload columns.
+
+``ResumeAnalysis.analysis_data`` and ``Resume.resume_data`` use the
+``PackedJSON`` column type. With ``PAYLOAD_ENCODING=msgpack-zstd`` new values
+are stored as MessagePack compressed with zstd, using a dictionary trained
+on the payloads of that column. Analyses repeat the same keys and much of
+the same wording, so a dictionary compresses them far better than each
+value alone. Values read back as the same dicts and lists, so the API does
+not see the difference.
+
+Reads accept both encodings, so rows can be converted in place at any time.
+A binary value starts with ``MAGIC``, which no JSON text starts with; the
+zstd frame names the dictionary it was compressed with. Dictionaries live
+in ``payload_dictionaries`` and are never deleted, since old rows still
+need them. The binary encoding is SQLite only; on PostgreSQL the columns
+stay JSON, which the server already compresses (TOAST).
+
+    python -m payload_codec --train --rewrite --vacuum   # convert existing rows, once after enabling
+    python -m payload_codec --stats
+"""
+import argparse
+import logging
+import threading
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional
+
+import msgpack
+import orjson
+import zstandard as zstd
+from sqlalchemy import JSON, LargeBinary, bindparam, func, select, text, type_coerce, update
+from sqlalchemy.types import TypeDecorator
+
+import config
+
+logger = logging.getLogger(__name__)
+
+ENCODINGS = ("json", "msgpack-zstd")
+MAGIC = b"\x00MZ"
+MIN_TRAINING_SAMPLES = 64
+
+
+class PayloadCodec:
+    """MessagePack + zstd encoding with per-column dictionaries.
+
+    Dictionaries are loaded from the database on first use, and again when a
+    frame names one this process has not seen (trained by another process).
+    Compressors are not thread-safe, so each thread keeps its own.
+    """
+
+    def __init__(self, encoding: str = config.PAYLOAD_ENCODING, level: int = config.PAYLOAD_ZSTD_LEVEL):
+        if encoding not in ENCODINGS:
+            raise ValueError(f"Unknown payload encoding: {encoding}")
+        self.encoding = encoding
+        self.level = level
+        self._dictionaries: Dict[int, zstd.ZstdCompressionDict] = {}
+        self._active: Dict[str, int] = {}
+        self._loaded = False
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    @property
+    def binary(self) -> bool:
+        return self.encoding == "msgpack-zstd"
+
+    def add_dictionary(self, kind: str, dict_id: int, data: bytes, activate: bool = True):
+        dictionary = zstd.ZstdCompressionDict(data)
+        dictionary.precompute_compress(level=self.level)
+        with self._lock:
+            self._dictionaries[dict_id] = dictionary
+            if activate:
+                self._active[kind] = dict_id
+
+    def load(self, bind=None):
+        """(Re)load every stored dictionary; the newest per column is used for writes"""
+        from models import PayloadDictionary
+
+        if bind is None:
+            from database import engine as bind
+        with bind.connect() as conn:
+            rows = conn.execute(
+                select(PayloadDictionary.kind, PayloadDictionary.dict_id, PayloadDictionary.data)
+                .order_by(PayloadDictionary.created_at, PayloadDictionary.dict_id)
+            ).all()
+        for kind, dict_id, data in rows:
+            if dict_id not in self._dictionaries:
+                self.add_dictionary(kind, dict_id, data, activate=False)
+            self._active[kind] = dict_id
+        self._loaded = True
+
+    def _ensure_loaded(self):
+        if self._loaded:
+            return
+        try:
+            self.load()
+        except Exception as e:
+            # No table yet (fresh database) or no database at all
+            logger.warning(f"Payload dictionaries not loaded: {str(e)}")
+            self._loaded = True
+
+    def _compressor(self, dict_id: Optional[int]) -> zstd.ZstdCompressor:
+        key = f"c{dict_id}"
+        compressor = getattr(self._local, key, None)
+        if compressor is None:
+            dictionary = self._dictionaries.get(dict_id) if dict_id else None
+            compressor = zstd.ZstdCompressor(level=self.level, dict_data=dictionary)
+            setattr(self._local, key, compressor)
+        return compressor
+
+    def _decompressor(self, dict_id: int) -> zstd.ZstdDecompressor:
+        key = f"d{dict_id}"
+        decompressor = getattr(self._local, key, None)
+        if decompressor is None:
+            if dict_id and dict_id not in self._dictionaries:
+                self._loaded = False
+                self._ensure_loaded()
+                if dict_id not in self._dictionaries:
+                    raise ValueError(f"Unknown payload dictionary {dict_id}")
+            decompressor = zstd.ZstdDecompressor(dict_data=self._dictionaries.get(dict_id))
+            setattr(self._local, key, decompressor)
+        return decompressor
+
+    def active_dictionary(self, kind: str) -> Optional[int]:
+        self._ensure_loaded()
+        return self._active.get(kind)
+
+    def encode(self, kind: str, value: Any) -> bytes:
+        packed = msgpack.packb(value, use_bin_type=True)
+        return MAGIC + self._compressor(self.active_dictionary(kind)).compress(packed)
+
+    def decode(self, data: bytes) -> Any:
+        frame = memoryview(data)[len(MAGIC):]
+        dict_id = zstd.get_frame_parameters(frame).dict_id
+        packed = self._decompressor(dict_id).decompress(frame)
+        return msgpack.unpackb(packed, raw=False, strict_map_key=False)
+
+
+CODEC = PayloadCodec()
+
+
+def is_packed(value: Any) -> bool:
+    return isinstance(value, (bytes, memoryview)) and bytes(value[:len(MAGIC)]) == MAGIC
+
+
+def frame_dictionary(value: bytes) -> int:
+    return zstd.get_frame_parameters(memoryview(value)[len(MAGIC):]).dict_id
+
+
+def loads(value: Any) -> Any:
+    """Decode a raw column value (see ``RawPayload``) in either encoding"""
+    if value is None:
+        return None
+    if is_packed(value):
+        return CODEC.decode(bytes(value))
+    if isinstance(value, (str, bytes)):
+        return orjson.loads(value)
+    return value
+
+
+class PackedJSON(TypeDecorator):
+    """JSON column that stores MessagePack + zstd when ``CODEC`` is binary.
+
+    ``kind`` names the column's dictionary. Reads accept both encodings.
+    """
+
+    impl = JSON
+    cache_ok = True
+
+    def __init__(self, kind: str):
+        super().__init__()
+        self.kind = kind
+
+    def bind_processor(self, dialect):
+        as_json = dialect.type_descriptor(self.impl_instance).bind_processor(dialect)
+        if dialect.name != "sqlite":
+            return as_json
+
+        def process(value):
+            if value is not None and CODEC.binary:
+                return CODEC.encode(self.kind, value)
+            return as_json(value) if as_json else value
+
+        return process
+
+    def result_processor(self, dialect, coltype):
+        from_json = dialect.type_descriptor(self.impl_instance).result_processor(dialect, coltype)
+
+        def process(value):
+            if is_packed(value):
+                return CODEC.decode(bytes(value))
+            return from_json(value) if from_json else value
+
+        return process
+
+
+class RawPayload(TypeDecorator):
+    """Reads a payload column as stored (JSON text or packed bytes), for ``loads``"""
+
+    impl = LargeBinary
+    cache_ok = True
+
+    def result_processor(self, dialect, coltype):
+        return None
+
+
+def _payload_columns() -> Dict[str, Any]:
+    from models import Resume, ResumeAnalysis
+
+    return {
+        "analysis_data": (ResumeAnalysis.__table__, ResumeAnalysis.__table__.c.analysis_data),
+        "resume_data": (Resume.__table__, Resume.__table__.c.resume_data),
+    }
+
+
+def _raw(column):
+    return type_coerce(column, RawPayload())
+
+
+def _sample(connection, kind: str, count: int) -> List[bytes]:
+    table, column = _payload_columns()[kind]
+    rows = connection.execute(
+        select(_raw(column)).where(column.is_not(None)).order_by(func.random()).limit(count)
+    ).scalars()
+    return [msgpack.packb(loads(raw), use_bin_type=True) for raw in rows]
+
+
+def unconverted(bind) -> bool:
+    """Packing is configured for this database but no dictionary was ever trained.
+
+    Existing rows are only converted by ``python -m payload_codec --train
+    --rewrite``; new rows are packed without a dictionary until then.
+    """
+    return bind.dialect.name == "sqlite" and CODEC.binary and not any(
+        CODEC.active_dictionary(kind) for kind in ("analysis_data", "resume_data")
+    )
+
+
+def train_dictionaries(
+    connection,
+    kinds: Iterable[str] = ("analysis_data", "resume_data"),
+    samples: int = config.PAYLOAD_DICT_SAMPLES,
+    size: int = config.PAYLOAD_DICT_SIZE
+) -> Dict[str, int]:
+    """Train, store and activate a new dictionary per column from a sample of its rows"""
+    from models import PayloadDictionary
+
+    trained = {}
+    for kind in kinds:
+        sample = _sample(connection, kind, samples)
+        if len(sample) < MIN_TRAINING_SAMPLES:
+            logger.info(f"Not enough {kind} rows ({len(sample)}) to train a dictionary")
+            continue
+        try:
+            dictionary = zstd.train_dictionary(size, sample, level=CODEC.level)
+        except zstd.ZstdError as e:
+            logger.warning(f"Dictionary training failed for {kind}: {str(e)}")
+            continue
+        dict_id = dictionary.dict_id()
+        connection.execute(PayloadDictionary.__table__.insert().values(
+            dict_id=dict_id, kind=kind, data=dictionary.as_bytes(), created_at=datetime.utcnow()
+        ))
+        CODEC.add_dictionary(kind, dict_id, dictionary.as_bytes())
+        trained[kind] = dict_id
+    return trained
+
+
+def _current(kind: str, raw: Any) -> bool:
+    """Whether a stored value already uses the configured encoding (and dictionary)"""
+    if not CODEC.binary:
+        return not is_packed(raw)
+    return is_packed(raw) and frame_dictionary(bytes(raw)) == (CODEC.active_dictionary(kind) or 0)
+
+
+def rewrite_payloads(connection, kinds: Iterable[str] = ("analysis_data", "resume_data"), batch_size: int = 500) -> Dict[str, int]:
+    """Re-encode stored values that are not in the configured encoding"""
+    rewritten = {}
+    for kind in kinds:
+        table, column = _payload_columns()[kind]
+        key = table.primary_key.columns[0]
+        stmt = (
+            update(table)
+            .where(key == bindparam("_key"))
+            .values({column.name: bindparam("_value", type_=column.type)})
+        )
+        last, count = None, 0
+        while True:
+            page = select(key, _raw(column)).where(column.is_not(None)).order_by(key).limit(batch_size)
+            if last is not None:
+                page = page.where(key > last)
+            rows = connection.execute(page).all()
+            if not rows:
+                break
+            last = rows[-1][0]
+            changed = [{"_key": row_key, "_value": loads(raw)} for row_key, raw in rows if not _current(kind, raw)]
+            if changed:
+                connection.execute(stmt, changed)
+                count += len(changed)
+        rewritten[kind] = count
+        logger.info(f"Re-encoded {count} {kind} value(s) as {CODEC.encoding}")
+    return rewritten
+
+
+def payload_stats(connection) -> Dict[str, dict]:
+    """Stored bytes per payload column, by encoding"""
+    stats = {}
+    for kind, (table, column) in _payload_columns().items():
+        counts = {"json": [0, 0], "msgpack-zstd": [0, 0]}
+        for raw in connection.execute(select(_raw(column)).where(column.is_not(None))).scalars():
+            entry = counts["msgpack-zstd" if is_packed(raw) else "json"]
+            entry[0] += 1
+            entry[1] += len(raw.encode() if isinstance(raw, str) else raw)
+        stats[kind] = {
+            encoding: {"rows": rows, "bytes": size, "avg_bytes": round(size / rows, 1) if rows else 0}
+            for encoding, (rows, size) in counts.items()
+        }
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--train", action="store_true", help="Train new dictionaries from the stored payloads")
+    parser.add_argument("--rewrite", action="store_true", help="Re-encode rows in the configured PAYLOAD_ENCODING")
+    parser.add_argument("--vacuum", action="store_true", help="VACUUM the SQLite file afterwards to return the space")
+    parser.add_argument("--stats", action="store_true", help="Print stored bytes per column and encoding")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+
+    from database import engine
+
+    if engine.dialect.name != "sqlite" and (args.train or args.rewrite):
+        parser.error("The binary payload encoding is only used with SQLite")
+    if args.train:
+        with engine.begin() as conn:
+            print(f"Trained dictionaries: {train_dictionaries(conn) or 'none'}")
+    if args.rewrite:
+        with engine.begin() as conn:
+            print(f"Re-encoded as {CODEC.encoding}: {rewrite_payloads(conn)}")
+    if args.vacuum:
+        with engine.connect() as conn:
+            conn.execution_options(isolation_level="AUTOCOMMIT").execute(text("VACUUM"))
+            # In WAL mode the file only shrinks once the log is checkpointed
+            conn.execute(text("PRAGMA wal_checkpoint(TRUNCATE)"))
+    if args.stats or not (args.train or args.rewrite or args.vacuum):
+        with engine.connect() as conn:
+            print(orjson.dumps(payload_stats(conn), option=orjson.OPT_INDENT_2).decode())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+from datetime import datetime
+from typing import Any, Callable, Dict, Optional
+
+from fastapi import HTTPException, status
+
+from analysis_utils import (
+    ENTITY_STAGE_VERSIONS,
+    STAGE_VERSIONS,
+    _finalize_project,
+    extract_education_details,
+    extract_experience_details,
+    extract_projects,
+    extract_resume_entities,
+    extract_text_from_pdf,
+    get_filtered_skills,
+    track_skills,
+)
+from metrics import span
+from stage_cache import memoize
+from storage import get_storage
+
+MAX_PAGES = 3
+# The page limit changes the text, so it is part of the stage version
+PDF_TEXT_VERSION = f"{STAGE_VERSIONS['pdf_text']}:{MAX_PAGES}"
+# Versions the stage outputs are currently persisted under
+STAGE_CACHE_VERSIONS = {"pdf_text": PDF_TEXT_VERSION, **ENTITY_STAGE_VERSIONS}
+
+
+def extract_resume_text(file_path: str, sha256: Optional[str] = None) -> str:
+    """Text of a stored resume, memoized by file content when its hash is known"""
+    def read() -> str:
+        with get_storage().local_path(file_path) as local_path:
+            return extract_text_from_pdf(local_path, max_pages=MAX_PAGES)
+
+    if not sha256:
+        return read()
+    return memoize("pdf_text", PDF_TEXT_VERSION, sha256, read)
+
+
+# Every section but the name comes from the regex extractors alone (NER
+# only supplies the fallback name), so a streaming caller can get them
+# before BERT and spaCy finish
+SECTIONS = ("metadata", "skills", "experience", "education", "projects")
+
+
+def build_metadata(entities: dict) -> dict:
+    # Process metadata with improved name cleaning
+    contact = entities.get('CONTACT', [['', '']])[0]
+    try:
+        name = entities.get("NAME", [['']])[0]  # Try NAME first
+    except (KeyError, IndexError):  # If NAME missing or empty
+        try:
+            name = entities.get("ORG", [''])[0][:14] # Fall back to ORG
+        except (KeyError, IndexError):  # If ORG missing or empty
+            name = ""  # Final fallback
+    return {
+        "name": name,
+        "email": contact[0] if len(contact) > 0 else "",
+        "phone": contact[1] if len(contact) > 1 else ""
+    }
+
+
+def build_sections(
+    resume_id: str,
+    text: str,
+    entities: dict,
+    timings: Optional[Dict[str, float]] = None
+) -> dict:
+    """Skills, experience, education and projects from the extracted entities"""
+    # Process skills with tracking
+    raw_skills = entities.get('SKILLS', [[]])[0]
+    with span("skills", timings):
+        track_skills(resume_id, raw_skills)
+    
+    # Process experience
+    with span("experience", timings):
+        experience = extract_experience_details(text)
+    # Process education
+    edu_entries = entities.get('EDUCATION', [[]])[0]
+    with span("education", timings):
+        education = extract_education_details(edu_entries, entities.get('DATE', []))
+    
+    # Process projects
+    with span("projects", timings):
+        projects = extract_projects(text)
+        final_projects = []
+        for project in projects:
+            final_projects.append(_finalize_project(project))
+
+    return {
+        "skills": get_filtered_skills(resume_id),  # Use filtered skills
+        "experience": experience,
+        "education": education,
+        "projects": final_projects,
+    }
+
+
+def run_analysis(
+    resume_id: str,
+    file_path: str,
+    timings: Optional[Dict[str, float]] = None,
+    sha256: Optional[str] = None,
+    emit: Optional[Callable[[str, Any], None]] = None
+) -> dict:
+    """Run the full CPU-bound analysis of a stored resume, timing each stage.
+
+    ``emit(section, value)`` is called once per entry of ``SECTIONS`` as soon
+    as that section is known, from the thread running the analysis.
+    """
+    with span("pdf_text", timings):
+        text = extract_resume_text(file_path, sha256)
+    if not text:
+        raise HTTPException(
+            status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail="No text could be extracted from the PDF"
+        )
+
+    sections: Dict[str, Any] = {}
+
+    def publish(values: dict):
+        for section in SECTIONS:
+            if section in values and section not in sections:
+                sections[section] = values[section]
+                emit(section, values[section])
+
+    def on_stage(name: str, output: dict):
+        if name != "regex":
+            return
+        early = build_sections(resume_id, text, output, timings)
+        if output.get("NAME"):
+            early["metadata"] = build_metadata(output)
+        publish(early)
+
+    with span("entities", timings):
+        entities = extract_resume_entities(text[:], timings, on_stage if emit else None)
+    processed_at = datetime.now()
+
+    remaining = {}
+    if "metadata" not in sections:
+        remaining["metadata"] = build_metadata(entities)
+    if "skills" not in sections:
+        remaining.update(build_sections(resume_id, text, entities, timings))
+    if emit:
+        publish(remaining)
+    else:
+        sections = remaining
+
+    return {
+        **{section: sections[section] for section in SECTIONS},
+        "processed_at": processed_at.isoformat()
+    }
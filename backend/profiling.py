@@ -0,0 +1,131 @@
+import logging
+import os
+import random
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import orjson
+
+import config
+
+logger = logging.getLogger(__name__)
+
+STAGE_THREAD_PREFIX = "analysis-stage"
+
+
+def _frame_label(code) -> str:
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+class StackSampler:
+    """Sampling profiler over the threads that work on one analysis.
+
+    Every ``interval`` seconds the stacks of the calling thread and of the
+    stage worker threads are captured with ``sys._current_frames``. Unlike
+    cProfile this follows work handed to the stage executor; stage workers
+    busy with another request at the same time are sampled as well.
+    """
+
+    def __init__(self, interval: float = config.PROFILE_INTERVAL_SECONDS):
+        self.interval = interval
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self._owner = threading.get_ident()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+
+    def _targets(self) -> Dict[int, str]:
+        targets = {self._owner: "request"}
+        for thread in threading.enumerate():
+            if thread.name.startswith(STAGE_THREAD_PREFIX):
+                targets[thread.ident] = thread.name
+        return targets
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            targets = self._targets()
+            for ident, frame in sys._current_frames().items():
+                if ident not in targets:
+                    continue
+                stack = []
+                while frame is not None:
+                    stack.append(_frame_label(frame.f_code))
+                    frame = frame.f_back
+                # Idle stage workers are parked in ThreadPoolExecutor's _worker loop
+                if ident != self._owner and stack[0].startswith("_worker (thread.py"):
+                    continue
+                stack.append(targets[ident].rsplit("_", 1)[0])
+                self.stacks[tuple(reversed(stack))] += 1
+            self.samples += 1
+
+    def __enter__(self) -> "StackSampler":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+
+    def collapsed(self) -> str:
+        """Brendan Gregg's collapsed-stack format, ready for flamegraph.pl / speedscope"""
+        return "\n".join(f"{';'.join(stack)} {count}" for stack, count in self.stacks.most_common())
+
+    def top_functions(self, limit: int = 25) -> List[Dict[str, Any]]:
+        """Functions by cumulative time (on the stack) with their self time"""
+        cumulative: Counter = Counter()
+        own: Counter = Counter()
+        for stack, count in self.stacks.items():
+            for label in set(stack[1:]):
+                cumulative[label] += count
+            own[stack[-1]] += count
+        return [
+            {
+                "function": label,
+                "cumulative_s": round(count * self.interval, 4),
+                "self_s": round(own[label] * self.interval, 4),
+            }
+            for label, count in cumulative.most_common(limit)
+        ]
+
+    def report(self, wall_time: float) -> Dict[str, Any]:
+        return {
+            "wall_time_s": round(wall_time, 4),
+            "interval_ms": self.interval * 1000,
+            "samples": self.samples,
+            "top": self.top_functions(),
+            "collapsed": self.collapsed(),
+        }
+
+
+def profiled(func: Callable, *args, **kwargs) -> Tuple[Any, Dict[str, Any]]:
+    """Run ``func`` under a StackSampler; returns its result and the profile"""
+    start = time.perf_counter()
+    with StackSampler() as sampler:
+        result = func(*args, **kwargs)
+    return result, sampler.report(time.perf_counter() - start)
+
+
+def should_sample() -> bool:
+    return config.PROFILE_SAMPLE_RATE > 0 and random.random() < config.PROFILE_SAMPLE_RATE
+
+
+def save_profile(name: str, profile: Dict[str, Any], directory: str = config.PROFILE_DIR) -> Optional[str]:
+    """Write a profile as ``<name>.json`` plus ``<name>.collapsed`` if it is slow enough to keep"""
+    if profile["wall_time_s"] < config.PROFILE_MIN_SECONDS:
+        return None
+    try:
+        os.makedirs(directory, exist_ok=True)
+        base = os.path.join(directory, f"{datetime.utcnow():%Y%m%dT%H%M%S}_{name}")
+        with open(base + ".collapsed", "w") as f:
+            f.write(profile["collapsed"] + "\n")
+        with open(base + ".json", "wb") as f:
+            f.write(orjson.dumps({k: v for k, v in profile.items() if k != "collapsed"}, option=orjson.OPT_INDENT_2))
+        logger.info(f"Saved profile of {name} ({profile['wall_time_s']:.2f}s) to {base}.json")
+        return base
+    except OSError as e:
+        logger.warning(f"Could not save profile {name}: {str(e)}")
+        return None
@@ -0,0 +1,95 @@
+"""
+Re-run the analysis of stored resumes and store the results under the
+current PIPELINE_VERSION.
+
+Stage outputs are memoized (see ``stage_cache``), so after a fix to the
+regex extractors or post-processing only those re-run; PDF parsing and the
+NER models are served from the cache unless their stage version changed.
+By default only resumes without an analysis for the current pipeline
+version are processed.
+
+    python -m reprocess --workers 4
+    python -m reprocess --all --prune-stages
+"""
+import argparse
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import List, Optional, Tuple
+
+from sqlalchemy import select
+
+import config
+from analysis_store import PIPELINE_VERSION, store_analysis_result
+from database import SessionLocal, engine
+from metrics import cache_counts
+from migrations import run_migrations
+from models import Base, Resume, ResumeAnalysis
+from pipeline import STAGE_CACHE_VERSIONS, run_analysis
+from stage_cache import prune_stage_outputs
+
+logger = logging.getLogger(__name__)
+
+
+def pending_resumes(everything: bool = False, limit: Optional[int] = None) -> List[Tuple[str, str, Optional[str]]]:
+    """(id, file_path, sha256) of the resumes to process, oldest first"""
+    stmt = select(Resume.id, Resume.file_path, Resume.sha256).order_by(Resume.created_at, Resume.id)
+    if not everything:
+        current = select(ResumeAnalysis.resume_id).where(ResumeAnalysis.pipeline_version == PIPELINE_VERSION)
+        stmt = stmt.where(Resume.id.not_in(current))
+    if limit:
+        stmt = stmt.limit(limit)
+    with SessionLocal() as db:
+        return [tuple(row) for row in db.execute(stmt)]
+
+
+def reprocess_one(resume_id: str, file_path: str, sha256: Optional[str]):
+    result = run_analysis(resume_id, file_path, sha256=sha256)
+    with SessionLocal() as db:
+        store_analysis_result(db, resume_id, result)
+
+
+def stage_hit_summary() -> str:
+    parts = []
+    for cache, counts in sorted(cache_counts().items()):
+        if cache.startswith("stage."):
+            parts.append(f"{cache[len('stage.'):]} {counts['hit']}/{counts['hit'] + counts['miss']} cached")
+    return ", ".join(parts) or "stage cache unused"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--all", action="store_true", help="Also re-run resumes already analyzed by this pipeline version")
+    parser.add_argument("--limit", type=int, help="Process at most this many resumes")
+    parser.add_argument("--workers", type=int, default=config.ANALYSIS_MAX_CONCURRENCY)
+    parser.add_argument("--prune-stages", action="store_true", help="Delete stage outputs of superseded stage versions")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    Base.metadata.create_all(bind=engine)
+    run_migrations(engine)
+
+    resumes = pending_resumes(args.all, args.limit)
+    print(f"Reprocessing {len(resumes)} resume(s) with pipeline version {PIPELINE_VERSION}")
+    start = time.perf_counter()
+    failed = 0
+    with ThreadPoolExecutor(max_workers=max(1, args.workers)) as executor:
+        futures = {executor.submit(reprocess_one, *resume): resume[0] for resume in resumes}
+        for done, future in enumerate(as_completed(futures), 1):
+            try:
+                future.result()
+            except Exception as e:
+                failed += 1
+                logger.error(f"Reprocessing {futures[future]} failed: {str(e)}")
+            if done % 50 == 0 or done == len(futures):
+                elapsed = time.perf_counter() - start
+                print(f"{done}/{len(futures)} in {elapsed:.1f}s ({done / elapsed:.1f}/s); {stage_hit_summary()}")
+
+    if args.prune_stages:
+        with SessionLocal() as db:
+            print(f"Pruned {prune_stage_outputs(db, STAGE_CACHE_VERSIONS)} superseded stage output(s)")
+    print(f"Done: {len(resumes) - failed} stored, {failed} failed")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+"""
+Per-process cache of encoded responses for the hot read endpoints.
+
+Entries are tagged with what they depend on (``user:<id>``,
+``resume:<id>``, ``search``, ``skills``); the endpoints that write call
+``invalidate`` with the tags they touched, after committing. The TTL bounds
+how long another worker's writes can go unnoticed, since each worker only
+sees its own invalidations. Every cached body carries a strong ETag, so
+clients revalidating with If-None-Match get a 304 without a body.
+"""
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, FrozenSet, Hashable, Iterable, Optional, Tuple
+
+import orjson
+from fastapi import Request, Response
+
+import config
+from http_utils import etag_matches, strong_etag
+from metrics import record_cache_lookup
+
+# Same encoding as ORJSONResponse
+_ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+
+
+class CachedResponse:
+    __slots__ = ("body", "etag", "headers", "tags", "expires_at")
+
+    def __init__(self, body: bytes, headers: Dict[str, str], tags: FrozenSet[str], expires_at: float):
+        self.body = body
+        self.etag = strong_etag(hashlib.blake2b(body, digest_size=16).hexdigest())
+        self.headers = headers
+        self.tags = tags
+        self.expires_at = expires_at
+
+    def respond(self, if_none_match: Optional[str]) -> Response:
+        # Clients may keep the body but must revalidate it before each use
+        headers = {**self.headers, "ETag": self.etag, "Cache-Control": "no-cache"}
+        if etag_matches(if_none_match, self.etag):
+            return Response(status_code=304, headers=headers)
+        return Response(self.body, media_type="application/json", headers=headers)
+
+
+class ResponseCache:
+    """Bounded LRU of encoded JSON responses with a TTL and tag invalidation"""
+
+    def __init__(self, max_entries: int = config.RESPONSE_CACHE_MAX_ENTRIES, ttl: float = config.RESPONSE_CACHE_TTL):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        # Bumped by every invalidation; a response built across one is not stored
+        self.generation = 0
+        self._entries: "OrderedDict[Hashable, CachedResponse]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0 and self.ttl > 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: Hashable) -> Optional[CachedResponse]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry.expires_at <= time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry
+
+    def put(
+        self,
+        key: Hashable,
+        content: Any,
+        headers: Optional[Dict[str, str]] = None,
+        tags: Iterable[str] = (),
+        generation: Optional[int] = None
+    ) -> CachedResponse:
+        entry = CachedResponse(
+            orjson.dumps(content, option=_ORJSON_OPTIONS), headers or {},
+            frozenset(tags), time.monotonic() + self.ttl
+        )
+        with self._lock:
+            if self.enabled and (generation is None or generation == self.generation):
+                self._entries[key] = entry
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+        return entry
+
+    def invalidate(self, *tags: str):
+        """Drop every entry depending on any of ``tags``"""
+        tags = set(tags)
+        with self._lock:
+            self.generation += 1
+            for key in [key for key, entry in self._entries.items() if entry.tags & tags]:
+                del self._entries[key]
+
+    def clear(self):
+        with self._lock:
+            self.generation += 1
+            self._entries.clear()
+
+    async def respond(
+        self,
+        request: Request,
+        cache: str,
+        key: Hashable,
+        tags: Iterable[str],
+        build: Callable[[], Awaitable[Tuple[Any, Dict[str, str]]]]
+    ) -> Response:
+        """Serve ``key`` from the cache, or build, store and serve it.
+
+        ``build`` returns the JSON-serializable content and extra headers.
+        Hits and misses are recorded under ``cache``.
+        """
+        entry = None
+        if self.enabled:
+            entry = self.get(key)
+            record_cache_lookup(cache, entry is not None)
+        if entry is None:
+            generation = self.generation
+            content, headers = await build()
+            entry = self.put(key, content, headers, tags, generation)
+        return entry.respond(request.headers.get("if-none-match"))
+
+
+RESPONSE_CACHE = ResponseCache()
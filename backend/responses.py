@@ -0,0 +1,59 @@
+from typing import Any, AsyncIterator, Dict, Tuple
+
+import orjson
+from fastapi.responses import ORJSONResponse, StreamingResponse
+
+from models import Resume
+
+# Columns needed to build a ResumeResponse; selecting them as plain rows
+# skips ORM identity-map bookkeeping for list endpoints.
+RESUME_COLUMNS = (
+    Resume.id,
+    Resume.user_id,
+    Resume.filename,
+    Resume.sha256,
+    Resume.created_at,
+    Resume.resume_data,
+)
+
+
+def resume_row(row: Any) -> Dict[str, Any]:
+    """ResumeResponse-shaped dict from a RESUME_COLUMNS row, without validation"""
+    return {
+        "id": row.id,
+        "user_id": row.user_id,
+        "filename": row.filename,
+        "sha256": row.sha256,
+        "created_at": row.created_at,
+        "resume_data": row.resume_data,
+        "download_url": f"/resumes/{row.id}/download",
+    }
+
+
+def fast_json(content: Any, headers: Dict[str, str] = None) -> ORJSONResponse:
+    """Encode already-shaped content with orjson, bypassing response_model validation"""
+    return ORJSONResponse(content, headers=headers)
+
+
+EVENT_STREAM_TYPES = {"ndjson": "application/x-ndjson", "sse": "text/event-stream"}
+
+
+def encode_event(event: str, data: Any, fmt: str) -> bytes:
+    """One event as an NDJSON line ``{"event", "data"}`` or a Server-Sent Event"""
+    if fmt == "sse":
+        return b"event: " + event.encode() + b"\ndata: " + orjson.dumps(data) + b"\n\n"
+    return orjson.dumps({"event": event, "data": data}) + b"\n"
+
+
+def event_stream(events: AsyncIterator[Tuple[str, Any]], fmt: str = "ndjson") -> StreamingResponse:
+    """Stream ``(event, data)`` pairs, each flushed as soon as it is produced"""
+    async def generate() -> AsyncIterator[bytes]:
+        async for event, data in events:
+            yield encode_event(event, data, fmt)
+
+    return StreamingResponse(
+        generate(),
+        media_type=EVENT_STREAM_TYPES[fmt],
+        # Proxies must not buffer the stream, or the events arrive all at once
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
@@ -0,0 +1,194 @@
+"""
+Re-tag analyzed resumes with the current skill taxonomy.
+
+Only the skill-tagging stage runs. The text comes from the persisted
+``pdf_text`` stage outputs (the PDF is parsed again only when none is
+stored) and no NER model is involved. Batches are tagged in parallel; only
+resumes whose skills changed are written to the skill index and to their
+stored analyses.
+
+    python -m retag --workers 4 --batch-size 200
+"""
+import argparse
+import logging
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass, field
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import select
+
+import config
+from analysis_store import extract_tags
+from analysis_utils import tag_skills
+from database import SessionLocal, engine
+from models import Base, Resume, ResumeAnalysis, ResumeSkill, Skill
+from pipeline import PDF_TEXT_VERSION, extract_resume_text
+from skills import SKILL_SNAPSHOT, ordered_skills, replace_skills_many
+from stage_cache import load_many
+from taxonomy import TAXONOMY
+
+logger = logging.getLogger(__name__)
+
+ResumeRow = Tuple[str, str, Optional[str]]
+
+
+@dataclass
+class RetagJob:
+    taxonomy_version: str
+    total: int = 0
+    processed: int = 0
+    changed: int = 0
+    failed: int = 0
+    state: str = "running"
+    error: Optional[str] = None
+    id: str = field(default_factory=lambda: uuid.uuid4().hex[:12])
+    started_at: datetime = field(default_factory=datetime.now)
+    finished_at: Optional[datetime] = None
+
+    def as_dict(self) -> dict:
+        data = asdict(self)
+        data["progress"] = round(self.processed / self.total, 4) if self.total else 1.0
+        return data
+
+
+def analyzed_resumes() -> List[ResumeRow]:
+    """(id, file_path, sha256) of every resume with a stored analysis"""
+    analyzed = select(ResumeAnalysis.resume_id)
+    stmt = select(Resume.id, Resume.file_path, Resume.sha256).where(Resume.id.in_(analyzed)).order_by(Resume.id)
+    with SessionLocal() as db:
+        return [tuple(row) for row in db.execute(stmt)]
+
+
+def tag_batch(batch: List[ResumeRow]) -> Tuple[Dict[str, List[str]], int]:
+    """New skills per resume of a batch, and how many could not be tagged"""
+    texts = load_many("pdf_text", PDF_TEXT_VERSION, (sha256 for _, _, sha256 in batch if sha256))
+    tagged, failed = {}, 0
+    for resume_id, file_path, sha256 in batch:
+        try:
+            text = texts.get(sha256) or extract_resume_text(file_path, sha256)
+        except Exception as e:
+            logger.warning(f"Could not read text of {resume_id}: {str(e)}")
+            text = ""
+        if not text:
+            # Keep the existing skills rather than wiping them
+            failed += 1
+            continue
+        tagged[resume_id] = tag_skills(text)
+    return tagged, failed
+
+
+def apply_tags(tagged: Dict[str, List[str]]) -> int:
+    """Write the skills that differ from the index; returns how many resumes changed"""
+    if not tagged:
+        return 0
+    with SessionLocal() as db:
+        current: Dict[str, set] = {}
+        rows = db.execute(
+            select(ResumeSkill.resume_id, Skill.name_lower)
+            .join(Skill, Skill.id == ResumeSkill.skill_id)
+            .where(ResumeSkill.resume_id.in_(list(tagged)))
+        )
+        for resume_id, name_lower in rows:
+            current.setdefault(resume_id, set()).add(name_lower)
+        changed = {
+            resume_id: skills for resume_id, skills in tagged.items()
+            if {skill.lower() for skill in skills} != current.get(resume_id, set())
+        }
+        if not changed:
+            return 0
+
+        replace_skills_many(db, changed)
+        analyses = db.execute(
+            select(ResumeAnalysis).where(ResumeAnalysis.resume_id.in_(list(changed)))
+        ).scalars()
+        now = datetime.now()
+        for analysis in analyses:
+            # Same order as the skills of a freshly analyzed resume
+            skills = ordered_skills(changed[analysis.resume_id])
+            analysis.analysis_data = {**(analysis.analysis_data or {}), "skills": skills}
+            # Tags lead with the first skills, so they change with them
+            analysis.tags = extract_tags(analysis.analysis_data)
+            analysis.updated_at = now
+        db.commit()
+
+    for resume_id, skills in changed.items():
+        SKILL_SNAPSHOT.apply_local(resume_id, skills)
+    return len(changed)
+
+
+def run_retag(
+    job: RetagJob,
+    batch_size: int = config.RETAG_BATCH_SIZE,
+    workers: int = config.RETAG_WORKERS
+) -> RetagJob:
+    """Re-tag the corpus, updating ``job`` as batches complete"""
+    try:
+        resumes = analyzed_resumes()
+        job.total = len(resumes)
+        batches = [resumes[i:i + batch_size] for i in range(0, len(resumes), batch_size)]
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="retag") as executor:
+            # Tagging runs in parallel; index writes stay on this thread
+            for tagged, failed in executor.map(tag_batch, batches):
+                job.changed += apply_tags(tagged)
+                job.processed += len(tagged) + failed
+                job.failed += failed
+                logger.info(
+                    f"Re-tag {job.id}: {job.processed}/{job.total} resumes, {job.changed} changed "
+                    f"({job.processed / (time.perf_counter() - start):.0f}/s)"
+                )
+        job.state = "done"
+    except Exception as e:
+        logger.error(f"Re-tag {job.id} failed: {str(e)}", exc_info=True)
+        job.state = "failed"
+        job.error = str(e)
+    finally:
+        job.finished_at = datetime.now()
+    return job
+
+
+class Retagger:
+    """Runs at most one re-tag job per process in a background thread"""
+
+    def __init__(self):
+        self.job: Optional[RetagJob] = None
+        # Taxonomy the stored tags are assumed to match; the file may also
+        # be picked up by the periodic check before anyone asks for a reload
+        self.tagged_version = TAXONOMY.current.version
+        self._lock = threading.Lock()
+
+    def is_stale(self) -> bool:
+        return TAXONOMY.current.version != self.tagged_version
+
+    def start(self) -> Optional[RetagJob]:
+        """Start a job for the current taxonomy; None if one is already running"""
+        with self._lock:
+            if self.job is not None and self.job.state == "running":
+                return None
+            self.job = RetagJob(taxonomy_version=TAXONOMY.current.version)
+            self.tagged_version = self.job.taxonomy_version
+            threading.Thread(target=run_retag, args=(self.job,), name="retag", daemon=True).start()
+            return self.job
+
+
+RETAGGER = Retagger()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--batch-size", type=int, default=config.RETAG_BATCH_SIZE)
+    parser.add_argument("--workers", type=int, default=config.RETAG_WORKERS)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    Base.metadata.create_all(bind=engine)
+    job = run_retag(RetagJob(taxonomy_version=TAXONOMY.current.version), args.batch_size, args.workers)
+    print(f"Re-tag {job.state}: {job.processed}/{job.total} resumes, {job.changed} changed, {job.failed} failed")
+
+
+if __name__ == "__main__":
+    main()
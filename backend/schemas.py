@@ -34,10 +34,17 @@ class ResumeCreate(ResumeBase):
     minio_object_name: str
     content: bytes  # Only used during upload
 
+class NearDuplicate(BaseModel):
+    id: str
+    filename: str
+    similarity: float
+
 class ResumeResponse(ResumeBase):
     created_at: datetime
+    sha256: Optional[str] = None
     resume_data: Optional[dict] = None
     download_url: Optional[str] = None  
+    near_duplicates: List[NearDuplicate] = []
     
     class Config:
         from_attributes = True
@@ -0,0 +1,103 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable, List, Tuple
+
+import metrics
+
+
+class EventFeed:
+    """Progress events of one coalesced execution, for every caller that joins it.
+
+    ``emit`` may be called from any thread. A queue subscribing late first
+    receives the events sent so far, in order.
+    """
+
+    def __init__(self):
+        self.loop = asyncio.get_running_loop()
+        self.events: List[Any] = []
+        self._queues: List[asyncio.Queue] = []
+
+    def emit(self, event: Any):
+        self.loop.call_soon_threadsafe(self._publish, event)
+
+    def _publish(self, event: Any):
+        self.events.append(event)
+        for queue in self._queues:
+            queue.put_nowait(event)
+
+    def subscribe(self, queue: asyncio.Queue):
+        for event in self.events:
+            queue.put_nowait(event)
+        self._queues.append(queue)
+
+    def unsubscribe(self, queue: asyncio.Queue):
+        if queue in self._queues:
+            self._queues.remove(queue)
+
+
+class SingleFlight:
+    """Coalesce concurrent calls with the same key into one execution.
+
+    The first caller for a key starts ``func`` as its own task; callers that
+    arrive while it is running await the same task. Each caller waits through
+    ``asyncio.shield``, so a caller that goes away (client disconnect) does
+    not cancel the work the others are waiting for. Once every caller has
+    left, the task is cancelled if ``cancellable()`` says it may still be
+    stopped (e.g. it is queued); otherwise it runs to completion and later
+    callers join it. Results are not cached: a call that arrives after
+    completion starts a new execution.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self._tasks: Dict[Hashable, asyncio.Task] = {}
+        self._waiters: Dict[Hashable, int] = {}
+        self._cancellable: Dict[Hashable, Callable[[], bool]] = {}
+
+    def in_flight(self) -> int:
+        return len(self._tasks)
+
+    def _forget(self, key: Hashable, task: asyncio.Task):
+        if self._tasks.get(key) is task:
+            del self._tasks[key]
+            self._waiters.pop(key, None)
+            self._cancellable.pop(key, None)
+
+    @staticmethod
+    def _consume(task: asyncio.Task):
+        # Abandoned tasks may still fail; mark the exception as retrieved
+        if not task.cancelled():
+            task.exception()
+
+    async def do(
+        self,
+        key: Hashable,
+        func: Callable[[], Awaitable[Any]],
+        cancellable: Callable[[], bool] = lambda: True
+    ) -> Tuple[Any, bool]:
+        """Result of ``func`` and whether it was shared with an earlier caller.
+
+        ``cancellable`` is asked about the execution ``func`` started, once
+        its last caller leaves; work that cannot really be stopped (e.g.
+        running in a thread) should report False.
+        """
+        task = self._tasks.get(key)
+        shared = task is not None
+        if not shared:
+            task = asyncio.ensure_future(func())
+            self._tasks[key] = task
+            self._cancellable[key] = cancellable
+            task.add_done_callback(lambda done: self._forget(key, done))
+            task.add_done_callback(self._consume)
+        metrics.record_cache_lookup(self.name, shared)
+
+        self._waiters[key] = self._waiters.get(key, 0) + 1
+        try:
+            return await asyncio.shield(task), shared
+        finally:
+            if self._tasks.get(key) is task:
+                self._waiters[key] -= 1
+                if not self._waiters[key] and not task.done() and self._cancellable[key]():
+                    # Nobody is waiting any more: stop queued work early, and
+                    # let the next caller start afresh rather than join it
+                    self._forget(key, task)
+                    task.cancel()
@@ -0,0 +1,270 @@
+"""
+Skill trends and co-occurrence, maintained incrementally.
+
+Whenever the indexed skills of a resume change (analysis, re-tagging,
+deletion), the difference between its old and new skill sets is applied
+in the same transaction to three small tables:
+
+- ``skill_period_counts``: resumes per skill and month of resume creation
+- ``skill_period_totals``: resumes with any skill per month
+- ``skill_pairs``: the upper triangle of the skill x skill co-occurrence
+  matrix; the diagonal holds each skill's resume count
+
+So the aggregates always equal what a full scan of ``resume_skills`` would
+give, and the trend and related-skill endpoints read only these tables.
+If they ever drift (e.g. after restoring ``resume_skills`` by hand):
+
+    python -m skill_stats --rebuild
+"""
+import argparse
+import logging
+from collections import Counter
+from datetime import date, datetime
+from itertools import combinations
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from sqlalchemy import delete, func, or_, select
+from sqlalchemy.orm import Session
+
+from database import insert_for
+from models import Resume, ResumeSkill, Skill, SkillPair, SkillPeriodCount, SkillPeriodTotal
+
+logger = logging.getLogger(__name__)
+
+PERIODS = ("month", "quarter", "year")
+# Bucket of resumes without a creation date: counted in totals, not in trends
+UNDATED = date.min
+
+SkillSets = Dict[str, Tuple[Set[int], Set[int]]]
+
+
+def period_of(created_at: Optional[datetime]) -> date:
+    return date(created_at.year, created_at.month, 1) if created_at else UNDATED
+
+
+def _period_label(month: date, period: str) -> str:
+    if period == "year":
+        return str(month.year)
+    if period == "quarter":
+        return f"{month.year}-Q{(month.month - 1) // 3 + 1}"
+    return f"{month.year}-{month.month:02d}"
+
+
+def _pairs(skill_ids: Iterable[int]) -> List[Tuple[int, int]]:
+    ordered = sorted(skill_ids)
+    return [(a, a) for a in ordered] + list(combinations(ordered, 2))
+
+
+def _increment(db: Session, table, keys: List[str], deltas: Counter):
+    """Add ``deltas`` (keyed by primary key tuples) to ``resumes``; drop rows that reach zero"""
+    deltas = {key: delta for key, delta in deltas.items() if delta}
+    if not deltas:
+        return
+    rows = [{**dict(zip(keys, key)), "resumes": delta} for key, delta in deltas.items()]
+    for i in range(0, len(rows), 500):
+        stmt = insert_for(db, table).values(rows[i:i + 500])
+        db.execute(stmt.on_conflict_do_update(
+            index_elements=keys,
+            set_={"resumes": table.c.resumes + stmt.excluded.resumes}
+        ))
+    if any(delta < 0 for delta in deltas.values()):
+        # Keep the matrix sparse
+        db.execute(delete(table).where(table.c.resumes <= 0))
+
+
+def current_skill_ids(db: Session, resume_ids: List[str]) -> Dict[str, Set[int]]:
+    found: Dict[str, Set[int]] = {resume_id: set() for resume_id in resume_ids}
+    rows = db.execute(
+        select(ResumeSkill.resume_id, ResumeSkill.skill_id).where(ResumeSkill.resume_id.in_(resume_ids))
+    )
+    for resume_id, skill_id in rows:
+        found[resume_id].add(skill_id)
+    return found
+
+
+def apply_skill_changes(db: Session, changes: SkillSets):
+    """Apply ``{resume_id: (old skill ids, new skill ids)}`` to the aggregates.
+
+    Runs in the caller's transaction, which also rewrites resume_skills.
+    """
+    changes = {resume_id: (old, new) for resume_id, (old, new) in changes.items() if old != new}
+    if not changes:
+        return
+    created = dict(db.execute(
+        select(Resume.id, Resume.created_at).where(Resume.id.in_(list(changes)))
+    ).all())
+
+    period_counts, period_totals, pairs = Counter(), Counter(), Counter()
+    for resume_id, (old, new) in changes.items():
+        period = period_of(created.get(resume_id))
+        for skill_id in new - old:
+            period_counts[(period, skill_id)] += 1
+        for skill_id in old - new:
+            period_counts[(period, skill_id)] -= 1
+        period_totals[(period,)] += bool(new) - bool(old)
+        pairs.update(_pairs(new))
+        pairs.subtract(_pairs(old))
+
+    _increment(db, SkillPeriodCount.__table__, ["period", "skill_id"], period_counts)
+    _increment(db, SkillPeriodTotal.__table__, ["period"], period_totals)
+    _increment(db, SkillPair.__table__, ["skill_a", "skill_b"], pairs)
+
+
+def rebuild_skill_stats(db: Session, batch_size: int = 5000):
+    """Recompute every aggregate from resume_skills (one full scan); the caller commits"""
+    for table in (SkillPeriodCount, SkillPeriodTotal, SkillPair):
+        db.execute(delete(table))
+
+    rows = db.execute(
+        select(ResumeSkill.resume_id, Resume.created_at, ResumeSkill.skill_id)
+        .join(Resume, Resume.id == ResumeSkill.resume_id)
+        .order_by(ResumeSkill.resume_id)
+        .execution_options(yield_per=batch_size)
+    )
+    period_counts, period_totals, pairs = Counter(), Counter(), Counter()
+
+    def add(created_at: Optional[datetime], skill_ids: Set[int]):
+        period = period_of(created_at)
+        period_counts.update((period, skill_id) for skill_id in skill_ids)
+        period_totals[(period,)] += 1
+        pairs.update(_pairs(skill_ids))
+
+    current, created_at, skill_ids = None, None, set()
+    for resume_id, created, skill_id in rows:
+        if resume_id != current:
+            if skill_ids:
+                add(created_at, skill_ids)
+            current, created_at, skill_ids = resume_id, created, set()
+        skill_ids.add(skill_id)
+    if skill_ids:
+        add(created_at, skill_ids)
+
+    _increment(db, SkillPeriodCount.__table__, ["period", "skill_id"], period_counts)
+    _increment(db, SkillPeriodTotal.__table__, ["period"], period_totals)
+    _increment(db, SkillPair.__table__, ["skill_a", "skill_b"], pairs)
+
+
+def _skill_ids(db: Session, names: Iterable[str]) -> Dict[int, str]:
+    lowered = {name.lower() for name in names}
+    if not lowered:
+        return {}
+    return dict(db.execute(select(Skill.id, Skill.name).where(Skill.name_lower.in_(lowered))).all())
+
+
+def skill_trends(
+    db: Session,
+    skills: List[str],
+    period: str = "month",
+    since: Optional[date] = None,
+    until: Optional[date] = None,
+    limit: int = 10
+) -> List[dict]:
+    """Resume counts per period for ``skills``, or for each period's top ``limit`` skills"""
+    counts = select(SkillPeriodCount.period, Skill.name, SkillPeriodCount.resumes).join(
+        Skill, Skill.id == SkillPeriodCount.skill_id
+    ).where(SkillPeriodCount.period != UNDATED)
+    totals = select(SkillPeriodTotal.period, SkillPeriodTotal.resumes).where(SkillPeriodTotal.period != UNDATED)
+    if skills:
+        counts = counts.where(SkillPeriodCount.skill_id.in_(list(_skill_ids(db, skills))))
+    if since is not None:
+        counts = counts.where(SkillPeriodCount.period >= since)
+        totals = totals.where(SkillPeriodTotal.period >= since)
+    if until is not None:
+        counts = counts.where(SkillPeriodCount.period <= until)
+        totals = totals.where(SkillPeriodTotal.period <= until)
+
+    buckets: Dict[str, Counter] = {}
+    resumes: Counter = Counter()
+    for month, total in db.execute(totals):
+        label = _period_label(month, period)
+        resumes[label] += total
+        buckets.setdefault(label, Counter())
+    for month, name, count in db.execute(counts):
+        buckets.setdefault(_period_label(month, period), Counter())[name] += count
+
+    series = []
+    for label in sorted(buckets):
+        ranked = buckets[label].most_common(None if skills else limit)
+        series.append({
+            "period": label,
+            "resumes": resumes[label],
+            "skills": [
+                {
+                    "skill": name,
+                    "count": count,
+                    "share": round(count / resumes[label], 4) if resumes[label] else 0.0,
+                }
+                for name, count in ranked
+            ],
+        })
+    return series
+
+
+def related_skills(
+    db: Session,
+    skill: str,
+    limit: int = 10,
+    sort: str = "count",
+    min_count: int = 1
+) -> Optional[dict]:
+    """Skills that co-occur with ``skill``, with confidence and lift; None if unknown"""
+    ids = _skill_ids(db, [skill])
+    if not ids:
+        return None
+    skill_id, name = next(iter(ids.items()))
+
+    pair = SkillPair
+    rows = db.execute(
+        select(pair.skill_a, pair.skill_b, pair.resumes).where(
+            or_(pair.skill_a == skill_id, pair.skill_b == skill_id),
+            or_(pair.resumes >= min_count, pair.skill_a == pair.skill_b)
+        )
+    ).all()
+    resumes = 0
+    together: Dict[int, int] = {}
+    for a, b, count in rows:
+        if a == b:
+            resumes = count
+        else:
+            together[b if a == skill_id else a] = count
+    total = db.execute(select(func.coalesce(func.sum(SkillPeriodTotal.resumes), 0))).scalar()
+    marginals = dict(db.execute(
+        select(pair.skill_a, pair.resumes).where(pair.skill_a == pair.skill_b, pair.skill_a.in_(list(together)))
+    ).all()) if together else {}
+    names = dict(db.execute(select(Skill.id, Skill.name).where(Skill.id.in_(list(together)))).all()) if together else {}
+
+    related = []
+    for other, count in together.items():
+        other_resumes = marginals.get(other, 0)
+        related.append({
+            "skill": names.get(other, str(other)),
+            "count": count,
+            # P(other | skill)
+            "confidence": round(count / resumes, 4) if resumes else 0.0,
+            # P(both) / (P(skill) * P(other)); > 1 means they appear together more than by chance
+            "lift": round(count * total / (resumes * other_resumes), 4) if resumes and other_resumes else 0.0,
+        })
+    related.sort(key=lambda item: (-item[sort], -item["count"], item["skill"]))
+    return {"skill": name, "resumes": resumes, "total_resumes": total, "related": related[:limit]}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rebuild", action="store_true", help="Recompute the aggregates from resume_skills")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+    if not args.rebuild:
+        parser.print_help()
+        return
+
+    from database import SessionLocal
+
+    with SessionLocal() as db:
+        rebuild_skill_stats(db)
+        db.commit()
+        pairs = db.execute(select(func.count()).select_from(SkillPair)).scalar()
+    print(f"Rebuilt skill aggregates: {pairs} co-occurrence entries")
+
+
+if __name__ == "__main__":
+    main()
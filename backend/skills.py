@@ -0,0 +1,354 @@
+import re
+import logging
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timedelta
+from typing import Callable, Dict, FrozenSet, Iterable, List, Optional, Set
+from sqlalchemy import delete, func, select
+from sqlalchemy.orm import Session
+import config
+from database import SessionLocal, insert_for
+from models import ResumeSkill, Skill, SkillChange
+from skill_stats import apply_skill_changes, current_skill_ids
+from taxonomy import TAXONOMY
+
+logger = logging.getLogger(__name__)
+
+def clean_skills(skills: List[str]) -> List[str]:
+    """
+    Strictly filter only technical skills
+    """
+    cleaned = []
+    seen = set()
+    vocabulary = TAXONOMY.current
+    
+    for skill in skills:
+        skill = re.sub(r'[^a-zA-Z0-9+#\.\s]', '', skill).strip().lower()
+        
+        if skill in vocabulary.skills:
+            proper_case = skill.title() if len(skill) > 3 else skill.upper()
+            if proper_case not in seen:
+                seen.add(proper_case)
+                cleaned.append(proper_case)
+        else:
+            variation = vocabulary.aliases.get(skill)
+            if variation and variation not in seen:
+                seen.add(variation)
+                cleaned.append(variation)
+    
+    return sorted(cleaned)
+
+def normalize_skills(skills: List[str]) -> List[str]:
+    """
+    Normalize skills with comprehensive mapping and tracking
+    """
+    skill_mappings = TAXONOMY.current.aliases
+    
+    normalized = set()
+    for skill in skills:
+        skill = re.sub(r'[^a-zA-Z0-9+#\.\s]', '', skill).strip().lower()
+        if not skill or len(skill) < 2:
+            continue
+        
+        skill = skill_mappings.get(skill, skill)
+        
+        if skill.upper() == skill and len(skill) > 2:
+            skill = skill.title()
+        elif '.' in skill:  
+            parts = skill.split('.')
+            skill = f"{parts[0].title()}.{parts[1]}" if len(parts) > 1 else skill
+        
+        normalized.add(skill)
+    
+    return sorted(normalized, key=lambda x: x.lower())
+
+def filter_technical_skills(skills: List[str]) -> List[str]:
+    """Normalize skills and keep only those in the skill taxonomy"""
+    known = TAXONOMY.current.skills
+    return [skill for skill in normalize_skills(skills) if skill.lower() in known]
+
+def track_skills(
+    resume_id: str,
+    skills: List[str],
+    db: Optional[Session] = None,
+    source_section: str = "skills"
+):
+    """
+    Index the technical skills of a resume in resume_skills
+    """
+    final_normalized = filter_technical_skills(skills)
+    
+    if db is not None:
+        replace_resume_skills(db, resume_id, final_normalized, source_section)
+    else:
+        with SessionLocal() as session:
+            replace_resume_skills(session, resume_id, final_normalized, source_section)
+
+    # Read-your-writes for this worker; others pick it up from the change log
+    SKILL_SNAPSHOT.apply_local(resume_id, final_normalized)
+    return final_normalized
+    
+def ordered_skills(skills: Iterable[str]) -> List[str]:
+    """The order skills appear in analyses; every writer of analysis_data["skills"] uses it"""
+    return sorted(skills)
+
+def get_filtered_skills(resume_id: str) -> List[str]:
+    """
+    Indexed skills of a resume, from this worker's snapshot
+    """
+    SKILL_SNAPSHOT.refresh_if_stale()
+    return SKILL_SNAPSHOT.skills_for(resume_id)
+
+
+def get_or_create_skill_ids(db: Session, names: Iterable[str]) -> Dict[str, int]:
+    """Map skill names to rows of the skills dictionary, inserting new ones"""
+    by_lower = {name.lower(): name for name in names}
+    if not by_lower:
+        return {}
+
+    stmt = insert_for(db, Skill).values([
+        {"name": name, "name_lower": lower} for lower, name in by_lower.items()
+    ]).on_conflict_do_nothing(index_elements=["name_lower"])
+    db.execute(stmt)
+
+    rows = db.execute(
+        select(Skill.name_lower, Skill.id).where(Skill.name_lower.in_(by_lower))
+    ).all()
+    return {by_lower[lower]: skill_id for lower, skill_id in rows}
+
+
+def replace_resume_skills(
+    db: Session,
+    resume_id: str,
+    skills: List[str],
+    source_section: str = "skills",
+    weight: float = 1.0
+):
+    """Replace the indexed skills of a resume in a single transaction"""
+    try:
+        skill_ids = get_or_create_skill_ids(db, skills)
+        previous = current_skill_ids(db, [resume_id])[resume_id]
+        db.execute(delete(ResumeSkill).where(ResumeSkill.resume_id == resume_id))
+        db.add_all(
+            ResumeSkill(
+                resume_id=resume_id,
+                skill_id=skill_id,
+                weight=weight,
+                source_section=source_section
+            )
+            for skill_id in skill_ids.values()
+        )
+        apply_skill_changes(db, {resume_id: (previous, set(skill_ids.values()))})
+        record_skill_change(db, resume_id)
+        db.commit()
+    except Exception as e:
+        db.rollback()
+        logger.error(f"Failed to index skills for {resume_id}: {str(e)}", exc_info=True)
+        raise
+
+
+def replace_skills_many(
+    db: Session,
+    skills_by_resume: Dict[str, List[str]],
+    source_section: str = "skills",
+    weight: float = 1.0
+):
+    """Replace the indexed skills of several resumes in a single transaction"""
+    if not skills_by_resume:
+        return
+    try:
+        names = {skill for skills in skills_by_resume.values() for skill in skills}
+        ids_by_lower = {name.lower(): skill_id for name, skill_id in get_or_create_skill_ids(db, names).items()}
+        previous = current_skill_ids(db, list(skills_by_resume))
+        db.execute(delete(ResumeSkill).where(ResumeSkill.resume_id.in_(list(skills_by_resume))))
+        changes = {}
+        for resume_id, skills in skills_by_resume.items():
+            skill_ids = {ids_by_lower[skill.lower()] for skill in skills}
+            db.add_all(
+                ResumeSkill(
+                    resume_id=resume_id,
+                    skill_id=skill_id,
+                    weight=weight,
+                    source_section=source_section
+                )
+                for skill_id in skill_ids
+            )
+            changes[resume_id] = (previous[resume_id], skill_ids)
+            record_skill_change(db, resume_id)
+        apply_skill_changes(db, changes)
+        db.commit()
+    except Exception as e:
+        db.rollback()
+        logger.error(f"Failed to index skills for {len(skills_by_resume)} resumes: {str(e)}", exc_info=True)
+        raise
+
+
+def record_skill_change(db: Session, resume_id: str):
+    """Log that the skills of a resume changed, in the caller's transaction"""
+    db.add(SkillChange(resume_id=resume_id))
+
+
+def forget_resume_skills(db: Session, resume_id: str):
+    """Log the removal of a resume about to be deleted; its resume_skills rows cascade.
+
+    Call it before deleting the resume, so its skills still count in the
+    aggregates being decremented. The caller commits, then calls
+    ``SKILL_SNAPSHOT.apply_local(resume_id, None)``.
+    """
+    apply_skill_changes(db, {resume_id: (current_skill_ids(db, [resume_id])[resume_id], set())})
+    record_skill_change(db, resume_id)
+
+
+def prune_skill_changes(db: Session, retention_hours: float = config.SKILL_CHANGELOG_RETENTION_HOURS) -> int:
+    """Drop change log entries older than the retention window.
+
+    Snapshots that fall further behind than that reload from scratch.
+    """
+    cutoff = datetime.now() - timedelta(hours=retention_hours)
+    result = db.execute(delete(SkillChange).where(SkillChange.changed_at < cutoff))
+    db.commit()
+    return result.rowcount
+
+
+class SkillSnapshot:
+    """Read-optimized, per-process view of resume_skills.
+
+    The database is the shared source of truth. Each worker keeps a local
+    copy and replays ``skill_changes`` at most every ``max_age`` seconds,
+    re-reading only the resumes that changed. Change log ids are re-checked
+    ``lookback`` ids back, because with concurrent writers (Postgres) ids
+    can become visible out of order. Re-reading a resume is idempotent, so
+    applying a change twice is harmless.
+    """
+
+    def __init__(
+        self,
+        session_factory: Callable[[], Session] = SessionLocal,
+        max_age: float = config.SKILL_SNAPSHOT_MAX_AGE,
+        lookback: int = config.SKILL_CHANGELOG_LOOKBACK,
+        batch_size: int = 500
+    ):
+        self.session_factory = session_factory
+        self.max_age = max_age
+        self.lookback = lookback
+        self.batch_size = batch_size
+        self.version = 0
+        # Bumped whenever the skill sets change, locally or by replay
+        self.generation = 0
+        self.loaded = False
+        self._by_resume: Dict[str, FrozenSet[str]] = {}
+        self._counts: Counter = Counter()
+        self._seen: Set[int] = set()
+        self._refreshed_at = 0.0
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+
+    def _set(self, resume_id: str, skills: Optional[Iterable[str]]):
+        new = frozenset(skills or ())
+        old = self._by_resume.pop(resume_id, frozenset())
+        if new != old:
+            self.generation += 1
+        if new:
+            self._by_resume[resume_id] = new
+        self._counts.subtract(old)
+        self._counts.update(new)
+        for skill in old - new:
+            if self._counts[skill] <= 0:
+                del self._counts[skill]
+
+    def _read_skills(self, db: Session, resume_ids: Optional[List[str]] = None) -> Dict[str, Set[str]]:
+        stmt = select(ResumeSkill.resume_id, Skill.name).join(Skill, Skill.id == ResumeSkill.skill_id)
+        batches = [None] if resume_ids is None else [
+            resume_ids[i:i + self.batch_size] for i in range(0, len(resume_ids), self.batch_size)
+        ]
+        found: Dict[str, Set[str]] = {}
+        for batch in batches:
+            query = stmt if batch is None else stmt.where(ResumeSkill.resume_id.in_(batch))
+            for resume_id, name in db.execute(query):
+                found.setdefault(resume_id, set()).add(name)
+        return found
+
+    def _reload(self, db: Session):
+        # Take the version first: changes committed while loading are replayed again
+        version = db.execute(select(func.max(SkillChange.id))).scalar() or 0
+        found = self._read_skills(db)
+        with self._lock:
+            self._by_resume = {}
+            self._counts = Counter()
+            self.generation += 1
+            for resume_id, skills in found.items():
+                self._set(resume_id, skills)
+            self.version = version
+            self._seen = set()
+            self.loaded = True
+        logger.info(f"Loaded skill snapshot: {len(found)} resumes at change {version}")
+
+    def _catch_up(self, db: Session):
+        oldest = db.execute(select(func.min(SkillChange.id))).scalar()
+        if oldest is not None and oldest > self.version + 1 and self.version > 0:
+            # Entries we never saw were pruned from the log
+            self._reload(db)
+            return
+
+        rows = db.execute(
+            select(SkillChange.id, SkillChange.resume_id)
+            .where(SkillChange.id > self.version - self.lookback)
+            .order_by(SkillChange.id)
+        ).all()
+        new = [(change_id, resume_id) for change_id, resume_id in rows if change_id not in self._seen]
+        if not new:
+            return
+
+        changed = sorted({resume_id for _, resume_id in new})
+        found = self._read_skills(db, changed)
+        with self._lock:
+            for resume_id in changed:
+                self._set(resume_id, found.get(resume_id))
+            self._seen.update(change_id for change_id, _ in new)
+            self.version = max(self.version, new[-1][0])
+            floor = self.version - self.lookback
+            self._seen = {change_id for change_id in self._seen if change_id > floor}
+
+    def refresh(self, db: Optional[Session] = None):
+        """Bring the snapshot up to date with the shared store"""
+        with self._refresh_lock:
+            session = db or self.session_factory()
+            try:
+                if self.loaded:
+                    self._catch_up(session)
+                else:
+                    self._reload(session)
+            finally:
+                if db is None:
+                    session.close()
+            self._refreshed_at = time.monotonic()
+
+    def refresh_if_stale(self):
+        if time.monotonic() - self._refreshed_at >= self.max_age:
+            try:
+                self.refresh()
+            except Exception as e:
+                # Serve the last good snapshot rather than failing the request
+                logger.warning(f"Skill snapshot refresh failed: {str(e)}")
+
+    def apply_local(self, resume_id: str, skills: Optional[Iterable[str]]):
+        """Reflect a write made by this process before the change log is replayed"""
+        if not self.loaded:
+            return
+        with self._lock:
+            self._set(resume_id, skills)
+
+    def skills_for(self, resume_id: str) -> List[str]:
+        return ordered_skills(self._by_resume.get(resume_id, ()))
+
+    def all_skills(self) -> List[str]:
+        with self._lock:
+            return sorted(self._counts)
+
+    def skill_counts(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self._counts)
+
+
+SKILL_SNAPSHOT = SkillSnapshot()
@@ -0,0 +1,118 @@
+import functools
+import hashlib
+import logging
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, Iterable, Iterator
+
+from sqlalchemy import delete, select
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+
+import config
+import metrics
+from database import SessionLocal, insert_for
+from models import StageOutput
+
+logger = logging.getLogger(__name__)
+
+_bypassed: ContextVar[bool] = ContextVar("stage_cache_bypassed", default=False)
+
+
+@contextmanager
+def bypass() -> Iterator[None]:
+    """Compute every stage run in this context afresh, e.g. to profile the real work.
+
+    Threads started with a copy of the context (``run_in_threadpool``, the
+    stage graph) inherit it.
+    """
+    token = _bypassed.set(True)
+    try:
+        yield
+    finally:
+        _bypassed.reset(token)
+
+
+def text_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def _load(stage: str, version: str, input_hash: str):
+    with SessionLocal() as db:
+        row = db.get(StageOutput, (stage, version, input_hash))
+        return None if row is None else row.output
+
+
+def _save(stage: str, version: str, input_hash: str, output: Any):
+    with SessionLocal() as db:
+        stmt = insert_for(db, StageOutput.__table__).values(
+            stage=stage, version=version, input_hash=input_hash, output=output
+        )
+        db.execute(stmt.on_conflict_do_nothing(index_elements=["stage", "version", "input_hash"]))
+        db.commit()
+
+
+def memoize(stage: str, version: str, input_hash: str, compute: Callable[[], Any]) -> Any:
+    """Output of ``compute`` for this stage version and input, persisted across runs.
+
+    Empty outputs are not stored: they are cheap to recompute and are what
+    a failed PDF read returns. The cache is best effort, so database errors
+    fall back to computing the stage.
+    """
+    if not config.STAGE_CACHE_ENABLED or _bypassed.get():
+        return compute()
+
+    try:
+        output = _load(stage, version, input_hash)
+    except SQLAlchemyError as e:
+        logger.warning(f"Stage cache read failed for {stage}: {str(e)}")
+        output = None
+    metrics.record_cache_lookup(f"stage.{stage}", output is not None)
+    if output is not None:
+        return output
+
+    output = compute()
+    if output:
+        try:
+            _save(stage, version, input_hash, output)
+        except SQLAlchemyError as e:
+            logger.warning(f"Stage cache write failed for {stage}: {str(e)}")
+    return output
+
+
+def load_many(stage: str, version: str, input_hashes: Iterable[str]) -> Dict[str, Any]:
+    """Persisted outputs for several inputs in one query; missing ones are left out"""
+    hashes = list(set(input_hashes))
+    if not hashes or not config.STAGE_CACHE_ENABLED or _bypassed.get():
+        return {}
+    with SessionLocal() as db:
+        rows = db.execute(
+            select(StageOutput.input_hash, StageOutput.output).where(
+                StageOutput.stage == stage,
+                StageOutput.version == version,
+                StageOutput.input_hash.in_(hashes)
+            )
+        )
+        return dict(rows.all())
+
+
+def memoized(stage: str, version: str):
+    """Decorate a stage that takes the resume text, keying it by the text's hash"""
+    def decorate(func: Callable[[str], Any]) -> Callable[[str], Any]:
+        @functools.wraps(func)
+        def wrapper(text: str) -> Any:
+            return memoize(stage, version, text_hash(text), lambda: func(text))
+        return wrapper
+    return decorate
+
+
+def prune_stage_outputs(db: Session, versions: Dict[str, str]) -> int:
+    """Delete outputs of stage versions that are no longer current"""
+    deleted = 0
+    for stage, version in versions.items():
+        result = db.execute(
+            delete(StageOutput).where(StageOutput.stage == stage, StageOutput.version != version)
+        )
+        deleted += result.rowcount
+    db.commit()
+    return deleted
@@ -0,0 +1,192 @@
+import logging
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from contextvars import copy_context
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+STAGE_WORKERS = int(os.getenv("ANALYSIS_STAGE_WORKERS", "4"))
+
+_executor: Optional[ThreadPoolExecutor] = None
+
+
+def get_stage_executor() -> ThreadPoolExecutor:
+    """Shared thread pool used to run independent analysis stages"""
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=STAGE_WORKERS,
+            thread_name_prefix="analysis-stage"
+        )
+    return _executor
+
+
+@dataclass(frozen=True)
+class Stage:
+    """A single step of the analysis graph.
+
+    ``func`` is called with the outputs of ``deps`` as positional arguments,
+    in the order the dependencies are listed.
+    """
+    name: str
+    func: Callable[..., Any]
+    deps: Tuple[str, ...] = ()
+
+
+@dataclass
+class StageTiming:
+    start: float
+    end: float
+
+    @property
+    def duration(self) -> float:
+        return self.end - self.start
+
+
+class StageRun:
+    """Outputs, failures and timings of one execution of a StageGraph"""
+
+    def __init__(self, graph: "StageGraph"):
+        self.graph = graph
+        self.results: Dict[str, Any] = {}
+        self.errors: Dict[str, BaseException] = {}
+        self.timings: Dict[str, StageTiming] = {}
+        self.started_at = time.perf_counter()
+        self.finished_at = self.started_at
+
+    @property
+    def wall_time(self) -> float:
+        return self.finished_at - self.started_at
+
+    def durations(self) -> Dict[str, float]:
+        """Seconds spent inside each stage that ran"""
+        return {name: timing.duration for name, timing in self.timings.items()}
+
+    def critical_path(self) -> List[str]:
+        """Chain of stages that determined the overall latency"""
+        finish: Dict[str, float] = {}
+        parent: Dict[str, Optional[str]] = {}
+        for name in self.graph.order:
+            if name not in self.timings:
+                continue
+            stage = self.graph.stages[name]
+            ran_deps = [dep for dep in stage.deps if dep in finish]
+            slowest = max(ran_deps, key=lambda dep: finish[dep], default=None)
+            parent[name] = slowest
+            finish[name] = (finish[slowest] if slowest else 0.0) + self.timings[name].duration
+
+        if not finish:
+            return []
+
+        path = []
+        node: Optional[str] = max(finish, key=finish.get)
+        while node is not None:
+            path.append(node)
+            node = parent[node]
+        return list(reversed(path))
+
+
+class StageGraph:
+    """Small DAG of analysis stages executed on a thread pool.
+
+    Stages whose dependencies are satisfied are submitted together, so
+    independent stages overlap and the latency of a run approaches the
+    slowest path through the graph rather than the sum of all stages.
+    """
+
+    def __init__(self, stages: List[Stage]):
+        self.stages: Dict[str, Stage] = {}
+        for stage in stages:
+            if stage.name in self.stages:
+                raise ValueError(f"Duplicate stage: {stage.name}")
+            self.stages[stage.name] = stage
+        self.order = self._topological_order()
+
+    def _topological_order(self) -> List[str]:
+        order: List[str] = []
+        state: Dict[str, int] = {}
+
+        def visit(name: str):
+            if state.get(name) == 2:
+                return
+            if state.get(name) == 1:
+                raise ValueError(f"Cycle in stage graph at: {name}")
+            state[name] = 1
+            for dep in self.stages[name].deps:
+                if dep in self.stages:
+                    visit(dep)
+            state[name] = 2
+            order.append(name)
+
+        for name in self.stages:
+            visit(name)
+        return order
+
+    def run(
+        self,
+        executor: Optional[ThreadPoolExecutor] = None,
+        on_result: Optional[Callable[[str, Any], None]] = None,
+        **inputs
+    ) -> StageRun:
+        """Execute the graph; ``inputs`` provide values for external dependencies.
+
+        A failing stage is recorded in ``StageRun.errors`` and every stage that
+        depends on it is skipped; the remaining stages still run.
+        ``on_result(name, output)`` is called on the calling thread as each
+        stage succeeds, while the others may still be running.
+        """
+        executor = executor or get_stage_executor()
+        run = StageRun(self)
+        run.results.update(inputs)
+
+        for stage in self.stages.values():
+            missing = [dep for dep in stage.deps if dep not in self.stages and dep not in inputs]
+            if missing:
+                raise ValueError(f"Stage {stage.name} has unknown inputs: {missing}")
+
+        pending = dict(self.stages)
+        running = {}
+
+        def timed(stage: Stage, args: tuple):
+            start = time.perf_counter()
+            try:
+                return stage.func(*args)
+            finally:
+                run.timings[stage.name] = StageTiming(start, time.perf_counter())
+
+        while pending or running:
+            progressed = True
+            while progressed:
+                progressed = False
+                for name, stage in list(pending.items()):
+                    if any(dep in run.errors for dep in stage.deps):
+                        run.errors[name] = RuntimeError("Skipped: upstream stage failed")
+                    elif all(dep in run.results for dep in stage.deps):
+                        args = tuple(run.results[dep] for dep in stage.deps)
+                        # Each stage sees the caller's context variables
+                        running[executor.submit(copy_context().run, timed, stage, args)] = name
+                    else:
+                        continue
+                    del pending[name]
+                    progressed = True
+
+            if not running:
+                break
+
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                name = running.pop(future)
+                try:
+                    run.results[name] = future.result()
+                except Exception as e:
+                    logger.error(f"Analysis stage '{name}' failed: {str(e)}", exc_info=True)
+                    run.errors[name] = e
+                    continue
+                if on_result is not None:
+                    on_result(name, run.results[name])
+
+        run.finished_at = time.perf_counter()
+        return run
@@ -0,0 +1,525 @@
+import atexit
+import hashlib
+import io
+import logging
+import os
+import shutil
+import tempfile
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Callable, Dict, Iterator, Optional, Tuple
+
+from fastapi import HTTPException, UploadFile
+from fastapi.concurrency import run_in_threadpool
+
+import config
+from metrics import record_cache_lookup
+
+logger = logging.getLogger(__name__)
+
+PDF_MAGIC = b"%PDF-"
+
+
+@dataclass
+class SpooledUpload:
+    """An upload written to a local temporary file"""
+    temp_path: str
+    size: int
+    sha256: str
+
+    def commit(self, final_path: str):
+        """Atomically move the upload into place"""
+        os.replace(self.temp_path, final_path)
+
+    def discard(self):
+        try:
+            os.remove(self.temp_path)
+        except FileNotFoundError:
+            pass
+
+
+async def spool_upload(
+    file: UploadFile,
+    dest_dir: str = config.UPLOAD_DIR,
+    max_bytes: int = config.MAX_UPLOAD_BYTES,
+    chunk_size: int = config.UPLOAD_CHUNK_SIZE
+) -> SpooledUpload:
+    """Copy an upload to a temp file in fixed-size chunks, hashing as it goes.
+
+    The PDF signature is checked on the first chunk and the copy is aborted
+    as soon as ``max_bytes`` is exceeded, so at most one chunk of the upload
+    is held in memory at a time.
+    """
+    fd, temp_path = tempfile.mkstemp(dir=dest_dir, suffix=".part")
+    hasher = hashlib.sha256()
+    size = 0
+
+    def write_chunk(out, chunk: bytes):
+        hasher.update(chunk)
+        out.write(chunk)
+
+    try:
+        with os.fdopen(fd, "wb") as out:
+            while True:
+                chunk = await file.read(chunk_size)
+                if not chunk:
+                    break
+                if size == 0 and not chunk.startswith(PDF_MAGIC):
+                    raise HTTPException(400, detail="File is not a valid PDF")
+                size += len(chunk)
+                if size > max_bytes:
+                    raise HTTPException(413, detail=f"File too large (max {max_bytes // (1024 * 1024)}MB)")
+                await run_in_threadpool(write_chunk, out, chunk)
+
+        if size == 0:
+            raise HTTPException(400, detail="Uploaded file is empty")
+    except BaseException:
+        SpooledUpload(temp_path, size, "").discard()
+        raise
+
+    return SpooledUpload(temp_path, size, hasher.hexdigest())
+
+
+def blob_key(sha256: str) -> str:
+    """Content address of a file, sharded by the leading hash bytes"""
+    return f"{sha256[:2]}/{sha256[2:4]}/{sha256}.pdf"
+
+
+def blob_path(sha256: str, root: str = config.UPLOAD_DIR) -> str:
+    """Location of a content-addressed file under a local storage root"""
+    return os.path.join(root, *blob_key(sha256).split("/"))
+
+
+class StorageBackend(ABC):
+    """Where resume files live. Keys are relative, '/'-separated paths."""
+
+    @abstractmethod
+    def put_file(self, key: str, source_path: str):
+        """Store a local file under ``key``; the source file is consumed"""
+
+    @abstractmethod
+    def exists(self, key: str) -> bool:
+        ...
+
+    @abstractmethod
+    def size(self, key: str) -> int:
+        """Size in bytes; raises FileNotFoundError for missing keys"""
+
+    @abstractmethod
+    def open_range(self, key: str, start: int, end: int) -> Iterator[bytes]:
+        """Yield bytes ``start``..``end`` (inclusive) of a stored file"""
+
+    @abstractmethod
+    def delete(self, key: str):
+        ...
+
+    @abstractmethod
+    @contextmanager
+    def local_path(self, key: str) -> Iterator[str]:
+        """A readable local path for the file, valid inside the context"""
+
+
+class LocalStorage(StorageBackend):
+    """Files on a local (or shared) filesystem under ``root``"""
+
+    def __init__(self, root: str = config.UPLOAD_DIR, chunk_size: int = config.UPLOAD_CHUNK_SIZE):
+        self.root = root
+        self.chunk_size = chunk_size
+        os.makedirs(root, exist_ok=True)
+
+    def path(self, key: str) -> str:
+        if os.path.isabs(key):
+            return key
+        return os.path.join(self.root, *key.split("/"))
+
+    def put_file(self, key: str, source_path: str):
+        path = self.path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        os.replace(source_path, path)
+
+    def exists(self, key: str) -> bool:
+        return os.path.exists(self.path(key))
+
+    def size(self, key: str) -> int:
+        return os.path.getsize(self.path(key))
+
+    def open_range(self, key: str, start: int, end: int) -> Iterator[bytes]:
+        remaining = end - start + 1
+        with open(self.path(key), "rb") as f:
+            f.seek(start)
+            while remaining > 0:
+                chunk = f.read(min(self.chunk_size, remaining))
+                if not chunk:
+                    break
+                remaining -= len(chunk)
+                yield chunk
+
+    def delete(self, key: str):
+        try:
+            os.remove(self.path(key))
+        except FileNotFoundError:
+            pass
+
+    @contextmanager
+    def local_path(self, key: str) -> Iterator[str]:
+        yield self.path(key)
+
+
+class ReadThroughCache:
+    """Bounded on-disk LRU of objects fetched from a remote store.
+
+    Each process caches in its own directory under ``root``, so workers
+    sharing ``root`` never evict, discard or wipe each other's files.
+    """
+
+    def __init__(self, root: str, max_bytes: int):
+        os.makedirs(root, exist_ok=True)
+        self.directory = tempfile.mkdtemp(dir=root, prefix=f"worker-{os.getpid()}-")
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[str, int]" = OrderedDict()
+        self._pins: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        atexit.register(self.close)
+
+    def close(self):
+        """Remove this process's cache directory"""
+        with self._lock:
+            self._entries.clear()
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, hashlib.sha256(key.encode()).hexdigest())
+
+    def _remove(self, key: str):
+        try:
+            os.remove(self._path(key))
+        except FileNotFoundError:
+            pass
+
+    @contextmanager
+    def fetch(self, key: str, download: Callable[[str], None]) -> Iterator[str]:
+        """Path of the cached copy of ``key``, downloading it on a miss.
+
+        The entry is pinned while the context is open so eviction never
+        removes a file that is being read.
+        """
+        path = self._path(key)
+        with self._lock:
+            cached = key in self._entries
+            if cached and not os.path.exists(path):
+                # Removed behind our back; fetch it again
+                del self._entries[key]
+                cached = False
+            if cached:
+                self._entries.move_to_end(key)
+                self.hits += 1
+            else:
+                self.misses += 1
+            record_cache_lookup("storage", cached)
+            self._pins[key] = self._pins.get(key, 0) + 1
+
+        try:
+            if not cached:
+                os.makedirs(self.directory, exist_ok=True)
+                fd, temp_path = tempfile.mkstemp(dir=self.directory, suffix=".part")
+                os.close(fd)
+                try:
+                    download(temp_path)
+                    os.replace(temp_path, path)
+                except BaseException:
+                    if os.path.exists(temp_path):
+                        os.remove(temp_path)
+                    raise
+                with self._lock:
+                    self._entries[key] = os.path.getsize(path)
+                    self._evict()
+            yield path
+        finally:
+            with self._lock:
+                self._pins[key] -= 1
+                if not self._pins[key]:
+                    del self._pins[key]
+
+    def discard(self, key: str):
+        with self._lock:
+            if self._entries.pop(key, None) is not None and key not in self._pins:
+                self._remove(key)
+
+    def _evict(self):
+        total = sum(self._entries.values())
+        for key in list(self._entries):
+            if total <= self.max_bytes:
+                break
+            if key in self._pins:
+                continue
+            total -= self._entries.pop(key)
+            self._remove(key)
+
+
+def _is_missing(error: Exception) -> bool:
+    code = getattr(error, "code", None)
+    return isinstance(error, FileNotFoundError) or code in ("NoSuchKey", "NoSuchObject", "NotFound")
+
+
+class ObjectStorage(StorageBackend):
+    """S3 / MinIO bucket accessed through a ``minio.Minio``-compatible client"""
+
+    def __init__(
+        self,
+        client,
+        bucket: str,
+        cache: ReadThroughCache,
+        part_size: int = config.S3_PART_SIZE,
+        parallel_uploads: int = config.S3_PARALLEL_UPLOADS,
+        chunk_size: int = config.UPLOAD_CHUNK_SIZE
+    ):
+        self.client = client
+        self.bucket = bucket
+        self.cache = cache
+        self.part_size = part_size
+        self.parallel_uploads = parallel_uploads
+        self.chunk_size = chunk_size
+        if not client.bucket_exists(bucket):
+            client.make_bucket(bucket)
+
+    def put_file(self, key: str, source_path: str):
+        # Files larger than part_size go up as a multipart upload with
+        # parts sent in parallel
+        self.client.fput_object(
+            self.bucket,
+            key,
+            source_path,
+            content_type="application/pdf",
+            part_size=self.part_size,
+            num_parallel_uploads=self.parallel_uploads
+        )
+        os.remove(source_path)
+
+    def exists(self, key: str) -> bool:
+        try:
+            self.client.stat_object(self.bucket, key)
+            return True
+        except Exception as e:
+            if _is_missing(e):
+                return False
+            raise
+
+    def size(self, key: str) -> int:
+        try:
+            return self.client.stat_object(self.bucket, key).size
+        except Exception as e:
+            if _is_missing(e):
+                raise FileNotFoundError(key) from e
+            raise
+
+    def open_range(self, key: str, start: int, end: int) -> Iterator[bytes]:
+        response = self.client.get_object(self.bucket, key, offset=start, length=end - start + 1)
+        try:
+            for chunk in response.stream(self.chunk_size):
+                yield chunk
+        finally:
+            response.close()
+            response.release_conn()
+
+    def delete(self, key: str):
+        self.cache.discard(key)
+        self.client.remove_object(self.bucket, key)
+
+    @contextmanager
+    def local_path(self, key: str) -> Iterator[str]:
+        with self.cache.fetch(key, lambda dest: self.client.fget_object(self.bucket, key, dest)) as path:
+            yield path
+
+
+class _FakeObject:
+    def __init__(self, data: bytes):
+        self._buffer = io.BytesIO(data)
+
+    def stream(self, amt: int = 64 * 1024) -> Iterator[bytes]:
+        while True:
+            chunk = self._buffer.read(amt)
+            if not chunk:
+                break
+            yield chunk
+
+    def read(self) -> bytes:
+        return self._buffer.read()
+
+    def close(self):
+        pass
+
+    def release_conn(self):
+        pass
+
+
+@dataclass
+class _FakeStat:
+    size: int
+
+
+class FakeObjectStoreClient:
+    """In-process stand-in for the subset of ``minio.Minio`` used by ObjectStorage.
+
+    Lets the object-storage code path run without a MinIO server, e.g.
+    with STORAGE_BACKEND=memory or in tests.
+    """
+
+    def __init__(self, part_delay: float = 0.0):
+        self.buckets: Dict[str, Dict[str, bytes]] = {}
+        self.multipart_uploads = 0
+        self.parts_uploaded = 0
+        # Most parts in flight at once, to observe parallel uploads
+        self.max_parts_in_flight = 0
+        self.part_delay = part_delay
+        self._parts_in_flight = 0
+        self._lock = threading.Lock()
+
+    def bucket_exists(self, bucket: str) -> bool:
+        return bucket in self.buckets
+
+    def make_bucket(self, bucket: str):
+        self.buckets.setdefault(bucket, {})
+
+    def _upload_part(self, file_path: str, offset: int, length: int) -> bytes:
+        with self._lock:
+            self._parts_in_flight += 1
+            self.max_parts_in_flight = max(self.max_parts_in_flight, self._parts_in_flight)
+        try:
+            with open(file_path, "rb") as f:
+                f.seek(offset)
+                part = f.read(length)
+            time.sleep(self.part_delay)
+            return part
+        finally:
+            with self._lock:
+                self._parts_in_flight -= 1
+                self.parts_uploaded += 1
+
+    def fput_object(self, bucket: str, key: str, file_path: str, content_type: str = None,
+                    part_size: int = 0, num_parallel_uploads: int = 1):
+        size = os.path.getsize(file_path)
+        if part_size and size > part_size:
+            # Parts are sent concurrently and stitched together in order
+            offsets = range(0, size, part_size)
+            with ThreadPoolExecutor(max_workers=max(1, num_parallel_uploads)) as executor:
+                parts = list(executor.map(lambda offset: self._upload_part(file_path, offset, part_size), offsets))
+            data = b"".join(parts)
+            with self._lock:
+                self.multipart_uploads += 1
+        else:
+            with open(file_path, "rb") as f:
+                data = f.read()
+        with self._lock:
+            self.buckets[bucket][key] = data
+
+    def _get(self, bucket: str, key: str) -> bytes:
+        try:
+            return self.buckets[bucket][key]
+        except KeyError:
+            raise FileNotFoundError(key)
+
+    def stat_object(self, bucket: str, key: str) -> _FakeStat:
+        return _FakeStat(len(self._get(bucket, key)))
+
+    def get_object(self, bucket: str, key: str, offset: int = 0, length: int = 0) -> _FakeObject:
+        data = self._get(bucket, key)
+        end = offset + length if length else len(data)
+        return _FakeObject(data[offset:end])
+
+    def fget_object(self, bucket: str, key: str, file_path: str):
+        with open(file_path, "wb") as f:
+            f.write(self._get(bucket, key))
+
+    def remove_object(self, bucket: str, key: str):
+        with self._lock:
+            self.buckets.get(bucket, {}).pop(key, None)
+
+
+def create_storage(backend: str = config.STORAGE_BACKEND) -> StorageBackend:
+    if backend == "local":
+        return LocalStorage(config.UPLOAD_DIR)
+
+    cache = ReadThroughCache(config.STORAGE_CACHE_DIR, config.STORAGE_CACHE_MAX_BYTES)
+    if backend == "s3":
+        from minio import Minio
+
+        client = Minio(
+            config.S3_ENDPOINT,
+            access_key=config.S3_ACCESS_KEY,
+            secret_key=config.S3_SECRET_KEY,
+            secure=config.S3_SECURE,
+            region=config.S3_REGION
+        )
+        return ObjectStorage(client, config.S3_BUCKET, cache)
+    if backend == "memory":
+        return ObjectStorage(FakeObjectStoreClient(), config.S3_BUCKET, cache)
+    raise ValueError(f"Unknown storage backend: {backend}")
+
+
+_storage: Optional[StorageBackend] = None
+
+
+def get_storage() -> StorageBackend:
+    global _storage
+    if _storage is None:
+        _storage = create_storage()
+    return _storage
+
+
+def _put_copy(storage: StorageBackend, key: str, upload: SpooledUpload):
+    """Store the spooled upload under ``key`` without consuming it"""
+    source = upload.temp_path + ".put"
+    try:
+        os.link(upload.temp_path, source)
+    except OSError:
+        shutil.copyfile(upload.temp_path, source)
+    try:
+        storage.put_file(key, source)
+    finally:
+        if os.path.exists(source):
+            os.remove(source)
+
+
+def store_blob(upload: SpooledUpload, storage: Optional[StorageBackend] = None) -> Tuple[str, bool]:
+    """Copy an upload to its content address.
+
+    Returns the storage key and whether a new object was created; an
+    identical file that is already stored is reused. The spooled upload is
+    kept for ``ensure_blob``, called once the referencing row is committed.
+    """
+    storage = storage or get_storage()
+    key = blob_key(upload.sha256)
+    if storage.exists(key):
+        return key, False
+
+    _put_copy(storage, key, upload)
+    return key, True
+
+
+def ensure_blob(upload: SpooledUpload, key: str, storage: Optional[StorageBackend] = None) -> bool:
+    """Store ``key`` again if it vanished, then drop the spooled upload.
+
+    A delete of the last committed resume sharing the file can remove it
+    while this upload's row is not yet visible. Returns whether the file
+    had to be stored again.
+    """
+    storage = storage or get_storage()
+    try:
+        if storage.exists(key):
+            return False
+        _put_copy(storage, key, upload)
+        return True
+    finally:
+        upload.discard()
+
+
+def remove_blob(key: str, storage: Optional[StorageBackend] = None):
+    """Delete a stored file once nothing references it any more"""
+    (storage or get_storage()).delete(key)
@@ -0,0 +1,99 @@
+import hashlib
+import logging
+import os
+import threading
+import time
+from typing import Dict, FrozenSet, NamedTuple, Tuple
+
+import orjson
+
+import config
+
+logger = logging.getLogger(__name__)
+
+
+class Vocabulary(NamedTuple):
+    """One loaded version of the taxonomy; replaced as a whole on reload"""
+    version: str
+    skills: FrozenSet[str]
+    aliases: Dict[str, str]
+    text_terms: Tuple[str, ...]
+
+
+def parse_taxonomy(data: bytes) -> Vocabulary:
+    """Build a vocabulary from the JSON taxonomy file.
+
+    ``skills`` maps categories to lowercase skill names, ``aliases`` maps
+    spellings to their canonical name and ``text_terms`` lists terms
+    matched anywhere in a resume's text. The version is the content hash.
+    """
+    raw = orjson.loads(data)
+    skills = raw.get("skills", {})
+    if isinstance(skills, dict):
+        skills = [name for names in skills.values() for name in names]
+    return Vocabulary(
+        version=hashlib.sha256(data).hexdigest()[:12],
+        skills=frozenset(name.strip().lower() for name in skills if name.strip()),
+        aliases={key.lower(): value for key, value in raw.get("aliases", {}).items()},
+        text_terms=tuple(raw.get("text_terms", ())),
+    )
+
+
+class SkillTaxonomy:
+    """Skill vocabulary from a data file, hot-reloaded without a restart.
+
+    Every worker checks the file's modification time at most every
+    ``check_interval`` seconds and swaps in the new vocabulary when it
+    changed. A file that fails to parse is logged and the previous
+    vocabulary stays in use.
+    """
+
+    def __init__(self, path: str = config.SKILL_TAXONOMY_PATH, check_interval: float = config.SKILL_TAXONOMY_CHECK_SECONDS):
+        self.path = path
+        self.check_interval = check_interval
+        self._vocabulary = Vocabulary("empty", frozenset(), {}, ())
+        self._mtime = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+        self.load()
+
+    def load(self) -> bool:
+        """Read the file; True when the vocabulary changed"""
+        with self._lock:
+            try:
+                mtime = os.stat(self.path).st_mtime_ns
+                with open(self.path, "rb") as f:
+                    vocabulary = parse_taxonomy(f.read())
+            except (OSError, ValueError, AttributeError, TypeError) as e:
+                logger.error(f"Could not load skill taxonomy {self.path}: {str(e)}")
+                return False
+            finally:
+                self._checked_at = time.monotonic()
+
+            self._mtime = mtime
+            changed = vocabulary.version != self._vocabulary.version
+            if changed:
+                self._vocabulary = vocabulary
+                logger.info(f"Loaded skill taxonomy {vocabulary.version}: {len(vocabulary.skills)} skills")
+            return changed
+
+    def refresh_if_changed(self) -> bool:
+        if time.monotonic() - self._checked_at < self.check_interval:
+            return False
+        try:
+            mtime = os.stat(self.path).st_mtime_ns
+        except OSError:
+            self._checked_at = time.monotonic()
+            return False
+        if mtime == self._mtime:
+            self._checked_at = time.monotonic()
+            return False
+        return self.load()
+
+    @property
+    def current(self) -> Vocabulary:
+        self.refresh_if_changed()
+        return self._vocabulary
+
+
+TAXONOMY = SkillTaxonomy()
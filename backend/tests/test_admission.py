@@ -0,0 +1,156 @@
+import asyncio
+
+import pytest
+
+from admission import AdmissionController, Overloaded
+
+
+def controller(**kwargs) -> AdmissionController:
+    options = {"max_concurrent": 1, "max_queue": 4, "max_wait": 5.0, "bulk_queue_share": 0.5, "initial_service_time": 2.0}
+    return AdmissionController(**{**options, **kwargs})
+
+
+async def hold(admission: AdmissionController, priority: str, release: asyncio.Event, order: list, name: str):
+    async with admission.admit(priority):
+        order.append(name)
+        await release.wait()
+
+
+async def settle():
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+
+def test_waiters_admitted_by_priority_then_arrival():
+    async def scenario():
+        admission = controller()
+        release = asyncio.Event()
+        order = []
+        holder = asyncio.create_task(hold(admission, "interactive", release, order, "holder"))
+        await settle()
+        waiters = []
+        for name, priority in [("bulk-1", "bulk"), ("interactive-1", "interactive"),
+                               ("bulk-2", "bulk"), ("interactive-2", "interactive")]:
+            waiters.append(asyncio.create_task(hold(admission, priority, release, order, name)))
+            await settle()
+        assert admission.queued == {"interactive": 2, "bulk": 2}
+
+        release.set()
+        await asyncio.gather(holder, *waiters)
+        return order, admission
+
+    order, admission = asyncio.run(scenario())
+    assert order == ["holder", "interactive-1", "interactive-2", "bulk-1", "bulk-2"]
+    assert admission.active == 0
+    assert admission.queue_length == 0
+
+
+def test_full_queue_is_refused_with_429_and_retry_after():
+    async def scenario():
+        admission = controller(max_queue=2)
+        release = asyncio.Event()
+        order = []
+        tasks = [asyncio.create_task(hold(admission, "interactive", release, order, "holder"))]
+        await settle()
+        # Bulk may only use half of the queue
+        tasks.append(asyncio.create_task(hold(admission, "bulk", release, order, "bulk")))
+        await settle()
+        with pytest.raises(Overloaded) as bulk_refused:
+            async with admission.admit("bulk"):
+                pass
+
+        tasks.append(asyncio.create_task(hold(admission, "interactive", release, order, "interactive")))
+        await settle()
+        with pytest.raises(Overloaded) as refused:
+            async with admission.admit("interactive"):
+                pass
+
+        release.set()
+        await asyncio.gather(*tasks)
+        return bulk_refused.value, refused.value
+
+    bulk_refused, refused = asyncio.run(scenario())
+    assert bulk_refused.status_code == refused.status_code == 429
+    # Two queued plus this request, one slot, 2 s per analysis
+    assert refused.headers["Retry-After"] == "6"
+
+
+def test_waiting_past_max_wait_gets_503():
+    async def scenario():
+        admission = controller(max_wait=0.05)
+        release = asyncio.Event()
+        holder = asyncio.create_task(hold(admission, "interactive", release, [], "holder"))
+        await settle()
+        with pytest.raises(Overloaded) as timed_out:
+            async with admission.admit("interactive"):
+                pass
+        queued_after_timeout = admission.queue_length
+        release.set()
+        await holder
+        return timed_out.value, queued_after_timeout, admission
+
+    timed_out, queued_after_timeout, admission = asyncio.run(scenario())
+    assert timed_out.status_code == 503
+    assert int(timed_out.headers["Retry-After"]) >= 1
+    assert queued_after_timeout == 0
+    assert admission.active == 0
+
+
+def test_cancelled_waiter_does_not_keep_or_leak_a_slot():
+    async def scenario():
+        admission = controller()
+        release = asyncio.Event()
+        order = []
+        holder = asyncio.create_task(hold(admission, "interactive", release, order, "holder"))
+        await settle()
+        cancelled = asyncio.create_task(hold(admission, "interactive", release, order, "cancelled"))
+        after = asyncio.create_task(hold(admission, "interactive", release, order, "after"))
+        await settle()
+
+        cancelled.cancel()
+        await settle()
+        assert admission.queued["interactive"] == 1
+
+        release.set()
+        await asyncio.gather(holder, after)
+        return order, admission, cancelled
+
+    order, admission, cancelled = asyncio.run(scenario())
+    assert cancelled.cancelled()
+    assert order == ["holder", "after"]
+    assert admission.active == 0
+
+
+def test_slot_handed_over_as_waiter_is_cancelled_is_passed_on():
+    async def scenario():
+        admission = controller()
+        release = asyncio.Event()
+        order = []
+        holder = asyncio.create_task(hold(admission, "interactive", release, order, "holder"))
+        await settle()
+        cancelled = asyncio.create_task(hold(admission, "interactive", release, order, "cancelled"))
+        after = asyncio.create_task(hold(admission, "interactive", release, order, "after"))
+        await settle()
+
+        # The holder hands its slot to the first waiter, which is cancelled
+        # before it gets to run
+        release.set()
+        cancelled.cancel()
+        await asyncio.gather(holder, after)
+        return order, admission
+
+    order, admission = asyncio.run(scenario())
+    assert order == ["holder", "after"]
+    assert admission.active == 0
+
+
+def test_exception_inside_admission_releases_the_slot():
+    async def scenario():
+        admission = controller()
+        with pytest.raises(RuntimeError):
+            async with admission.admit("interactive"):
+                raise RuntimeError("analysis failed")
+        async with admission.admit("interactive"):
+            return admission.active
+
+    assert asyncio.run(scenario()) == 1
@@ -0,0 +1,149 @@
+import asyncio
+
+from singleflight import EventFeed, SingleFlight
+
+
+async def settle():
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+
+class Work:
+    """A coalesced call that is queued until ``start`` and done at ``finish``"""
+
+    def __init__(self):
+        self.start = asyncio.Event()
+        self.finish = asyncio.Event()
+        self.started = False
+        self.runs = 0
+        self.cancelled = False
+
+    async def __call__(self):
+        self.runs += 1
+        try:
+            await self.start.wait()
+            self.started = True
+            await self.finish.wait()
+            return "result"
+        except asyncio.CancelledError:
+            self.cancelled = True
+            raise
+
+    def cancellable(self) -> bool:
+        return not self.started
+
+
+def test_concurrent_calls_share_one_execution():
+    async def scenario():
+        flights, work = SingleFlight("test_shared"), Work()
+        calls = [asyncio.create_task(flights.do("key", work, work.cancellable)) for _ in range(3)]
+        await settle()
+        work.start.set()
+        work.finish.set()
+        return await asyncio.gather(*calls), work
+
+    results, work = asyncio.run(scenario())
+    assert work.runs == 1
+    assert [shared for _, shared in results] == [False, True, True]
+    assert all(result == "result" for result, _ in results)
+
+
+def test_leader_leaving_does_not_cancel_the_follower():
+    async def scenario():
+        flights, work = SingleFlight("test_leader_cancel"), Work()
+        leader = asyncio.create_task(flights.do("key", work, work.cancellable))
+        await settle()
+        follower = asyncio.create_task(flights.do("key", work, work.cancellable))
+        await settle()
+
+        leader.cancel()
+        await settle()
+        work.start.set()
+        work.finish.set()
+        return leader, await follower, work
+
+    leader, follower_result, work = asyncio.run(scenario())
+    assert leader.cancelled()
+    assert follower_result == ("result", True)
+    assert not work.cancelled and work.runs == 1
+
+
+def test_follower_leaving_does_not_cancel_the_leader():
+    async def scenario():
+        flights, work = SingleFlight("test_waiter_cancel"), Work()
+        leader = asyncio.create_task(flights.do("key", work, work.cancellable))
+        await settle()
+        follower = asyncio.create_task(flights.do("key", work, work.cancellable))
+        await settle()
+
+        work.start.set()
+        await settle()
+        follower.cancel()
+        await settle()
+        work.finish.set()
+        return await leader, follower, work
+
+    leader_result, follower, work = asyncio.run(scenario())
+    assert follower.cancelled()
+    assert leader_result == ("result", False)
+    assert not work.cancelled
+
+
+def test_queued_work_is_cancelled_when_every_caller_leaves():
+    async def scenario():
+        flights, work = SingleFlight("test_queued_cancel"), Work()
+        callers = [asyncio.create_task(flights.do("key", work, work.cancellable)) for _ in range(2)]
+        await settle()
+        for caller in callers:
+            caller.cancel()
+        await settle()
+        return flights, work
+
+    flights, work = asyncio.run(scenario())
+    assert work.cancelled
+    assert flights.in_flight() == 0
+
+
+def test_running_work_survives_every_caller_leaving_and_is_joined():
+    async def scenario():
+        flights, work = SingleFlight("test_running_cancel"), Work()
+        leader = asyncio.create_task(flights.do("key", work, work.cancellable))
+        await settle()
+        work.start.set()
+        await settle()
+        leader.cancel()
+        await settle()
+        assert not work.cancelled
+        assert flights.in_flight() == 1
+
+        # A later caller joins the running execution instead of starting another
+        latecomer = asyncio.create_task(flights.do("key", work, work.cancellable))
+        await settle()
+        work.finish.set()
+        return await latecomer, flights, work
+
+    result, flights, work = asyncio.run(scenario())
+    assert result == ("result", True)
+    assert work.runs == 1
+    assert flights.in_flight() == 0
+
+
+def test_late_subscriber_gets_earlier_events_first():
+    async def scenario():
+        feed, early, late = EventFeed(), asyncio.Queue(), asyncio.Queue()
+        feed.subscribe(early)
+        # Emitted from the thread running the work
+        await asyncio.to_thread(feed.emit, "skills")
+        await settle()
+        feed.subscribe(late)
+        feed.emit("projects")
+        await settle()
+        feed.unsubscribe(early)
+        feed.emit("metadata")
+        await settle()
+        drain = lambda queue: [queue.get_nowait() for _ in range(queue.qsize())]
+        return drain(early), drain(late)
+
+    early, late = asyncio.run(scenario())
+    assert early == ["skills", "projects"]
+    assert late == ["skills", "projects", "metadata"]
@@ -0,0 +1,45 @@
+import asyncio
+
+import pytest
+from fastapi.concurrency import run_in_threadpool
+
+import stage_cache
+from stage_cache import memoized
+from stages import Stage, StageGraph
+
+
+@pytest.fixture
+def cached(monkeypatch):
+    """A stage cache that has every output stored and records writes"""
+    saved = []
+    monkeypatch.setattr(stage_cache.config, "STAGE_CACHE_ENABLED", True)
+    monkeypatch.setattr(stage_cache, "_load", lambda stage, version, input_hash: f"cached {stage}")
+    monkeypatch.setattr(stage_cache, "_save", lambda *args: saved.append(args))
+    return saved
+
+
+def graph() -> StageGraph:
+    return StageGraph([
+        Stage("bert", memoized("bert", "1")(lambda text: f"computed {text}"), deps=("text",)),
+        Stage("spacy", memoized("spacy", "1")(lambda text: f"computed {text}"), deps=("text",)),
+    ])
+
+
+def test_stages_read_the_cache(cached):
+    run = graph().run(text="resume")
+    assert run.results["bert"] == "cached bert"
+    assert run.results["spacy"] == "cached spacy"
+
+
+def test_bypass_reaches_stage_threads(cached):
+    async def profile_run():
+        with stage_cache.bypass():
+            return await run_in_threadpool(lambda: graph().run(text="resume"))
+
+    run = asyncio.run(profile_run())
+    assert run.results["bert"] == "computed resume"
+    assert run.results["spacy"] == "computed resume"
+    # Fresh outputs are not written back either
+    assert cached == []
+    # Outside the context the cache is used again
+    assert graph().run(text="resume").results["bert"] == "cached bert"
@@ -0,0 +1,163 @@
+import os
+
+import pytest
+
+from storage import FakeObjectStoreClient, ObjectStorage, ReadThroughCache
+
+
+def write_file(directory, name: str, data: bytes) -> str:
+    path = os.path.join(directory, name)
+    with open(path, "wb") as f:
+        f.write(data)
+    return path
+
+
+def read_range(storage: ObjectStorage, key: str, start: int, end: int) -> bytes:
+    return b"".join(storage.open_range(key, start, end))
+
+
+@pytest.fixture
+def cache(tmp_path):
+    cache = ReadThroughCache(str(tmp_path / "cache"), max_bytes=1024)
+    yield cache
+    cache.close()
+
+
+@pytest.fixture
+def client():
+    return FakeObjectStoreClient(part_delay=0.02)
+
+
+@pytest.fixture
+def storage(client, cache):
+    return ObjectStorage(client, "resumes", cache, part_size=1024, parallel_uploads=4, chunk_size=100)
+
+
+def test_multipart_upload_is_parallel_and_byte_exact(storage, client, tmp_path):
+    data = os.urandom(10 * 1024 + 17)
+    source = write_file(tmp_path, "upload.part", data)
+
+    storage.put_file("aa/bb/blob.pdf", source)
+
+    assert not os.path.exists(source)
+    assert client.multipart_uploads == 1
+    assert client.parts_uploaded == 11
+    assert client.max_parts_in_flight > 1
+    assert client.buckets["resumes"]["aa/bb/blob.pdf"] == data
+
+
+def test_small_upload_is_a_single_put(storage, client, tmp_path):
+    storage.put_file("small.pdf", write_file(tmp_path, "small.part", b"%PDF-1.4"))
+
+    assert client.multipart_uploads == 0
+    assert client.buckets["resumes"]["small.pdf"] == b"%PDF-1.4"
+
+
+def test_open_range_edges(storage, tmp_path):
+    data = bytes(range(256)) * 4
+    storage.put_file("blob.pdf", write_file(tmp_path, "blob.part", data))
+    last = len(data) - 1
+
+    assert read_range(storage, "blob.pdf", 0, 0) == data[:1]
+    assert read_range(storage, "blob.pdf", last, last) == data[-1:]
+    assert read_range(storage, "blob.pdf", 0, last) == data
+    # Chunked by chunk_size but reassembled in order
+    assert read_range(storage, "blob.pdf", 50, 749) == data[50:750]
+    # A range running past EOF stops at the last byte
+    assert read_range(storage, "blob.pdf", last - 9, last + 100) == data[-10:]
+    assert storage.size("blob.pdf") == len(data)
+
+
+def test_missing_object(storage):
+    assert not storage.exists("missing.pdf")
+    with pytest.raises(FileNotFoundError):
+        storage.size("missing.pdf")
+
+
+def test_read_through_cache_hits_and_misses(storage, cache, tmp_path):
+    storage.put_file("blob.pdf", write_file(tmp_path, "blob.part", b"x" * 100))
+
+    with storage.local_path("blob.pdf") as path:
+        with open(path, "rb") as f:
+            assert f.read() == b"x" * 100
+    with storage.local_path("blob.pdf") as again:
+        assert again == path
+
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_cache_redownloads_missing_file(cache):
+    downloads = []
+
+    def download(dest):
+        downloads.append(dest)
+        write_file(os.path.dirname(dest), os.path.basename(dest), b"data")
+
+    with cache.fetch("key", download) as path:
+        pass
+    os.remove(path)
+    with cache.fetch("key", download) as path:
+        assert os.path.exists(path)
+
+    assert len(downloads) == 2
+
+
+def test_cache_evicts_least_recently_used(cache):
+    def download(size):
+        return lambda dest: write_file(os.path.dirname(dest), os.path.basename(dest), b"x" * size)
+
+    paths = {}
+    for key in ("a", "b", "c"):
+        with cache.fetch(key, download(400)) as path:
+            paths[key] = path
+    # 1200 bytes > 1024: the oldest entry goes
+    assert not os.path.exists(paths["a"])
+    assert os.path.exists(paths["b"]) and os.path.exists(paths["c"])
+
+    with cache.fetch("b", download(400)):
+        pass
+    with cache.fetch("d", download(400)):
+        pass
+    # "b" was used more recently than "c"
+    assert os.path.exists(paths["b"])
+    assert not os.path.exists(paths["c"])
+
+
+def test_pinned_entries_survive_eviction(cache):
+    def download(size):
+        return lambda dest: write_file(os.path.dirname(dest), os.path.basename(dest), b"x" * size)
+
+    with cache.fetch("pinned", download(600)) as pinned:
+        with cache.fetch("other", download(600)) as other:
+            pass
+        with cache.fetch("third", download(100)):
+            pass
+        # "pinned" is the least recently used, but still being read
+        assert os.path.exists(pinned)
+        assert not os.path.exists(other)
+        with open(pinned, "rb") as f:
+            assert len(f.read()) == 600
+
+
+def test_delete_discards_cached_copy(storage, cache, tmp_path):
+    storage.put_file("blob.pdf", write_file(tmp_path, "blob.part", b"x" * 100))
+    with storage.local_path("blob.pdf") as path:
+        pass
+
+    storage.delete("blob.pdf")
+
+    assert not storage.exists("blob.pdf")
+    assert not os.path.exists(path)
+    with pytest.raises(FileNotFoundError):
+        with storage.local_path("blob.pdf"):
+            pass
+
+
+def test_caches_sharing_a_root_are_isolated(tmp_path):
+    root = str(tmp_path / "shared")
+    first, second = ReadThroughCache(root, 1024), ReadThroughCache(root, 1024)
+    with first.fetch("key", lambda dest: write_file(os.path.dirname(dest), os.path.basename(dest), b"data")) as path:
+        second.close()
+        assert os.path.exists(path)
+    first.close()
+    assert not os.path.exists(first.directory)
@@ -32,9 +32,86 @@ const ExperienceCard = styled(Paper)(({ theme }) => ({
   }
 }));
 
+// Analysis is admission-controlled: a busy server answers 429/503 with Retry-After
+const ANALYZE_TIMEOUT_MS = 120000;
+const MAX_ANALYZE_ATTEMPTS = 3;
+
+const retryDelayMs = (error) => {
+  const retryAfter = Number(error.response?.headers?.['retry-after']);
+  return (Number.isFinite(retryAfter) && retryAfter > 0 ? retryAfter : 5) * 1000;
+};
+
+// Sections stream in as NDJSON events while the slower NER stages run
+const EMPTY_ANALYSIS = {
+  metadata: { name: '', email: '', phone: '' },
+  skills: [],
+  experience: [],
+  education: [],
+  projects: []
+};
+
+// Shaped like an axios error so the retry handling below applies
+const httpError = (status, data = {}) => Object.assign(
+  new Error(data.detail || 'Analysis failed'),
+  { response: { status, data, headers: { 'retry-after': data.retry_after } } }
+);
+
+const streamAnalysis = async (resumeId, signal, onEvent) => {
+  const timeout = new AbortController();
+  const timer = setTimeout(() => timeout.abort(), ANALYZE_TIMEOUT_MS);
+  const abort = () => timeout.abort();
+  signal.addEventListener('abort', abort, { once: true });
+  try {
+    const response = await fetch(
+      `${apiClient.defaults.baseURL}/resumes/${resumeId}/analyze/stream`,
+      { signal: timeout.signal }
+    );
+    if (!response.ok) {
+      throw httpError(response.status, await response.json().catch(() => ({})));
+    }
+    const reader = response.body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = '';
+    for (;;) {
+      const { done, value } = await reader.read();
+      if (done) break;
+      buffer += decoder.decode(value, { stream: true });
+      const lines = buffer.split('\n');
+      buffer = lines.pop();
+      for (const line of lines.filter(Boolean)) {
+        const { event, data } = JSON.parse(line);
+        if (event === 'error') throw httpError(data.status, data);
+        onEvent(event, data);
+        if (event === 'complete') return;
+      }
+    }
+    throw new Error('Analysis stream ended early');
+  } catch (err) {
+    if (err.name === 'AbortError') {
+      throw Object.assign(
+        new Error(signal.aborted ? 'canceled' : 'Analysis timed out'),
+        signal.aborted ? { name: 'CanceledError' } : {}
+      );
+    }
+    throw err;
+  } finally {
+    clearTimeout(timer);
+    signal.removeEventListener('abort', abort);
+  }
+};
+
+const sleep = (ms, signal) => new Promise((resolve, reject) => {
+  const timer = setTimeout(resolve, ms);
+  signal.addEventListener('abort', () => {
+    clearTimeout(timer);
+    reject(Object.assign(new Error('canceled'), { name: 'CanceledError' }));
+  }, { once: true });
+});
+
 export default function ResumeAnalysis({ resumeId }) {
   const [analysis, setAnalysis] = React.useState(null);
   const [loading, setLoading] = React.useState(false);
+  const [streaming, setStreaming] = React.useState(false);
   const [error, setError] = React.useState(null);
   const [timeoutReached, setTimeoutReached] = React.useState(false);
 
@@ -50,13 +127,31 @@ export default function ResumeAnalysis({ resumeId }) {
       setLoading(true);
       setError(null);
       setTimeoutReached(false);
+      setAnalysis(null);
       
       try {
-        const { data } = await apiClient.get(`resumes/${resumeId}/analyze`, {
-          signal: controller.signal,
-          timeout: 10000
-        });
-        setAnalysis(data);
+        for (let attempt = 1; ; attempt++) {
+          try {
+            setStreaming(true);
+            await streamAnalysis(resumeId, controller.signal, (event, data) => {
+              if (event === 'complete') {
+                setAnalysis(data.analysis);
+                return;
+              }
+              // Show the page as soon as the first section is in
+              setAnalysis(prev => ({ ...EMPTY_ANALYSIS, ...prev, [event]: data }));
+              setLoading(false);
+            });
+            break;
+          } catch (err) {
+            const status = err.response?.status;
+            if ((status !== 429 && status !== 503) || attempt >= MAX_ANALYZE_ATTEMPTS) {
+              throw err;
+            }
+            setTimeoutReached(true);
+            await sleep(retryDelayMs(err), controller.signal);
+          }
+        }
       } catch (err) {
         // Check if the error is from cancellation
         if (err.code === 'ERR_CANCELED' || err.name === 'CanceledError') {
@@ -77,6 +172,7 @@ export default function ResumeAnalysis({ resumeId }) {
       } finally {
         clearTimeout(timeoutId);
         setLoading(false);
+        setStreaming(false);
       }
     };
     
@@ -132,6 +228,9 @@ export default function ResumeAnalysis({ resumeId }) {
 
   return (
     <StyledPaper>
+        {streaming && (
+          <LinearProgress sx={{ mb: 2, borderRadius: 4 }} />
+        )}
         {/* Header Section */}
         <Box sx={{ 
             display: 'flex', 
@@ -2,7 +2,8 @@ import axios from 'axios';
 
 const apiClient = axios.create({
   baseURL: 'http://localhost:8000',
-  timeout: 5000000,
+  // Bounded so a stuck request fails instead of piling up behind a busy server
+  timeout: 60000,
   headers: {
     'Content-Type': 'multipart/form-data',
     'Accept': 'multipart/form-data'